@@ -1,25 +1,113 @@
 import pandas as pd
 import numpy as np
 from scipy import stats
-import ta
 import json
-import yfinance as yf
+import threading
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
+from indicators import compute_indicators
+from downsample import downsample_series
+
+_UNSET = object()
+
+class AnalysisContext:
+    """
+    Price history plus the series derived from it (returns, cumulative
+    wealth, running peak, drawdown, calendar keys...), each computed on first
+    use and shared by every calculate_* function of a request.
+
+    All calculate_* functions accept either a DataFrame or a context; pass
+    the same context to several of them to skip the repeated passes.
+    Safe to share between analytics threads.
+    """
+    def __init__(self, data):
+        self.data = data
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def of(cls, data):
+        return data if isinstance(data, cls) else cls(data)
+
+    def _memo(self, name, compute):
+        value = self._cache.get(name, _UNSET)
+        if value is _UNSET:
+            with self._lock:
+                value = self._cache.get(name, _UNSET)
+                if value is _UNSET:
+                    value = self._cache[name] = compute()
+        return value
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def close(self):
+        return self.data['Close']
+
+    @property
+    def returns(self):
+        """Simple returns (pct_change), first bar dropped."""
+        return self._memo("returns", lambda: self.close.pct_change().dropna())
+
+    @property
+    def log_returns(self):
+        return self._memo("log_returns", lambda: np.log(self.close / self.close.shift(1)).dropna())
+
+    @property
+    def cumulative(self):
+        """Growth of 1 invested at the first close."""
+        return self._memo("cumulative", lambda: (1 + self.returns).cumprod())
+
+    @property
+    def peak(self):
+        return self._memo("peak", lambda: self.cumulative.cummax())
+
+    @property
+    def drawdown(self):
+        return self._memo("drawdown", lambda: (self.cumulative / self.peak) - 1)
+
+    @property
+    def day_of_week(self):
+        """Weekday (0 = Monday) of each return."""
+        return self._memo("day_of_week", lambda: self.returns.index.dayofweek)
+
+    @property
+    def daily_returns(self):
+        """
+        Returns indexed by naive calendar date, so series from exchanges in
+        different time zones line up day by day (benchmark_cache builds the
+        benchmark series with this too).
+        """
+        def compute():
+            daily = self.returns.copy()
+            if daily.index.tz is not None:
+                daily.index = daily.index.tz_localize(None)
+            daily.index = daily.index.normalize()
+            return daily
+        return self._memo("daily_returns", compute)
+
+    @property
+    def unadjusted_close(self):
+        return self._memo("unadjusted_close", lambda: _unadjusted_close(self.data))
+
+    def histogram(self, bins=50):
+        """(counts, edges) of the simple returns."""
+        return self._memo(("histogram", bins), lambda: np.histogram(self.returns, bins=bins))
+
 
 def calculate_advanced_indicators(data):
     """
-    Calculates a comprehensive set of technical indicators using the 'ta' library.
+    Calculates a comprehensive set of technical indicators (see indicators.py).
     """
+    data = AnalysisContext.of(data).data
     if data.empty:
         return {}
 
-    # Copy data to avoid modifying original
-    df = data.copy()
-
     # Safeguard against insufficient data
-    if len(df) < 20:
+    if len(data) < 20:
         # Return basic indicators or empty structure to prevent crash
+        df = data.copy()
         latest = df.iloc[-1]
         return df, {
             "RSI": None,
@@ -33,45 +121,9 @@ def calculate_advanced_indicators(data):
             "OBV": None
         }
 
-    # RSI (Relative Strength Index)
-    df['RSI'] = ta.momentum.RSIIndicator(close=df['Close'], window=14).rsi()
-
-    # MACD (Moving Average Convergence Divergence)
-    macd = ta.trend.MACD(close=df['Close'])
-    df['MACD'] = macd.macd()
-    df['MACD_Signal'] = macd.macd_signal()
-    df['MACD_Hist'] = macd.macd_diff()
-
-    # Stochastic Oscillator
-    stoch = ta.momentum.StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'])
-    df['Stoch_K'] = stoch.stoch()
-    df['Stoch_D'] = stoch.stoch_signal()
-
-    # Bollinger Bands
-    bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
-    df['BB_High'] = bb.bollinger_hband()
-    df['BB_Low'] = bb.bollinger_lband()
-    df['BB_Mid'] = bb.bollinger_mavg()
-    
-    # ADX (Average Directional Index)
-    adx = ta.trend.ADXIndicator(high=df['High'], low=df['Low'], close=df['Close'])
-    df['ADX'] = adx.adx()
-
-    # ATR (Average True Range)
-    df['ATR'] = ta.volatility.AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close']).average_true_range()
-
-    # CCI (Commodity Channel Index)
-    df['CCI'] = ta.trend.CCIIndicator(high=df['High'], low=df['Low'], close=df['Close']).cci()
-
-    # Williams %R
-    df['Williams'] = ta.momentum.WilliamsRIndicator(high=df['High'], low=df['Low'], close=df['Close']).williams_r()
-
-    # OBV (On Balance Volume)
-    df['OBV'] = ta.volume.OnBalanceVolumeIndicator(close=df['Close'], volume=df['Volume']).on_balance_volume()
-
-    # SMA/EMA for basic chart
-    df['SMA_20'] = ta.trend.SMAIndicator(close=df['Close'], window=20).sma_indicator()
-    df['EMA_20'] = ta.trend.EMAIndicator(close=df['Close'], window=20).ema_indicator()
+    # RSI, MACD, Stochastic, Bollinger, ADX, ATR, CCI, Williams %R, OBV, SMA/EMA 20
+    # in a few fused NumPy passes (same values as the 'ta' library indicators)
+    df = data.assign(**compute_indicators(data['High'], data['Low'], data['Close'], data['Volume']))
     
     # Return the latest values for the dashboard cards, but keep the series for charts
     # We will attach the series to the chart_data in main.py, here we structure the "current state"
@@ -92,159 +144,104 @@ def calculate_advanced_indicators(data):
     
     return df, indicators
 
-def calculate_seasonality(data, ticker=None, start_date=None, end_date=None):
+def _unadjusted_close(data):
+    """
+    Undoes the dividend adjustment yfinance applies with auto_adjust=True,
+    giving the split-adjusted raw close that Yahoo reports in its
+    auto_adjust=False bars.
+    """
+    close = data['Close'].to_numpy(dtype=float)
+    if 'Dividends' not in data.columns:
+        return close
+
+    dividends = data['Dividends'].to_numpy(dtype=float)
+    events = np.flatnonzero(dividends[1:] != 0) + 1
+
+    # Yahoo multiplies every bar before an ex-date by (1 - D / raw_close_prev).
+    # Walking the ex-dates backwards, raw_close_prev = adj_close_prev / factor_prev,
+    # which solves to factor_prev = factor / (1 + factor * D / adj_close_prev).
+    multipliers = np.ones(len(close))
+    factor = 1.0
+    for k in events[::-1]:
+        new_factor = factor / (1 + factor * dividends[k] / close[k - 1])
+        multipliers[k - 1] = new_factor / factor
+        factor = new_factor
+
+    factors = np.cumprod(multipliers[::-1])[::-1]
+    return close / factors
+
+def build_monthly_bars(data, start_date=None, end_date=None):
+    """
+    Builds month-end bars from daily history, labelled at the first day of the
+    month like Yahoo's interval="1mo" data.
+
+    With start_date/end_date the range starts one month earlier so the first
+    requested month has a reference close (same as the adjusted_start logic of
+    the old monthly download).
+    """
+    context = AnalysisContext.of(data)
+    data = context.data
+    close = pd.Series(context.unadjusted_close, index=data.index)
+
+    if start_date and end_date:
+        tz = data.index.tz
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        adjusted_start = pd.Timestamp(start_dt - relativedelta(months=1), tz=tz)
+        close = close[(close.index >= adjusted_start) & (close.index < pd.Timestamp(end_date, tz=tz))]
+
+    monthly = close.resample('MS').last().dropna().to_frame('Close')
+    monthly['Returns'] = monthly['Close'].pct_change()
+    monthly['Month'] = monthly.index.month
+    monthly['Year'] = monthly.index.year
+
+    # El primer mes no tiene mes anterior (NaN del pct_change)
+    monthly = monthly.dropna(subset=['Returns'])
+
+    # Eliminar el mes "extra" de referencia
+    if start_date:
+        monthly = monthly[monthly.index >= start_date]
+
+    return monthly
+
+def calculate_seasonality(data, start_date=None, end_date=None, monthly_source=None):
     """
     Calculates monthly and day-of-week average returns.
     
     Args:
-        data: DataFrame con datos diarios
-        ticker: Símbolo del ticker
+        data: DataFrame (o AnalysisContext) con datos diarios
         start_date: Fecha de inicio en formato 'YYYY-MM-DD' (opcional)
         end_date: Fecha de fin en formato 'YYYY-MM-DD' (opcional)
+        monthly_source: Histórico diario completo para armar las barras mensuales
+            (opcional, por defecto `data`). Necesario con start_date para tener el
+            mes de referencia anterior al rango.
     """
-    df = data.copy()
-    df['Returns'] = df['Close'].pct_change()
-    df['Month'] = df.index.month
-    df['DayOfWeek'] = df.index.dayofweek
-    df['Year'] = df.index.year
+    context = AnalysisContext.of(data)
 
     # ========================================
     # PARTE 1: MONTHLY HEATMAP Y AVG MONTHLY
-    # (Usando datos MENSUALES - igual que mi script)
-    # ========================================
-    monthly_heatmap = None
-    avg_monthly_dict = {}
-    
-    if ticker:
-        search_ticker = ticker
-        
-        try:
-            # ============================================
-            # DESCARGA CON RANGO ESPECÍFICO (como mi script personal)
-            # ============================================
-            if start_date and end_date:
-                # Calcular 1 mes antes para tener el mes de referencia
-                # (Igual que mi script: adjusted_start = start_dt - relativedelta(months=1))
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                adjusted_start = (start_dt - relativedelta(months=1)).strftime('%Y-%m-%d')
-                
-                print(f"📅 Descargando datos mensuales de {adjusted_start} a {end_date}")
-                
-                # Descargar con rango específico (EXACTAMENTE como mi script)
-                monthly_data = yf.download(
-                    search_ticker,
-                    start=adjusted_start,
-                    end=end_date,
-                    interval="1mo",
-                    auto_adjust=False,
-                    progress=False
-                )
-                
-                # Fallback con Ticker.history si download falla
-                if monthly_data.empty:
-                    monthly_data = yf.Ticker(search_ticker).history(
-                        start=adjusted_start,
-                        end=end_date,
-                        interval="1mo",
-                        auto_adjust=False
-                    )
-            else:
-                # Sin rango específico, usar todo el histórico
-                print(f"📅 Descargando TODOS los datos mensuales (period=max)")
-                
-                monthly_data = yf.Ticker(search_ticker).history(
-                    period="max",
-                    interval="1mo",
-                    auto_adjust=False
-                )
-                
-                if monthly_data.empty:
-                    monthly_data = yf.download(
-                        search_ticker,
-                        period="max",
-                        interval="1mo",
-                        auto_adjust=False,
-                        progress=False
-                    )
-
-            if not monthly_data.empty:
-                # Normalizar MultiIndex si existe
-                if isinstance(monthly_data.columns, pd.MultiIndex):
-                    try:
-                        if search_ticker in monthly_data.columns.get_level_values(1):
-                            monthly_data = monthly_data.xs(search_ticker, level=1, axis=1)
-                        else:
-                            monthly_data = monthly_data.droplevel(1, axis=1)
-                    except:
-                        pass
-
-                # CALCULAR RETORNO MENSUAL (EXACTAMENTE como mi script)
-                # Mi script: data['Monthly Return (%)'] = data['Close'].pct_change() * 100
-                monthly_data['Returns'] = monthly_data['Close'].pct_change()
-                monthly_data['Month'] = monthly_data.index.month
-                monthly_data['Year'] = monthly_data.index.year
-                
-                # ============================================
-                # ELIMINAR PRIMER MES (tiene NaN del pct_change)
-                # Esto es crítico porque el primer mes no tiene mes anterior
-                # ============================================
-                monthly_data = monthly_data.dropna(subset=['Returns'])
-                
-                # Si hay start_date, filtrar datos >= start_date
-                # (para eliminar el mes "extra" que descargamos)
-                if start_date:
-                    monthly_data = monthly_data[monthly_data.index >= start_date]
-                
-                # LOGGING PARA DEBUGGING
-                print(f"✓ Datos mensuales procesados: {len(monthly_data)} meses")
-                if len(monthly_data) > 0:
-                    print(f"  Rango: {monthly_data.index[0].strftime('%Y-%m-%d')} a {monthly_data.index[-1].strftime('%Y-%m-%d')}")
-                    first_three = dict(list(monthly_data['Returns'].head(3).items()))
-                    print(f"  Primeros 3 retornos: {first_three}")
-                
-                # HEATMAP: Año vs Mes (EXACTAMENTE como mi script)
-                # Mi script: pivot_table = data.pivot_table(values='Monthly Return (%)', index='Year', columns='Month')
-                monthly_heatmap = monthly_data.pivot(
-                    index='Year',
-                    columns='Month',
-                    values='Returns'
-                )
-                
-                # AVG MONTHLY: Promedio de retornos mensuales por mes
-                # Mi script: monthly_avg_returns = data.groupby('Month')['Monthly Return (%)'].mean()
-                avg_monthly_series = monthly_data.groupby('Month')['Returns'].mean()
-                avg_monthly_dict = avg_monthly_series.to_dict()
-                
-        except Exception as e:
-            print(f"❌ Error fetching monthly data for seasonality: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    # ========================================
-    # FALLBACK: Si no se pudieron obtener datos mensuales
+    # (Barras mensuales armadas desde los datos diarios ya descargados)
     # ========================================
-    if monthly_heatmap is None:
-        print("⚠️ Warning: Usando fallback con composición de retornos diarios")
-        
-        # HEATMAP: Componer retornos diarios por mes
-        monthly_returns = df.groupby(['Year', 'Month'])['Returns'].apply(
-            lambda x: (x + 1).prod() - 1
-        ).reset_index()
-        monthly_heatmap = monthly_returns.pivot(
-            index='Year',
-            columns='Month',
-            values='Returns'
-        )
-        
-        # AVG MONTHLY: Promedio de retornos mensuales compuestos
-        avg_monthly_series = monthly_returns.groupby('Month')['Returns'].mean()
-        avg_monthly_dict = avg_monthly_series.to_dict()
+    monthly_data = build_monthly_bars(
+        monthly_source if monthly_source is not None else context,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    # HEATMAP: Año vs Mes
+    monthly_heatmap = monthly_data.pivot(
+        index='Year',
+        columns='Month',
+        values='Returns'
+    )
+
+    # AVG MONTHLY: Promedio de retornos mensuales por mes
+    avg_monthly_dict = monthly_data.groupby('Month')['Returns'].mean().to_dict()
     
     # ========================================
     # PARTE 2: AVG DAILY PERFORMANCE
     # (Usando datos DIARIOS - esto está correcto)
     # ========================================
-    avg_daily = df.groupby('DayOfWeek')['Returns'].mean() * 100  # En porcentaje
+    avg_daily = context.returns.groupby(context.day_of_week).mean() * 100  # En porcentaje
     avg_daily_dict = avg_daily.to_dict()
 
     # ========================================
@@ -252,7 +249,7 @@ def calculate_seasonality(data, ticker=None, start_date=None, end_date=None):
     # ========================================
     return {
         "monthly_heatmap": json.loads(monthly_heatmap.fillna(0).to_json(orient="split")),
-        "avg_monthly": avg_monthly_dict,  # Ahora usa retornos mensuales reales
+        "avg_monthly": avg_monthly_dict,
         "avg_daily": avg_daily_dict
     }
 
@@ -260,25 +257,34 @@ def calculate_distribution(data):
     """
     Calculates return distribution metrics.
     """
-    returns = data['Close'].pct_change().dropna()
-    
+    context = AnalysisContext.of(data)
+    returns = context.returns
+    counts, edges = context.histogram(50)
+
     return {
-        "histogram": np.histogram(returns, bins=50)[0].tolist(),
-        "bins": np.histogram(returns, bins=50)[1].tolist(),
+        "histogram": counts.tolist(),
+        "bins": edges.tolist(),
         "mean": returns.mean(),
         "median": returns.median(),
         "skew": stats.skew(returns),
         "kurtosis": stats.kurtosis(returns)
     }
 
-def calculate_drawdowns(data):
+def calculate_drawdowns(data, benchmarks=None, max_points=None, view_start=None, view_end=None):
     """
     Calculates drawdown metrics including avg_drawdown, var_95, sharpe, sortino, volatility, and beta.
+
+    Args:
+        data: DataFrame (o AnalysisContext) con datos diarios
+        benchmarks: {symbol: retornos diarios indexados por fecha} para calcular beta
+            (ver benchmark_cache.benchmark_returns). Sin benchmarks, beta es None.
+        max_points: si se indica, drawdown_series se reduce con min-max (conserva los
+            valles) y se agrega drawdown_dates con la fecha de cada punto
+        view_start, view_end: ventana que se conserva a resolución completa
     """
-    returns = data['Close'].pct_change().dropna()
-    cumulative = (1 + returns).cumprod()
-    peak = cumulative.expanding(min_periods=1).max()
-    drawdown = (cumulative / peak) - 1
+    context = AnalysisContext.of(data)
+    returns = context.returns
+    drawdown = context.drawdown
     
     # Average Drawdown (promedio de todos los drawdowns negativos)
     avg_drawdown = drawdown[drawdown < 0].mean() if len(drawdown[drawdown < 0]) > 0 else 0
@@ -289,25 +295,25 @@ def calculate_drawdowns(data):
     # Volatility - Desviación estándar anualizada
     volatility = returns.std() * np.sqrt(252)
     
-    # Beta - Correlación con SPY (mercado)
-    beta = None
-    try:
-        spy_data = yf.Ticker("SPY").history(
-            start=data.index[0].strftime('%Y-%m-%d'),
-            end=data.index[-1].strftime('%Y-%m-%d'),
-            interval="1d"
-        )
-        if not spy_data.empty and len(spy_data) > 1:
-            spy_returns = spy_data['Close'].pct_change().dropna()
-            # Alinear fechas
-            aligned_returns = returns.align(spy_returns, join='inner')
-            if len(aligned_returns[0]) > 1:
-                covariance = aligned_returns[0].cov(aligned_returns[1])
-                spy_variance = aligned_returns[1].var()
-                beta = covariance / spy_variance if spy_variance != 0 else None
-    except Exception as e:
-        print(f"Error calculating beta: {e}")
-        beta = None
+    # Beta - contra cada benchmark cacheado (SPY, QQQ, ^MERV...)
+    betas = {}
+    if benchmarks:
+        daily_returns = context.daily_returns
+
+        for bench_symbol, bench_returns in benchmarks.items():
+            try:
+                # Alinear fechas
+                aligned_returns = daily_returns.align(bench_returns, join='inner')
+                if len(aligned_returns[0]) > 1:
+                    covariance = aligned_returns[0].cov(aligned_returns[1])
+                    bench_variance = aligned_returns[1].var()
+                    betas[bench_symbol] = covariance / bench_variance if bench_variance != 0 else None
+                else:
+                    betas[bench_symbol] = None
+            except Exception as e:
+                print(f"Error calculating beta vs {bench_symbol}: {e}")
+                betas[bench_symbol] = None
+    beta = betas.get("SPY")
     
     # Sharpe Ratio - rendimiento ajustado por riesgo total
     annualized_return = returns.mean() * 252
@@ -320,11 +326,12 @@ def calculate_drawdowns(data):
     downside_std = downside_returns.std() * np.sqrt(252)
     sortino = annualized_return / downside_std if downside_std != 0 else 0
     
-    return {
+    result = {
         "max_drawdown": drawdown.min(),
         "avg_drawdown": avg_drawdown,
         "volatility": volatility,
         "beta": beta,
+        "betas": betas,
         "var_95": var_95,
         "sharpe": sharpe,
         "sortino": sortino,
@@ -332,6 +339,13 @@ def calculate_drawdowns(data):
         "drawdown_series": json.loads(drawdown.to_json(orient="values"))
     }
 
+    if max_points and len(drawdown) > max_points:
+        reduced = downsample_series(drawdown, max_points, "minmax", view_start, view_end)
+        result["drawdown_series"] = json.loads(reduced.to_json(orient="values"))
+        result["drawdown_dates"] = list(reduced.index.strftime('%Y-%m-%d'))
+
+    return result
+
 def calculate_ratios(info):
     """
     Extracts and organizes fundamental ratios from yfinance info dict.
@@ -400,7 +414,9 @@ def calculate_ratios(info):
 
 def calculate_statistics(history):
     # Re-using the logic, but ensuring it returns the simple stats card data
-    log_returns = np.log(history['Close'] / history['Close'].shift(1)).dropna()
+    context = AnalysisContext.of(history)
+    history = context.data
+    log_returns = context.log_returns
     if len(log_returns) == 0: return {}
     
     volatility = log_returns.std() * np.sqrt(252)
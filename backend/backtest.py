@@ -0,0 +1,274 @@
+"""
+Vectorized indicator-strategy backtests over whole parameter grids.
+
+Strategies (long/flat; a signal at bar t's close is held from bar t+1):
+    rsi        window, lower, upper     enter when RSI < lower, exit when RSI > upper
+    macd       fast, slow, signal       long while MACD > its signal line
+    bollinger  window, num_std          enter below the lower band, exit above the middle
+    stoch      window, smooth, lower, upper
+                                        enter when %K crosses above %D below `lower`,
+                                        exit when %K > upper
+
+Every grid cell is one column of (bars, cells) arrays: each indicator is
+computed once per distinct window (the dashboard's own kernels, so the
+default parameters reproduce its columns exactly), thresholds broadcast
+across the columns, and positions are held between entry and exit bars by
+a 2-D forward fill. Cells are evaluated in chunks of at most CHUNK_ELEMENTS
+values; big grids spread the chunks over the process pool. Per cell:
+total return, CAGR, Sharpe/Sortino (as calculate_drawdowns), max drawdown,
+trades and the fraction of bars in the market.
+"""
+import os
+import math
+import time
+import asyncio
+import numpy as np
+from scipy.signal import lfilter
+import metrics
+from indicators import ewm, _rolling, _pad
+from risk_engine import sharpe_sortino
+from pipeline import run_analytics
+
+# Defaults are the dashboard's indicator settings
+STRATEGIES = {
+    "rsi": {"window": [14], "lower": [30.0], "upper": [70.0]},
+    "macd": {"fast": [12], "slow": [26], "signal": [9]},
+    "bollinger": {"window": [20], "num_std": [2.0]},
+    "stoch": {"window": [14], "smooth": [3], "lower": [20.0], "upper": [80.0]},
+}
+INTEGER_PARAMS = {"window", "fast", "slow", "signal", "smooth"}
+METRIC_COLUMNS = ["total_return", "cagr", "sharpe", "sortino", "max_drawdown", "trades", "exposure"]
+
+MAX_CELLS = int(os.environ.get("BACKTEST_MAX_CELLS", "50000"))
+MAX_WINDOW = 500
+# Grids smaller than this run in a thread; pickling the chunks isn't worth it
+POOL_MIN_CELLS = int(os.environ.get("BACKTEST_POOL_MIN_CELLS", "256"))
+# (bars x cells) float64 values per chunk: 250k = 2 MB per array. Bigger
+# chunks were slower: every temporary becomes a fresh mmap to fault in
+CHUNK_ELEMENTS = int(os.environ.get("BACKTEST_CHUNK_ELEMENTS", "250000"))
+
+
+def expand_grid(strategy, grid):
+    """
+    Cartesian product of the grid (missing params take the defaults) as
+    {param: 1-D array}, minus the meaningless cells (lower >= upper,
+    fast >= slow). Returns (params, skipped cells).
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy must be one of: {', '.join(STRATEGIES)}")
+    unknown = set(grid) - set(STRATEGIES[strategy])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+
+    axes = {}
+    for name, default in STRATEGIES[strategy].items():
+        values = sorted(set(grid.get(name) or default))
+        if name in INTEGER_PARAMS:
+            if any(v != int(v) or not 1 <= v <= MAX_WINDOW for v in values):
+                raise ValueError(f"{name} must be whole numbers between 1 and {MAX_WINDOW}")
+            values = [int(v) for v in values]
+        axes[name] = np.asarray(values)
+
+    total = math.prod(len(v) for v in axes.values())
+    if total > MAX_CELLS:
+        raise ValueError(f"Grid has {total} cells; at most {MAX_CELLS}")
+    # Window-like params vary slowest, so a chunk of consecutive cells shares few indicators
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    params = {name: m.ravel() for name, m in zip(axes, mesh)}
+
+    valid = np.ones(total, dtype=bool)
+    if "lower" in params:
+        valid &= params["lower"] < params["upper"]
+    if strategy == "macd":
+        valid &= params["fast"] < params["slow"]
+    return {name: values[valid] for name, values in params.items()}, int(total - valid.sum())
+
+
+def _per_window(compute, *values):
+    """compute(*key) once per distinct key, stacked as (bars, cells) columns in cell order."""
+    distinct, inverse = np.unique(np.column_stack(values), axis=0, return_inverse=True)
+    return np.column_stack([compute(*key) for key in distinct.tolist()])[:, inverse.ravel()]
+
+
+def _rsi(close, window):
+    diff = np.empty(len(close))
+    diff[0] = np.nan
+    diff[1:] = np.diff(close)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    emaup = ewm(up, 1 / window, window)
+    emadn = ewm(down, 1 / window, window)
+    return np.where(emadn == 0, 100.0, 100.0 - 100.0 / (1.0 + emaup / emadn))
+
+
+def _macd(close, fast, slow, signal):
+    """(MACD, signal line) as (bars, cells); the signal EMA runs on all columns of a (slow, signal) group at once."""
+    spans, inverse = np.unique(np.concatenate([fast, slow]), return_inverse=True)
+    emas = np.column_stack([ewm(close, 2 / (span + 1), span) for span in spans.tolist()])
+    line = emas[:, inverse[:len(fast)]] - emas[:, inverse[len(fast):]]
+    out = np.full(line.shape, np.nan)
+    for s, sig in set(zip(slow.tolist(), signal.tolist())):
+        cols = np.flatnonzero((slow == s) & (signal == sig))
+        # MACD is NaN before bar slow - 1; the signal EMA is seeded there (indicators.ewm)
+        seeded = line[s - 1:, cols]
+        if len(seeded) == 0:
+            continue
+        alpha = 2 / (sig + 1)
+        smoothed = np.empty_like(seeded)
+        smoothed[0] = seeded[0]
+        smoothed[1:], _ = lfilter([alpha], [1.0, alpha - 1.0], seeded[1:], axis=0, zi=(1 - alpha) * seeded[:1])
+        smoothed[:sig - 1] = np.nan
+        out[s - 1:, cols] = smoothed
+    return line, out
+
+
+def _band(close, window, statistic):
+    window_view = _rolling(close, window)
+    return _pad(window_view.mean(axis=1) if statistic == "mean" else window_view.std(axis=1), len(close))
+
+
+def _stoch_k(high, low, close, window):
+    n = len(close)
+    highest = _pad(_rolling(high, window).max(axis=1), n)
+    lowest = _pad(_rolling(low, window).min(axis=1), n)
+    return 100 * (close - lowest) / (highest - lowest)
+
+
+def _hold(entries, exits):
+    """
+    1 from an entry bar until the next exit bar, 0 otherwise: the last
+    signal forward-filled down each column (entries win ties).
+    """
+    n, cells = entries.shape
+    signal = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    last = np.where(np.isnan(signal), 0, np.arange(n)[:, None])
+    np.maximum.accumulate(last, axis=0, out=last)
+    held = signal[last, np.arange(cells)]
+    return np.nan_to_num(held, nan=0.0)
+
+
+def positions(strategy, high, low, close, params):
+    """(bars, cells) 0/1 positions decided at each bar's close."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if strategy == "rsi":
+            rsi = _per_window(lambda w: _rsi(close, w), params["window"])
+            return _hold(rsi < params["lower"], rsi > params["upper"])
+
+        if strategy == "macd":
+            line, signal = _macd(close, params["fast"], params["slow"], params["signal"])
+            return (line > signal).astype(float)
+
+        if strategy == "bollinger":
+            mid = _per_window(lambda w: _band(close, w, "mean"), params["window"])
+            std = _per_window(lambda w: _band(close, w, "std"), params["window"])
+            column = close[:, None]
+            return _hold(column < mid - params["num_std"] * std, column > mid)
+
+        if strategy == "stoch":
+            ks = {w: _stoch_k(high, low, close, w) for w in np.unique(params["window"]).tolist()}
+            k = _per_window(lambda w: ks[w], params["window"])
+            d = _per_window(
+                lambda w, smooth: _pad(_rolling(ks[w], smooth).mean(axis=1), len(close)),
+                params["window"], params["smooth"]
+            )
+            above = k > d
+            crossed_up = above & ~np.vstack([np.zeros((1, above.shape[1]), dtype=bool), above[:-1]])
+            return _hold(crossed_up & (k < params["lower"]), k > params["upper"])
+
+    raise ValueError(f"Unknown strategy '{strategy}'")
+
+
+def performance(held, returns, cost, periods_per_year):
+    """Metric arrays per column of `held` (positions already shifted onto the bars they earn)."""
+    turnover = np.abs(np.diff(held, axis=0, prepend=0.0))
+    strategy_returns = held * returns[:, None] - cost * turnover
+    n = len(returns)
+
+    log_wealth = np.log1p(np.maximum(strategy_returns, -0.999999))
+    np.cumsum(log_wealth, axis=0, out=log_wealth)
+    total_return = np.expm1(log_wealth[-1])
+    years = (n - 1) / periods_per_year
+    cagr = np.expm1(log_wealth[-1] / years) if years > 0 else np.full(held.shape[1], np.nan)
+    peak = np.maximum.accumulate(log_wealth, axis=0)
+    np.maximum(peak, 0.0, out=peak)
+    max_drawdown = np.expm1((log_wealth - peak).min(axis=0))
+
+    # The first bar has no return; calculate_drawdowns works on pct_change().dropna()
+    sharpe, sortino = sharpe_sortino(strategy_returns[1:].T, periods_per_year)
+    return {
+        "total_return": total_return,
+        "cagr": cagr,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "max_drawdown": max_drawdown,
+        "trades": (np.diff(held, axis=0) > 0).sum(axis=0),
+        "exposure": held[1:].mean(axis=0),
+    }
+
+
+def evaluate(strategy, high, low, close, params, cost, periods_per_year):
+    """Process-pool entry point: metrics for one chunk of grid cells."""
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    decided = positions(strategy, high, low, close, params)
+    held = np.zeros_like(decided)
+    held[1:] = decided[:-1]
+    return performance(held, returns, cost, periods_per_year)
+
+
+def _chunks(params, per_chunk):
+    cells = len(next(iter(params.values())))
+    return [
+        {name: values[start:start + per_chunk] for name, values in params.items()}
+        for start in range(0, cells, per_chunk)
+    ]
+
+
+async def run(history, strategy, grid=None, cost_bps=0.0, periods_per_year=252, pool=None):
+    """
+    Backtests every cell of the grid over `history` (OHLC frame) and returns
+    {"params": {name: list}, "metrics": {name: list}, ...} in cell order,
+    plus buy-and-hold over the same bars for reference.
+    """
+    params, skipped = expand_grid(strategy, grid or {})
+    cells = len(next(iter(params.values())))
+    if cells == 0:
+        raise ValueError("No valid cells in the grid (check lower < upper / fast < slow)")
+    high, low, close = (history[col].to_numpy(dtype=np.float64) for col in ("High", "Low", "Close"))
+    if len(close) < 3:
+        raise ValueError("Not enough bars to backtest")
+    cost = cost_bps / 10000
+
+    # Chunk boundaries depend only on the history length, never on the pool size
+    per_chunk = max(1, CHUNK_ELEMENTS // len(close))
+    use_pool = pool is not None and cells >= POOL_MIN_CELLS
+    jobs = [(strategy, high, low, close, chunk, cost, periods_per_year) for chunk in _chunks(params, per_chunk)]
+
+    start = time.perf_counter()
+    if use_pool:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(pool, evaluate, *args) for args in jobs))
+    else:
+        results = await run_analytics("backtest", lambda: [evaluate(*args) for args in jobs])
+    elapsed = time.perf_counter() - start
+    metrics.observe_stage("backtest_grid", elapsed)
+
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    held = np.ones((len(close), 1))
+    held[0] = 0.0
+    buy_and_hold = {name: values[0] for name, values in performance(held, returns, 0.0, periods_per_year).items()}
+
+    return {
+        "strategy": strategy,
+        "cells": cells,
+        "skipped": skipped,
+        "bars": len(close),
+        "cost_bps": cost_bps,
+        "params": params,
+        "metrics": {name: np.concatenate([r[name] for r in results]) for name in METRIC_COLUMNS},
+        "buy_and_hold": buy_and_hold,
+        "chunks": len(jobs),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "cells_per_second": round(cells / elapsed) if elapsed > 0 else None,
+    }
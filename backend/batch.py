@@ -0,0 +1,96 @@
+"""
+Multi-ticker analytics for screens.
+
+Histories are loaded in bulk through the price store and the per-symbol
+analysis runs on a process pool, in chunks to keep IPC overhead low. The
+result is a compact table (one row per symbol); a failing symbol gets its
+error in the row instead of failing the whole batch.
+"""
+import os
+import math
+import asyncio
+import numpy as np
+from analysis import AnalysisContext, calculate_advanced_indicators, calculate_drawdowns, calculate_statistics
+
+MAX_SYMBOLS = int(os.environ.get("BATCH_MAX_SYMBOLS", "500"))
+
+# metric -> (source, key in that source's output)
+METRICS = {
+    "price": ("statistics", "current_price"),
+    "total_return_pct": ("statistics", "total_return_pct"),
+    "rsi": ("technical", "RSI"),
+    "volatility": ("drawdowns", "volatility"),
+    "sharpe": ("drawdowns", "sharpe"),
+    "sortino": ("drawdowns", "sortino"),
+    "max_drawdown": ("drawdowns", "max_drawdown"),
+    "current_drawdown": ("drawdowns", "current_drawdown"),
+    "var_95": ("drawdowns", "var_95"),
+    "beta": ("drawdowns", "beta"),
+}
+DEFAULT_METRICS = ["price", "rsi", "max_drawdown", "volatility", "sharpe"]
+
+
+def _clean(value):
+    """Plain float (or None for NaN/inf) so the table is JSON-safe."""
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def symbol_metrics(history, metrics, benchmarks=None):
+    """Runs only the analysis functions the requested metrics need."""
+    sources = {METRICS[m][0] for m in metrics}
+    history = AnalysisContext(history)
+    results = {}
+    if "statistics" in sources:
+        results["statistics"] = calculate_statistics(history)
+    if "technical" in sources:
+        results["technical"] = calculate_advanced_indicators(history)[1]
+    if "drawdowns" in sources:
+        results["drawdowns"] = calculate_drawdowns(history, benchmarks=benchmarks)
+    return [_clean(results[source].get(key)) for source, key in (METRICS[m] for m in metrics)]
+
+
+def metrics_for_chunk(items, metrics, benchmarks=None):
+    """
+    Process-pool entry point: items is a list of (symbol, history).
+    Returns one row per symbol: [symbol, *metric values, error].
+    """
+    rows = []
+    for symbol, history in items:
+        try:
+            rows.append([symbol, *symbol_metrics(history, metrics, benchmarks), None])
+        except Exception as e:
+            rows.append([symbol, *([None] * len(metrics)), str(e)])
+    return rows
+
+
+def _chunks(items, workers):
+    # A few chunks per worker balances load without one IPC round trip per symbol
+    size = max(1, math.ceil(len(items) / (workers * 4)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def run_batch(histories, errors, metrics, pool, workers, benchmarks=None):
+    """
+    Fans the per-symbol analysis out over `pool` and assembles the table.
+    Only the OHLCV columns are shipped to the workers.
+    """
+    loop = asyncio.get_running_loop()
+    items = [
+        (symbol, history[['Open', 'High', 'Low', 'Close', 'Volume']].astype(np.float64))
+        for symbol, history in histories.items()
+    ]
+    chunk_results = await asyncio.gather(*(
+        loop.run_in_executor(pool, metrics_for_chunk, chunk, metrics, benchmarks)
+        for chunk in _chunks(items, workers)
+    ))
+
+    by_symbol = {row[0]: row for rows in chunk_results for row in rows}
+    for symbol, message in errors.items():
+        by_symbol[symbol] = [symbol, *([None] * len(metrics)), message]
+    return by_symbol
@@ -0,0 +1,76 @@
+"""
+Process-wide cache of benchmark return series used for beta.
+
+Benchmarks are refreshed incrementally through the price store at most once
+every BENCHMARK_REFRESH_SECONDS. Reads (`get_returns`, `benchmark_returns`)
+never touch the network or the disk.
+"""
+import os
+import time
+import threading
+from price_store import load_history
+from analysis import AnalysisContext
+import metrics
+
+BENCHMARK_SYMBOLS = [
+    s.strip() for s in os.environ.get("BENCHMARK_SYMBOLS", "SPY,QQQ,^MERV").split(",") if s.strip()
+]
+REFRESH_SECONDS = float(os.environ.get("BENCHMARK_REFRESH_SECONDS", "900"))
+
+# symbol -> (refreshed_at, daily returns indexed by naive calendar date)
+_series = {}
+_locks = {symbol: threading.Lock() for symbol in BENCHMARK_SYMBOLS}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(symbol):
+    with _locks_guard:
+        if symbol not in _locks:
+            _locks[symbol] = threading.Lock()
+        return _locks[symbol]
+
+
+def refresh(symbols=None, force=False):
+    """
+    Tops up stale benchmarks from the price store. Failures keep the previous
+    series so beta degrades to slightly old data instead of disappearing.
+    """
+    for symbol in symbols or BENCHMARK_SYMBOLS:
+        with _lock_for(symbol):
+            cached = _series.get(symbol)
+            if cached and not force and time.time() - cached[0] < REFRESH_SECONDS:
+                metrics.cache_hit("benchmarks")
+                continue
+            metrics.cache_miss("benchmarks")
+            try:
+                history = load_history(symbol, interval="1d")
+                if history.empty:
+                    print(f"⚠️ No data for benchmark {symbol}")
+                    continue
+                _series[symbol] = (time.time(), AnalysisContext(history).daily_returns)
+            except Exception as e:
+                print(f"⚠️ Benchmark refresh failed for {symbol}: {e}")
+
+
+def get_returns(symbol, start=None, end=None):
+    """
+    Returns the cached daily returns of a benchmark between start and end
+    (inclusive, naive dates or 'YYYY-MM-DD'), or None if it isn't loaded.
+    """
+    cached = _series.get(symbol)
+    if cached is None:
+        return None
+    returns = cached[1]
+    return returns.loc[start:end] if start is not None or end is not None else returns
+
+
+def benchmark_returns(start=None, end=None, symbols=None):
+    """
+    Returns {symbol: returns} for every loaded benchmark over a date range.
+    """
+    result = {}
+    for symbol in symbols or BENCHMARK_SYMBOLS:
+        returns = get_returns(symbol, start, end)
+        if returns is not None:
+            result[symbol] = returns
+    return result
@@ -0,0 +1,96 @@
+"""
+Benchmark: parameter-grid backtests, in grid cells per second.
+
+Runs backtest.run for each strategy on a synthetic daily history, in-process
+and over a process pool, and checks both give the same metrics. The
+"loop" column is a plain per-cell Python loop over bars (the notebook way)
+on a sample of cells, for reference.
+
+    cd backend
+    python benchmarks/bench_backtest.py [--bars 5000] [--workers 4]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import backtest  # noqa: E402
+from synthetic import synthetic_history  # noqa: E402
+
+GRIDS = {
+    "rsi": {"window": list(range(5, 31)), "lower": [15, 20, 25, 30, 35, 40], "upper": [60, 65, 70, 75, 80, 85]},
+    "macd": {"fast": list(range(4, 20)), "slow": list(range(20, 40, 2)), "signal": [5, 7, 9, 11, 13]},
+    "bollinger": {"window": list(range(10, 60, 2)), "num_std": [1.0, 1.25, 1.5, 1.75, 2.0, 2.25, 2.5, 3.0]},
+    "stoch": {"window": list(range(5, 30)), "smooth": [2, 3, 4, 5], "lower": [10, 20, 30], "upper": [70, 80, 90]},
+}
+
+
+def loop_rsi(close, window, lower, upper, cost):
+    """Per-bar Python loop: the reference the vectorized grid replaces."""
+    rsi = backtest._rsi(close, window)
+    position, wealth, trades = 0, 1.0, 0
+    for t in range(1, len(close)):
+        wealth *= 1 + position * (close[t] / close[t - 1] - 1)
+        new = 1 if rsi[t] < lower else (0 if rsi[t] > upper else position)
+        if new != position:
+            wealth *= 1 - cost
+            trades += new > position
+            position = new
+    return wealth - 1, trades
+
+
+def timed(history, strategy, pool, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = asyncio.run(backtest.run(history, strategy, GRIDS[strategy], cost_bps=5, pool=pool))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    history = synthetic_history(args.bars)
+    close = history["Close"].to_numpy(dtype=np.float64)
+    print(f"{args.bars} bars, {args.workers} worker(s)")
+    print(f"{'strategy':<10} {'cells':>6} {'serial c/s':>11} {'pool c/s':>10} {'loop c/s':>9}  same result")
+
+    # In-process runs still hop onto the analytics thread pool; keep it small
+    backtest.POOL_MIN_CELLS = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        asyncio.run(backtest.run(history, "rsi", {}, pool=pool))  # Warm the workers
+        for strategy in GRIDS:
+            serial, serial_result = timed(history, strategy, None, args.repeat)
+            pooled, pooled_result = timed(history, strategy, pool, args.repeat)
+            cells = serial_result["cells"]
+            same = all(
+                np.array_equal(serial_result["metrics"][m], pooled_result["metrics"][m], equal_nan=True)
+                for m in backtest.METRIC_COLUMNS
+            )
+            loop_rate = ""
+            if strategy == "rsi":
+                sample = 20
+                start = time.perf_counter()
+                for i in range(sample):
+                    p = serial_result["params"]
+                    loop_rsi(close, p["window"][i], p["lower"][i], p["upper"][i], 5 / 10000)
+                loop_rate = f"{sample / (time.perf_counter() - start):,.0f}"
+            print(
+                f"{strategy:<10} {cells:>6} {cells / serial:>11,.0f} {cells / pooled:>10,.0f} {loop_rate:>9}  "
+                f"{'✅' if same else '❌'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
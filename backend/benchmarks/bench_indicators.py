@@ -0,0 +1,126 @@
+"""
+Benchmark: fused NumPy indicator engine vs. the per-indicator `ta` pipeline.
+
+Checks that both produce the same columns (also with NaN gaps in the
+prices) and times them on synthetic series of 10k-100k bars.
+
+    cd backend
+    python benchmarks/bench_indicators.py [--sizes 10000 50000 100000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import ta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import compute_indicators, INDICATOR_COLUMNS  # noqa: E402
+
+
+def synthetic_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n)))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n)))
+    volume = rng.integers(100_000, 10_000_000, n).astype(float)
+    index = pd.bdate_range("1950-01-02", periods=n, name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def ta_indicators(data):
+    """The original calculate_advanced_indicators body, one `ta` object per indicator."""
+    df = data.copy()
+    df['RSI'] = ta.momentum.RSIIndicator(close=df['Close'], window=14).rsi()
+    macd = ta.trend.MACD(close=df['Close'])
+    df['MACD'] = macd.macd()
+    df['MACD_Signal'] = macd.macd_signal()
+    df['MACD_Hist'] = macd.macd_diff()
+    stoch = ta.momentum.StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'])
+    df['Stoch_K'] = stoch.stoch()
+    df['Stoch_D'] = stoch.stoch_signal()
+    bb = ta.volatility.BollingerBands(close=df['Close'], window=20, window_dev=2)
+    df['BB_High'] = bb.bollinger_hband()
+    df['BB_Low'] = bb.bollinger_lband()
+    df['BB_Mid'] = bb.bollinger_mavg()
+    df['ADX'] = ta.trend.ADXIndicator(high=df['High'], low=df['Low'], close=df['Close']).adx()
+    df['ATR'] = ta.volatility.AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close']).average_true_range()
+    df['CCI'] = ta.trend.CCIIndicator(high=df['High'], low=df['Low'], close=df['Close']).cci()
+    df['Williams'] = ta.momentum.WilliamsRIndicator(high=df['High'], low=df['Low'], close=df['Close']).williams_r()
+    df['OBV'] = ta.volume.OnBalanceVolumeIndicator(close=df['Close'], volume=df['Volume']).on_balance_volume()
+    df['SMA_20'] = ta.trend.SMAIndicator(close=df['Close'], window=20).sma_indicator()
+    df['EMA_20'] = ta.trend.EMAIndicator(close=df['Close'], window=20).ema_indicator()
+    return df
+
+
+def with_gaps(data, seed=1):
+    """A copy with a few missing High/Low/Close values, as Yahoo sometimes returns."""
+    rng = np.random.default_rng(seed)
+    gapped = data.copy()
+    for col in ("High", "Low", "Close"):
+        gapped.iloc[rng.integers(0, len(data), 3), gapped.columns.get_loc(col)] = np.nan
+    return gapped
+
+
+def compare(actual, expected, label):
+    """Max relative error over every column; prints and returns None on a mismatch."""
+    worst = 0.0
+    for col in INDICATOR_COLUMNS:
+        a = actual[col].to_numpy()
+        b = expected[col].to_numpy()
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            print(f"  ❌ {label} {col}: NaN pattern differs")
+            return None
+        mask = ~np.isnan(b)
+        err = np.abs(a[mask] - b[mask]) / np.maximum(np.abs(b[mask]), 1e-9)
+        worst = max(worst, err.max() if len(err) else 0.0)
+        if not np.allclose(a[mask], b[mask], rtol=1e-8, atol=1e-8):
+            print(f"  ❌ {label} {col}: values differ (max rel err {err.max():.2e})")
+            return None
+    return worst
+
+
+def numpy_indicators(data):
+    return data.assign(**compute_indicators(data['High'], data['Low'], data['Close'], data['Volume']))
+
+
+def best_of(fn, data, repeat):
+    fn(data.iloc[:1000])  # Warm-up: lazy imports, allocator
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 25_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'bars':>8} {'ta (ms)':>10} {'numpy (ms)':>11} {'speedup':>8} {'max rel err':>12}")
+    ok = True
+    for n in args.sizes:
+        data = synthetic_ohlcv(n)
+        t_ta, expected = best_of(ta_indicators, data, args.repeat)
+        t_np, actual = best_of(numpy_indicators, data, args.repeat)
+
+        worst = compare(actual, expected, "clean")
+        gapped = with_gaps(data)
+        gaps_worst = compare(numpy_indicators(gapped), ta_indicators(gapped), "gaps")
+        if worst is None or gaps_worst is None:
+            ok = False
+            continue
+        worst = max(worst, gaps_worst)
+
+        print(f"{n:>8} {t_ta * 1000:>10.1f} {t_np * 1000:>11.1f} {t_ta / t_np:>7.1f}x {worst:>12.2e}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
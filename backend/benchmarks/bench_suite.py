@@ -0,0 +1,216 @@
+"""
+Offline performance suite: every analysis.py function and the
+/api/ticker endpoint end to end, on synthetic data (no network).
+
+    cd backend
+    python benchmarks/bench_suite.py [--sizes 1000 5000 20000] [--repeat 5]
+    python benchmarks/bench_suite.py --update-baseline
+
+Each case records best-of latency, tracemalloc peak memory and payload
+bytes, and is compared with benchmarks/baseline.json: the exit code is 1
+when any case is slower, bigger or heavier than the baseline by more than
+the tolerances. Latency baselines are machine-specific, so regenerate the
+baseline on the machine (or CI runner) that runs the comparison.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import synthetic  # noqa: E402
+
+# Must run before the backend modules read their settings / import yfinance names
+synthetic.use_temp_dirs()
+synthetic.install()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+import main  # noqa: E402
+import analysis  # noqa: E402
+import encoding  # noqa: E402
+import singleflight  # noqa: E402
+import ticker_context  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+# Absolute slack so sub-millisecond cases don't fail on timer noise
+LATENCY_SLACK_MS = 0.5
+
+
+def _payload_bytes(result):
+    if isinstance(result, tuple):
+        frame, latest = result
+        return len(encoding.chart_json(frame).encode("utf-8")) + len(encoding.dumps(latest).encode("utf-8"))
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    return len(encoding.dumps(result).encode("utf-8"))
+
+
+def measure(fn, repeat, setup=None):
+    """Best-of latency (ms), tracemalloc peak (KiB) and payload bytes of fn()."""
+    if setup:
+        setup()
+    result = fn()  # Warm-up: lazy imports, allocator, first-touch of the store
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "ms": round(min(timings) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "bytes": _payload_bytes(result),
+    }
+
+
+def _reset_caches():
+    ticker_context.clear_cache()
+    for group in singleflight._groups.values():
+        group.clear()
+
+
+def analysis_cases(n, repeat):
+    synthetic.register(f"SYN{n}", n)
+    history = synthetic.SyntheticTicker(f"SYN{n}").history(period="max")
+    ohlcv = history[['Open', 'High', 'Low', 'Close', 'Volume']]
+    spy = analysis.AnalysisContext(synthetic.SyntheticTicker("SPY").history(period="max")).daily_returns
+    info = synthetic.SyntheticTicker(f"SYN{n}").info
+
+    cases = {
+        "indicators": lambda: analysis.calculate_advanced_indicators(ohlcv),
+        "seasonality": lambda: analysis.calculate_seasonality(history, monthly_source=history),
+        "distribution": lambda: analysis.calculate_distribution(history),
+        "drawdowns": lambda: analysis.calculate_drawdowns(history, benchmarks={"SPY": spy}),
+        "statistics": lambda: analysis.calculate_statistics(history),
+        "ratios": lambda: analysis.calculate_ratios(info),
+    }
+    return {f"analysis.{name}@{n}": measure(fn, repeat) for name, fn in cases.items()}
+
+
+def endpoint_cases(n, repeat, client):
+    symbol = f"SYN{n}"
+    synthetic.register(symbol, n)
+    url = f"/api/ticker/{symbol}?period=max&interval=1d"
+    headers = {"accept-encoding": "identity"}
+    cold_runs = iter(range(repeat + 2))
+
+    def get(path):
+        response = client.get(path, headers=headers)
+        response.raise_for_status()
+        return response.content
+
+    def cold():
+        # A symbol the store has never seen: full download + store write + all analytics
+        fresh = f"{symbol}C{next(cold_runs)}"
+        synthetic.register(fresh, n, seed=n)
+        return get(f"/api/ticker/{fresh}?period=max&interval=1d")
+
+    return {
+        # Price store miss, nothing cached
+        f"endpoint.cold@{n}": measure(cold, repeat, setup=_reset_caches),
+        # Stored prices, empty section/response caches: analytics + encoding
+        f"endpoint.warm@{n}": measure(lambda: get(url), repeat, setup=_reset_caches),
+        # Within the result TTL: served by the coalescing cache
+        f"endpoint.cached@{n}": measure(lambda: get(url), repeat),
+    }
+
+
+def compare(results, baseline, time_tol, memory_tol, bytes_tol):
+    """Returns the list of regression messages."""
+    failures = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["ms"] > base["ms"] * (1 + time_tol) + LATENCY_SLACK_MS:
+            failures.append(f"{name}: latency {current['ms']:.1f} ms vs baseline {base['ms']:.1f} ms")
+        if current["peak_kb"] > base["peak_kb"] * (1 + memory_tol) + 64:
+            failures.append(f"{name}: peak memory {current['peak_kb']:.0f} KiB vs baseline {base['peak_kb']:.0f} KiB")
+        if current["bytes"] > base["bytes"] * (1 + bytes_tol):
+            failures.append(f"{name}: payload {current['bytes']} B vs baseline {base['bytes']} B")
+    return failures
+
+
+def _metadata():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "created": time.strftime("%Y-%m-%d"),
+    }
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=["analysis", "endpoint"], help="Run one group of cases")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed latency increase (0.5 = +50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--bytes-tolerance", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with TestClient(main.app) as client:
+        for n in args.sizes:
+            if args.only != "endpoint":
+                results.update(analysis_cases(n, args.repeat))
+            if args.only != "analysis":
+                results.update(endpoint_cases(n, args.repeat, client))
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+    except (OSError, ValueError):
+        baseline = {}
+
+    print(f"{'case':<32} {'ms':>10} {'base ms':>10} {'peak KiB':>10} {'bytes':>10}")
+    for name, r in results.items():
+        base = baseline.get(name, {}).get("ms")
+        base = f"{base:.1f}" if base is not None else "-"
+        print(f"{name:<32} {r['ms']:>10.1f} {base:>10} {r['peak_kb']:>10.0f} {r['bytes']:>10}")
+
+    if args.update_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": _metadata(), "cases": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("⚠️ No baseline to compare with (run with --update-baseline)")
+        return 0
+
+    failures = compare(results, baseline, args.time_tolerance, args.memory_tolerance, args.bytes_tolerance)
+    for message in failures:
+        print(f"  ❌ {message}")
+    if failures:
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
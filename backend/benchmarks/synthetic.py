@@ -0,0 +1,181 @@
+"""
+Deterministic local stand-in for yfinance and the translator.
+
+Histories are geometric random walks seeded from the symbol, so the same
+symbol always gets the same bars, shaped like yfinance's output: tz-aware
+"Date" index, OHLCV plus Dividends and Stock Splits. `install()` swaps the
+stand-ins into `yfinance` and `deep_translator` so the backend runs
+unmodified and offline.
+
+    import synthetic
+    synthetic.use_temp_dirs()        # before importing backend modules
+    synthetic.install(bars=5000)
+    synthetic.register("BIG", 100_000)
+"""
+import os
+import zlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+DEFAULT_BARS = 5000
+TZ = "America/New_York"
+
+_INTRADAY_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}
+_FREQS = {"1d": "B", "5d": "5B", "1wk": "W-MON", "1mo": "MS", "3mo": "QS"}
+_SESSION_MINUTES = 390  # 09:30-16:00
+
+_bars = {}
+_default_bars = DEFAULT_BARS
+
+
+def register(symbol, bars, seed=None):
+    """Fixes the history length (and optionally the seed) for a symbol."""
+    _bars[symbol] = (bars, seed)
+
+
+def _seed(symbol):
+    return zlib.crc32(symbol.encode("utf-8"))
+
+
+def _index(n, interval, end):
+    end = pd.Timestamp(end or pd.Timestamp.now(tz=TZ).normalize().tz_localize(None))
+    minutes = _INTRADAY_MINUTES.get(interval)
+    if minutes is None:
+        return pd.date_range(end=end, periods=n, freq=_FREQS.get(interval, "B"), tz=TZ, name="Date")
+
+    per_day = max(_SESSION_MINUTES // minutes, 1)
+    days = pd.bdate_range(end=end, periods=-(-n // per_day))
+    offsets = pd.to_timedelta(9 * 60 + 30 + minutes * np.arange(per_day), unit="min")
+    stamps = (days.values[:, None] + offsets.values[None, :]).ravel()[-n:]
+    return pd.DatetimeIndex(stamps, name="Date").tz_localize(TZ)
+
+
+def synthetic_history(n, interval="1d", seed=0, end=None):
+    """n bars of synthetic OHLCV in yfinance's shape."""
+    rng = np.random.default_rng(seed)
+    minutes = _INTRADAY_MINUTES.get(interval)
+    scale = np.sqrt(minutes / _SESSION_MINUTES) if minutes else 1.0
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003 * scale ** 2, 0.012 * scale, n)))
+    open_ = close * (1 + rng.normal(0, 0.004 * scale, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006 * scale, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006 * scale, n)))
+    volume = rng.integers(100_000, 10_000_000, n).astype(float)
+
+    dividends = np.zeros(n)
+    if minutes is None and interval == "1d":
+        dividends[62::63] = np.round(close[62::63] * 0.004, 4)  # Quarterly
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume,
+         "Dividends": dividends, "Stock Splits": 0.0},
+        index=_index(n, interval, end)
+    )
+
+
+def _full_history(symbol, interval):
+    bars, seed = _bars.get(symbol, (_default_bars, None))
+    return synthetic_history(bars, interval, seed=_seed(symbol) if seed is None else seed)
+
+
+class SyntheticTicker:
+    """Implements the parts of yfinance.Ticker the backend uses."""
+
+    def __init__(self, symbol, *args, **kwargs):
+        self.ticker = symbol
+        self._histories = {}
+
+    def history(self, period=None, interval="1d", start=None, end=None, **kwargs):
+        from price_store import slice_history
+
+        full = self._histories.get(interval)
+        if full is None:
+            full = self._histories[interval] = _full_history(self.ticker, interval)
+        if start is not None:
+            tz = full.index.tz
+            mask = full.index >= pd.Timestamp(start, tz=tz)
+            if end is not None:
+                mask &= full.index < pd.Timestamp(end, tz=tz)
+            return full[mask]
+        return slice_history(full, period or "1mo")
+
+    @property
+    def info(self):
+        rng = np.random.default_rng(_seed(self.ticker))
+        return {
+            "symbol": self.ticker,
+            "shortName": f"{self.ticker} Synthetic Corp",
+            "longName": f"{self.ticker} Synthetic Corporation",
+            "longBusinessSummary": (
+                f"{self.ticker} Synthetic Corporation designs, manufactures and sells synthetic products. "
+                "The company serves customers worldwide through direct and indirect channels. " * 3
+            ).strip(),
+            "sector": "Technology",
+            "industry": "Software",
+            "currency": "USD",
+            "marketCap": float(rng.integers(10**9, 10**12)),
+            "trailingPE": float(rng.uniform(8, 40)),
+            "forwardPE": float(rng.uniform(8, 35)),
+            "priceToBook": float(rng.uniform(1, 15)),
+            "profitMargins": float(rng.uniform(0.02, 0.4)),
+            "returnOnEquity": float(rng.uniform(0.02, 0.5)),
+            "debtToEquity": float(rng.uniform(0, 200)),
+            "dividendYield": float(rng.uniform(0, 0.04)),
+        }
+
+
+def download(tickers, start=None, end=None, period=None, interval="1d", group_by="ticker", **kwargs):
+    """yf.download stand-in: (ticker, field) columns, tz-naive index."""
+    if isinstance(tickers, str):
+        tickers = tickers.split()
+    frames = {
+        symbol: SyntheticTicker(symbol).history(period=period or "max", interval=interval, start=start, end=end)
+        for symbol in tickers
+    }
+    frames = {symbol: frame.tz_localize(None) for symbol, frame in frames.items()}
+    return pd.concat(frames, axis=1)
+
+
+class SyntheticTranslator:
+    """deep_translator.GoogleTranslator stand-in: tags the text instead of translating it."""
+
+    def __init__(self, source="auto", target="es", **kwargs):
+        self.target = target
+
+    def translate(self, text):
+        return f"[{self.target}] {text}"
+
+
+def use_temp_dirs():
+    """
+    Points the price store and translation cache at a fresh temp directory.
+    Stored prices don't go stale during a run, so timings don't depend on
+    when a delta fetch happens to fall due.
+    """
+    root = tempfile.mkdtemp(prefix="finanalyzer-bench-")
+    os.environ.setdefault("PRICE_STORE_REFRESH_SECONDS", str(24 * 3600))
+    os.environ.setdefault("BENCHMARK_REFRESH_SECONDS", str(24 * 3600))
+    # Measured requests must not be answered by (or compete with) background precomputes
+    os.environ.setdefault("SCHEDULER_ENABLED", "0")
+    os.environ["PRICE_STORE_DIR"] = os.path.join(root, "prices")
+    os.environ["TRANSLATION_CACHE_DIR"] = os.path.join(root, "translations")
+    os.environ["SYMBOL_INDEX_PATH"] = os.path.join(root, "symbols.json")
+    os.environ["WATCHLIST_PATH"] = os.path.join(root, "watchlist.json")
+    return root
+
+
+def install(bars=DEFAULT_BARS):
+    """Replaces yfinance and the translator with the synthetic stand-ins."""
+    global _default_bars
+    import sys
+    import yfinance
+    import deep_translator
+
+    _default_bars = bars
+    yfinance.Ticker = SyntheticTicker
+    yfinance.download = download
+    deep_translator.GoogleTranslator = SyntheticTranslator
+    # Modules that already imported the name keep their own reference
+    translation_cache = sys.modules.get("translation_cache")
+    if translation_cache is not None:
+        translation_cache.GoogleTranslator = SyntheticTranslator
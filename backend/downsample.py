@@ -0,0 +1,204 @@
+"""
+Shape-preserving downsampling for chart series.
+
+`lttb` (Largest-Triangle-Three-Buckets) keeps the points that best preserve
+the visual shape of a line; `minmax` keeps the lowest and highest point of
+every bucket, so no peak or trough is ever dropped. Both always keep the
+first and last bar, and LTTB also keeps the global extremes.
+
+A view window can be kept at full resolution while the bars outside it share
+the remaining point budget. Frames also keep every indicator column's
+extremes, so an RSI or CCI spike never falls between the kept rows.
+"""
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "minmax")
+_PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+
+
+def lttb_indices(y, n_out):
+    """Indices of the `n_out` points LTTB keeps from series `y`."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 1)]
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts = np.append(edges[:-1], n - 1)
+    counts = np.diff(np.append(starts, n))
+    # Average point of each bucket (and of the final single-point bucket)
+    avg_y = np.add.reduceat(y, starts) / counts
+    avg_x = np.add.reduceat(np.arange(n, dtype=float), starts) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xs = np.arange(lo, hi, dtype=float)
+        # Twice the triangle area (a, candidate, next bucket average)
+        area = np.abs((a - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (a - xs) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(low, high=None, n_out=1000):
+    """
+    Indices of the minimum of `low` and maximum of `high` (defaults to `low`)
+    in each of n_out // 2 equal buckets, plus the first and last point.
+    """
+    low = np.asarray(low, dtype=float)
+    high = low if high is None else np.asarray(high, dtype=float)
+    n = len(low)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorting by (bucket, value) puts each bucket's min first and max last
+    by_low = np.lexsort((np.nan_to_num(low, nan=np.inf), bucket))
+    by_high = np.lexsort((np.nan_to_num(high, nan=-np.inf), bucket))
+    nonempty = np.diff(edges) > 0
+    mins = by_low[edges[:-1][nonempty]]
+    maxs = by_high[edges[1:][nonempty] - 1]
+    return np.unique(np.concatenate([[0, n - 1], mins, maxs]))
+
+
+def _indices(low, high, n_out, method):
+    if method == "minmax":
+        return minmax_indices(low, high, n_out)
+    # LTTB runs on `low` (the line itself when high is None)
+    idx = lttb_indices(low, n_out)
+    extremes = [int(np.nanargmin(low)), int(np.nanargmax(low if high is None else high))]
+    return np.unique(np.concatenate([idx, extremes]))
+
+
+def bucket_extremes(values, n_out):
+    """
+    Positions of every column's minimum and maximum in each of n_out // 2
+    equal buckets of a 2-D (rows, columns) array, all columns at once.
+    """
+    columns = np.ascontiguousarray(np.asarray(values, dtype=float).T)  # Each column contiguous
+    n = columns.shape[1]
+    if n_out >= n:
+        return np.arange(n)
+    starts = np.unique(np.linspace(0, n, max(n_out // 2, 1) + 1).astype(np.int64)[:-1])
+    counts = np.diff(np.append(starts, n))
+    rows = np.arange(n)
+    found = [[0, n - 1]]
+    for reduce in (np.fmin, np.fmax):
+        # The first row of each bucket that equals the bucket's extreme (all-NaN buckets find none)
+        extreme = np.repeat(reduce.reduceat(columns, starts, axis=1), counts, axis=1)
+        first = np.minimum.reduceat(np.where(columns == extreme, rows, n), starts, axis=1)
+        found.append(first[first < n])
+    return np.unique(np.concatenate(found))
+
+
+def _split(n, max_points, keep, pick):
+    """
+    Keeps positions keep=(start, stop) at full resolution and lets the bars
+    on either side share the rest of the budget; pick(start, stop, share)
+    returns the positions kept from one side, relative to `start`.
+    """
+    lo, hi = max(0, keep[0]), min(n, keep[1])
+    outside = lo + (n - hi)
+    budget = max(max_points - (hi - lo), 4)
+    parts = [np.arange(lo, hi)]
+    for start, stop in ((0, lo), (hi, n)):
+        if stop > start:
+            share = max(int(budget * (stop - start) / outside), 2)
+            parts.append(start + pick(start, stop, share))
+    return np.unique(np.concatenate(parts))
+
+
+def select_indices(low, high=None, max_points=1000, method="lttb", keep=None):
+    """
+    Chooses which positions to keep.
+
+    Args:
+        low, high: series used for selection; pass the same series twice (or
+            high=None) for a plain line, or Low/High columns for candles
+        max_points: target number of points
+        method: "lttb" or "minmax"
+        keep: optional (start, stop) positions kept at full resolution
+    """
+    low = np.asarray(low, dtype=float)
+    high = None if high is None else np.asarray(high, dtype=float)
+    n = len(low)
+    if not max_points or n <= max_points:
+        return np.arange(n)
+
+    if keep is None:
+        return _indices(low, high, max_points, method)
+
+    def pick(start, stop, share):
+        return _indices(low[start:stop], None if high is None else high[start:stop], share, method)
+
+    return _split(n, max_points, keep, pick)
+
+
+def _view_positions(index, view_start, view_end):
+    tz = index.tz
+    lo = index.searchsorted(pd.Timestamp(view_start, tz=tz)) if view_start else 0
+    hi = index.searchsorted(pd.Timestamp(view_end, tz=tz), side="right") if view_end else len(index)
+    return lo, hi
+
+
+def downsample_frame(frame, max_points, method="lttb", view_start=None, view_end=None):
+    """
+    Downsamples an OHLC(+indicators) frame indexed by date. Rows are chosen on
+    price (Low/High extremes for minmax, Close for LTTB) with half of the
+    budget, plus the lowest and highest row of every other column (RSI,
+    Stochastic, CCI, Volume...) in each bucket, with buckets as fine as the
+    other half allows, so no indicator extreme is hidden. Every column is
+    taken at those rows, so indicators stay aligned with the candles.
+    """
+    n = len(frame)
+    if not max_points or n <= max_points:
+        return frame
+
+    keep = _view_positions(frame.index, view_start, view_end) if (view_start or view_end) else None
+    if method == "minmax" and "Low" in frame.columns and "High" in frame.columns:
+        low, high = frame["Low"].to_numpy(dtype=float), frame["High"].to_numpy(dtype=float)
+    else:
+        low, high = frame["Close"].to_numpy(dtype=float), None
+    others = [c for c in frame.columns if c not in _PRICE_COLUMNS and frame[c].dtype.kind in "fiu"]
+    # The view window is kept whole whatever the budget; only the bars outside it are shared
+    window = 0 if keep is None else max(min(n, keep[1]) - max(0, keep[0]), 0)
+    limit = max(max_points, window + 8)
+    # Price gets half of the outside budget...
+    idx = select_indices(low, high, window + max((limit - window) // 2, 4), method, keep)
+    if others:
+        values = frame[others].to_numpy(dtype=float)
+
+        def extremes(points):
+            if keep is None:
+                return bucket_extremes(values, points)
+            return _split(n, points, keep, lambda start, stop, share: bucket_extremes(values[start:stop], share))
+
+        # ...and the indicators the finest buckets that still fit in the rest
+        best, lo, hi = idx, 4, limit - window
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            candidate = np.union1d(idx, extremes(window + mid))
+            if len(candidate) <= limit:
+                best, lo = candidate, mid + 1
+            else:
+                hi = mid - 1
+        idx = best
+    return frame.iloc[idx]
+
+
+def downsample_series(series, max_points, method="minmax", view_start=None, view_end=None):
+    """Downsamples a date-indexed Series (e.g. drawdown), keeping troughs and peaks."""
+    if not max_points or len(series) <= max_points:
+        return series
+    keep = _view_positions(series.index, view_start, view_end) if (view_start or view_end) else None
+    idx = select_indices(series.to_numpy(), None, max_points, method, keep)
+    return series.iloc[idx]
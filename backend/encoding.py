@@ -0,0 +1,160 @@
+"""
+Response encodings for the ticker payload.
+
+The chart frame is the bulk of the response, so it is never turned into
+Python objects: every format writes it straight from the column arrays and
+the rest of the payload is encoded once around it.
+
+Formats (query param `format=` or Accept header):
+    json      records, the historical shape: [{"Date": ..., "Open": ...}, ...]
+    columnar  {"Date": [...], "Open": [...], ...}  - no repeated keys
+    arrow     Arrow IPC stream, float32 columns, payload JSON in schema metadata
+    f32       raw binary, see `encode_f32`
+"""
+import json
+import math
+import struct
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional: only needed for format=arrow
+    pa = None
+
+FORMATS = ("json", "columnar", "arrow", "f32")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "f32": "application/x-finanalyzer-f32",
+}
+
+F32_MAGIC = b"FAF1"
+
+
+def negotiate(format=None, accept=None):
+    """Picks the format from the explicit query param, then the Accept header."""
+    if format:
+        if format not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(FORMATS)}")
+        return format
+    accept = accept or ""
+    for fmt in ("arrow", "f32"):
+        if MEDIA_TYPES[fmt] in accept:
+            return fmt
+    return "json"
+
+
+def clean(value):
+    """Recursively converts NumPy scalars to Python and NaN/inf to None."""
+    if isinstance(value, dict):
+        return {str(k): clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [clean(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def dumps(obj):
+    """Compact JSON text of `obj` after `clean` (NaN/inf as null)."""
+    return json.dumps(clean(obj), ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str)
+
+
+def _date_strings(chart):
+    index = chart.index
+    intraday = len(index) > 0 and (index != index.normalize()).any()
+    return index.strftime('%Y-%m-%d %H:%M' if intraday else '%Y-%m-%d')
+
+
+def _value_columns(chart):
+    return [col for col in chart.columns if pd.api.types.is_numeric_dtype(chart[col])]
+
+
+def chart_json(chart, layout="json"):
+    """JSON text for the chart frame, produced by pandas' C encoder."""
+    if layout == "columnar":
+        parts = ['"Date":' + json.dumps(list(_date_strings(chart)))]
+        for col in _value_columns(chart):
+            parts.append(json.dumps(col) + ":" + chart[col].to_json(orient="values"))
+        return "{" + ",".join(parts) + "}"
+
+    records = chart.reset_index(names="Date")
+    records['Date'] = _date_strings(chart)
+    return records.to_json(orient="records")
+
+
+def encode_json(payload, chart, layout="json"):
+    """Encodes the payload once, splicing the pre-encoded chart in as "chart_data"."""
+    head = dumps(payload)
+    if chart is None:
+        return head.encode("utf-8")
+    body = head[:-1] + ("," if len(head) > 2 else "") + '"chart_data":' + chart_json(chart, layout) + "}"
+    return body.encode("utf-8")
+
+
+def encode_arrow(payload, chart):
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Arrow format requires pyarrow on the server")
+    arrays = [pa.array(_date_strings(chart))]
+    names = ["Date"]
+    for col in _value_columns(chart):
+        arrays.append(pa.array(chart[col].to_numpy(dtype=np.float32)))
+        names.append(col)
+    table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata({"payload": dumps(payload)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_f32(payload, chart):
+    """
+    Layout (little-endian):
+        4 bytes   magic "FAF1"
+        uint32    header length H
+        H bytes   UTF-8 JSON {"payload": {...}, "columns": [...], "rows": n}
+                  padded with spaces so the arrays start 8-byte aligned
+        n float64 bar timestamps, epoch milliseconds (UTC)
+        n float32 per column, in header "columns" order (NaN = missing)
+    """
+    columns = _value_columns(chart)
+    header = json.dumps(
+        {"payload": clean(payload), "columns": columns, "rows": len(chart)},
+        ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    header += b" " * (-(8 + len(header)) % 8)
+
+    index = chart.index
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    timestamps = index.as_unit("ms").asi8.astype("<f8")
+    values = np.empty((len(columns), len(chart)), dtype="<f4")
+    for i, col in enumerate(columns):
+        values[i] = chart[col].to_numpy(dtype=np.float32)
+
+    return b"".join([F32_MAGIC, struct.pack("<I", len(header)), header, timestamps.tobytes(), values.tobytes()])
+
+
+def render(payload, chart, fmt="json"):
+    """
+    Builds the HTTP response for `payload` plus the chart frame (indexed by
+    date, one column per series). `chart=None` leaves "chart_data" out of
+    JSON responses; binary formats get an empty table.
+    """
+    if chart is None and fmt in ("arrow", "f32"):
+        chart = pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))
+    if fmt == "arrow":
+        body = encode_arrow(payload, chart)
+    elif fmt == "f32":
+        body = encode_f32(payload, chart)
+    else:
+        body = encode_json(payload, chart, layout=fmt)
+    return Response(content=body, media_type=MEDIA_TYPES[fmt])
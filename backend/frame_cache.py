@@ -0,0 +1,327 @@
+"""
+Memory-bounded caches: compact frames and one per-worker byte budget.
+
+Frames are kept in a compact form instead of as pandas objects: float
+columns in one contiguous float64 block (one row per column) and the index
+as int64 epoch nanoseconds plus its time zone. There is none of the
+per-block/per-object overhead of a DataFrame, and the size of every entry
+is known exactly.
+
+Every long-lived in-process cache registers with `budget` (CACHE_MEMORY_MB
+per worker): chart frames here, the other sections (ticker_context), the
+range_stats indexes and the precomputed payloads (scheduler). Each keeps its
+own limits; when their total goes over the budget, the least recently used
+entry across all of them is evicted. Price histories are not held by the
+process: the price store memory-maps its files, which the kernel pages in
+and out. Coalesced responses (singleflight) only live for RESULT_TTL seconds
+under their own entry cap.
+
+Values are stored at full precision: json/columnar responses ship them as
+they are, and only the arrow/f32 encoders narrow them to float32.
+"""
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import metrics
+
+MAX_BYTES = int(float(os.environ.get("FRAME_CACHE_MB", "256")) * 1024 * 1024)
+# Shared by every budgeted cache of the worker, frames included
+BUDGET_BYTES = int(float(os.environ.get("CACHE_MEMORY_MB", "512")) * 1024 * 1024)
+
+# Rough fixed cost of one entry (key, CompactFrame object, arrays' headers)
+_ENTRY_OVERHEAD = 512
+
+
+class CompactFrame:
+    """A DataFrame as float64 columns + int64 timestamps in contiguous arrays."""
+
+    __slots__ = ("ts", "unit", "tz", "index_name", "columns", "values", "others")
+
+    def __init__(self, frame):
+        index = frame.index
+        self.tz = str(index.tz) if index.tz is not None else None
+        self.unit = index.unit
+        self.index_name = index.name
+        self.ts = np.ascontiguousarray(index.as_unit("ns").asi8, dtype=np.int64)
+
+        numeric = [col for col in frame.columns if frame[col].dtype == np.float64]
+        self.columns = list(frame.columns)
+        self.values = np.empty((len(numeric), len(frame)), dtype=np.float64)
+        for i, col in enumerate(numeric):
+            self.values[i] = frame[col].to_numpy()
+        # Anything else (rare: integer counts, flags, labels) is kept with its own dtype
+        self.others = {col: frame[col].to_numpy(copy=True) for col in self.columns if col not in numeric}
+
+    @property
+    def nbytes(self):
+        others = sum(a.nbytes + (sum(len(str(v)) for v in a) if a.dtype == object else 0) for a in self.others.values())
+        return self.ts.nbytes + self.values.nbytes + others + _ENTRY_OVERHEAD
+
+    def __len__(self):
+        return len(self.ts)
+
+    def to_frame(self):
+        """DataFrame with float64 columns (views into the cached block) and the original index."""
+        index = pd.DatetimeIndex(pd.to_datetime(self.ts, unit="ns", utc=True), name=self.index_name)
+        index = (index.tz_convert(self.tz) if self.tz else index.tz_localize(None)).as_unit(self.unit)
+        numeric = [col for col in self.columns if col not in self.others]
+        data = {col: self.values[i] for i, col in enumerate(numeric)}
+        data.update(self.others)
+        return pd.DataFrame({col: data[col] for col in self.columns}, index=index, copy=False)
+
+
+def estimate_size(value):
+    """
+    Approximate deep size in bytes of a cached value: dicts/lists of
+    numbers and strings (section payloads), arrays, frames, or anything
+    with an `nbytes`.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(v) for v in value)
+    return size
+
+
+class MemoryBudget:
+    """
+    A byte budget shared by several caches. Members expose `bytes`,
+    `oldest_use()` (last-use time of their least recently used entry, or
+    None when empty) and `evict_oldest()` (returns the bytes freed).
+    """
+
+    def __init__(self, max_bytes=BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.members = []
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def register(self, member):
+        self.members.append(member)
+        return member
+
+    @property
+    def bytes(self):
+        return sum(member.bytes for member in self.members)
+
+    def enforce(self):
+        """Evicts the globally least recently used entries until the total fits."""
+        with self._lock:
+            while self.bytes > self.max_bytes:
+                oldest = [(member.oldest_use(), member) for member in self.members]
+                oldest = [entry for entry in oldest if entry[0] is not None]
+                if not oldest:
+                    break
+                min(oldest, key=lambda entry: entry[0])[1].evict_oldest()
+                self.evictions += 1
+
+    def stats(self):
+        total = self.bytes
+        return {
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "occupancy": round(total / self.max_bytes, 4) if self.max_bytes else 0.0,
+            "evictions": self.evictions,
+            "members": {member.name: member.bytes for member in self.members},
+        }
+
+
+budget = MemoryBudget()
+
+
+class FrameCache:
+    """LRU of CompactFrames with exact byte accounting, a byte budget and optional TTLs."""
+
+    def __init__(self, name, max_bytes=MAX_BYTES, budget=budget):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> [expires_at or None, CompactFrame, nbytes, last used]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+        _caches.append(self)
+        if budget is not None:
+            budget.register(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached frame or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry[0] is not None and entry[0] < now:
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[3] = now
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[1].to_frame()
+
+    def put(self, key, frame, ttl=None):
+        """
+        Stores `frame` and returns it as it will be served from the cache, so
+        a miss and a later hit produce the same output. Frames bigger than
+        the whole budget are returned but not kept.
+        """
+        compact = frame if isinstance(frame, CompactFrame) else CompactFrame(frame)
+        size = compact.nbytes
+        with self._lock:
+            self._drop(key)
+            now = time.monotonic()
+            if size > self.max_bytes:
+                self.rejected += 1
+            else:
+                self._entries[key] = [now + ttl if ttl else None, compact, size, now]
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self.evictions += 1
+        if self.budget is not None:
+            self.budget.enforce()
+        return compact.to_frame()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def oldest_use(self):
+        with self._lock:
+            return next(iter(self._entries.values()))[3] if self._entries else None
+
+    def evict_oldest(self):
+        with self._lock:
+            if not self._entries:
+                return 0
+            key, entry = next(iter(self._entries.items()))
+            self._drop(key)
+            self.evictions += 1
+            return entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "occupancy": round(self.bytes / self.max_bytes, 4) if self.max_bytes else 0.0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejected": self.rejected,
+        }
+
+
+class ObjectCache(FrameCache):
+    """
+    The same LRU for arbitrary values (section dicts, range indexes...),
+    sized with `size` (estimate_size by default) and capped at
+    `max_entries` as well as by the shared budget.
+    """
+
+    def __init__(self, name, max_entries, size=estimate_size, max_bytes=BUDGET_BYTES, budget=budget):
+        super().__init__(name, max_bytes=max_bytes, budget=budget)
+        self.max_entries = max_entries
+        self.size = size
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry[0] is not None and entry[0] < now:
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            entry[3] = now
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None):
+        size = self.size(value)
+        with self._lock:
+            self._drop(key)
+            now = time.monotonic()
+            if size > self.max_bytes:
+                self.rejected += 1
+                return value
+            self._entries[key] = [now + ttl if ttl else None, value, size, now]
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        if self.budget is not None:
+            self.budget.enforce()
+        return value
+
+    def pop(self, key):
+        with self._lock:
+            self._drop(key)
+
+
+_caches = []
+
+
+def stats():
+    return {cache.name: cache.stats() for cache in _caches}
+
+
+@metrics.register_collector
+def _collect():
+    lines = []
+    gauges = (("bytes", "Bytes held."), ("max_bytes", "Byte budget."), ("entries", "Cached frames."))
+    for field, help in gauges:
+        name = f"finanalyzer_frame_cache_{field}"
+        lines += [f"# HELP {name} Frame cache: {help}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{cache="{c}"}} {s[field]}' for c, s in stats().items()]
+    name = "finanalyzer_frame_cache_events_total"
+    lines += [f"# HELP {name} Frame cache lookups and removals.", f"# TYPE {name} counter"]
+    for c, s in stats().items():
+        for event in ("hits", "misses", "evictions", "expirations", "rejected"):
+            lines.append(f'{name}{{cache="{c}",event="{event}"}} {s[event]}')
+    shared = budget.stats()
+    for field, kind, help in (("bytes", "gauge", "Bytes held by every budgeted cache."),
+                              ("max_bytes", "gauge", "Per-worker cache memory budget."),
+                              ("evictions", "counter", "Entries evicted to stay within the budget.")):
+        name = f"finanalyzer_cache_budget_{field}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {shared[field]}"]
+    return lines
+
+
+# Chart/indicator frames of the section cache (see ticker_context)
+frames = FrameCache("frames")
@@ -0,0 +1,168 @@
+"""
+HTTP caching for ticker responses: validators, conditional GETs and
+compression.
+
+The ETag is derived from the request parameters plus the last bar of the
+history (timestamp and values, so a still-forming session bar changes it),
+which is known before any analysis runs: a matching If-None-Match gets a
+304 without rebuilding the payload. That only holds for complete bodies: a
+degraded one (fallback info or summary after a timeout) is sent with
+`no-store` and no validators, so nothing keeps or revalidates it and the
+next request builds it again. Bodies are compressed with brotli when
+the client accepts it and the optional `brotli` package is installed, gzip
+otherwise. Cache-Control lifetimes follow the interval, since intraday bars
+go stale much faster than daily or weekly ones.
+"""
+import gzip
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is used when brotli isn't installed
+    brotli = None
+
+# Bump to invalidate every client/CDN copy after a payload format change
+ETAG_VERSION = "1"
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Much faster than the default 11 at a similar ratio for JSON
+
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+# interval -> (max-age, stale-while-revalidate) in seconds
+CACHE_LIFETIMES = {
+    "intraday": (30, 30),
+    "1d": (300, 600),
+    "5d": (900, 1800),
+    "1wk": (3600, 3600),
+    "1mo": (3600, 3600),
+    "3mo": (3600, 3600),
+}
+
+
+def _lifetimes(interval):
+    return CACHE_LIFETIMES.get("intraday" if interval in INTRADAY_INTERVALS else interval, CACHE_LIFETIMES["1d"])
+
+
+def max_age(interval):
+    """Seconds a response for `interval` is fresh (its Cache-Control max-age)."""
+    return _lifetimes(interval)[0]
+
+
+def cache_control(interval):
+    max_age, swr = _lifetimes(interval)
+    return f"public, max-age={max_age}, stale-while-revalidate={swr}"
+
+
+def history_etag(history, *params):
+    """
+    Weak ETag for a response built from `history` with `params` (every
+    query parameter that changes the body, including the format). Weak,
+    because gzip/brotli/identity bodies share it.
+    """
+    last = history.iloc[-1]
+    parts = [ETAG_VERSION, *map(str, params), str(history.index[-1].value), str(len(history))]
+    parts += [repr(float(last[col])) for col in ('Open', 'High', 'Low', 'Close', 'Volume') if col in history.columns]
+    return 'W/"' + hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest() + '"'
+
+
+def body_etag(body):
+    """Weak ETag from the body itself, for responses not tied to a history."""
+    return 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def last_modified(history):
+    """HTTP date of the last bar."""
+    ts = history.index[-1]
+    ts = ts.tz_convert("UTC") if ts.tzinfo is not None else ts.tz_localize("UTC")
+    return format_datetime(ts.to_pydatetime().replace(microsecond=0), usegmt=True)
+
+
+def _opaque(tag):
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(headers, etag, modified=None):
+    """
+    Conditional GET check. If-None-Match (weak comparison) takes precedence;
+    If-Modified-Since is only used when the client sent no ETag.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(t.strip()) for t in if_none_match.split(",")}
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and modified:
+        try:
+            return parsedate_to_datetime(modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _accepted(accept_encoding, coding):
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def choose_encoding(accept_encoding):
+    """Content-Encoding to use for the client's Accept-Encoding (None = identity)."""
+    if brotli is not None and _accepted(accept_encoding, "br"):
+        return "br"
+    if _accepted(accept_encoding, "gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body, coding):
+    """(body, Content-Encoding or None); small bodies are sent as they are."""
+    if coding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+
+
+def cache_headers(etag, modified, interval):
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(interval),
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
+
+
+def not_modified_response(etag, modified, interval):
+    return Response(status_code=304, headers=cache_headers(etag, modified, interval))
+
+
+def uncacheable_headers():
+    return {"Cache-Control": "no-store", "Vary": "Accept, Accept-Encoding"}
+
+
+def finalize(response, etag, modified, interval, coding=None, cacheable=True):
+    """
+    Adds validators and Cache-Control to a built response and compresses its
+    body with `coding` (see choose_encoding). Runs on a worker thread
+    (compression is CPU-bound). Without a precomputed ETag the body hash is
+    used, which still lets revalidations skip the transfer. A degraded body
+    (`cacheable=False`) gets no validators and `no-store`.
+    """
+    if cacheable:
+        headers = cache_headers(etag or body_etag(response.body), modified, interval)
+    else:
+        headers = uncacheable_headers()
+    body, content_encoding = compress(response.body, coding)
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, status_code=response.status_code, media_type=response.media_type, headers=headers)
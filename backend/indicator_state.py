@@ -0,0 +1,297 @@
+"""
+Streaming (incremental) indicator state.
+
+An IndicatorState holds everything needed to produce the next indicator row
+from a single new bar: the EMA accumulators (RSI, MACD, EMA 20), the Wilder
+sums (ATR, ADX), the running OBV and the short rolling-window buffers
+(Stochastic/Williams 14, Stoch %D 3, SMA/Bollinger/CCI 20). `update(bar)`
+is O(1) in the history length and matches what indicators.compute_indicators
+gives when re-run over the whole history.
+
+States are plain-dict serializable (`to_dict` / `from_dict`) so they can be
+persisted per symbol/interval next to the price store.
+"""
+import os
+import json
+import math
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from indicators import compute_indicators, INDICATOR_COLUMNS
+from price_store import base_path
+
+# MACD's signal line is the slowest warm-up (26 + 9 - 1 bars)
+MIN_BARS = 34
+
+_BUFFERS = {"highs": 14, "lows": 14, "stoch_k": 3, "closes": 20, "typical": 20}
+_SCALARS = [
+    "prev_close", "prev_high", "prev_low",
+    "emaup", "emadn", "ema12", "ema26", "signal", "ema20",
+    "atr", "trs", "dip", "din", "adx", "obv",
+]
+
+
+def _ratio(num, den, scale):
+    return scale * num / den if den != 0 else math.nan
+
+
+class IndicatorState:
+    def __init__(self):
+        for name in _SCALARS:
+            setattr(self, name, math.nan)
+        for name, size in _BUFFERS.items():
+            setattr(self, name, deque(maxlen=size))
+        self.last_ts = None
+        self.last_row = None
+        self._before_last = None  # Snapshot used to revise the latest bar
+
+    # ------------------------------------------------------------------
+    # Bootstrap
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_history(cls, history):
+        """
+        Builds the state at the last bar of `history` (a yfinance-style frame)
+        from one vectorized pass of the indicator engine, which also exposes
+        the accumulators that don't appear as output columns.
+        """
+        if len(history) < MIN_BARS:
+            raise ValueError(f"Need at least {MIN_BARS} bars to bootstrap indicator state")
+
+        accumulators = {}
+        columns = compute_indicators(
+            history['High'], history['Low'], history['Close'], history['Volume'], state=accumulators
+        )
+
+        state = cls()
+        high = history['High'].to_numpy(dtype=float)
+        low = history['Low'].to_numpy(dtype=float)
+        close = history['Close'].to_numpy(dtype=float)
+
+        state.prev_close = float(close[-1])
+        state.prev_high = float(high[-1])
+        state.prev_low = float(low[-1])
+        for name in ("emaup", "emadn", "ema12", "ema26", "ema20", "trs", "dip", "din"):
+            setattr(state, name, float(accumulators[name]))
+        state.signal = float(columns["MACD_Signal"][-1])
+        state.atr = float(columns["ATR"][-1])
+        state.adx = float(columns["ADX"][-1])
+        state.obv = float(columns["OBV"][-1])
+
+        state.highs.extend(high[-14:].tolist())
+        state.lows.extend(low[-14:].tolist())
+        state.stoch_k.extend(np.asarray(columns["Stoch_K"][-3:], dtype=float).tolist())
+        state.closes.extend(close[-20:].tolist())
+        state.typical.extend(((high[-20:] + low[-20:] + close[-20:]) / 3.0).tolist())
+
+        state.last_ts = _timestamp(history.index[-1])
+        last = history.iloc[-1]
+        state.last_row = {
+            "Open": float(last['Open']), "High": float(last['High']), "Low": float(last['Low']),
+            "Close": float(last['Close']), "Volume": float(last['Volume']),
+            **{col: float(columns[col][-1]) for col in INDICATOR_COLUMNS},
+        }
+        return state
+
+    # ------------------------------------------------------------------
+    # Incremental update
+    # ------------------------------------------------------------------
+    def update(self, bar, replace_last=False):
+        """
+        Advances the state by one bar and returns the new indicator row.
+
+        Args:
+            bar: mapping with Open, High, Low, Close, Volume (and optionally a
+                timestamp under 'Date' or 'ts')
+            replace_last: the bar is a revision of the latest one (e.g. the
+                still-forming session); the previous update is rolled back first
+        """
+        if replace_last:
+            if self._before_last is None:
+                raise ValueError("No previous update to revise")
+            self._restore(self._before_last)
+        self._before_last = self.to_dict(include_snapshot=False)
+
+        o, h, l, c, v = (float(bar[k]) for k in ("Open", "High", "Low", "Close", "Volume"))
+        pc, ph, pl = self.prev_close, self.prev_high, self.prev_low
+        row = {"Open": o, "High": h, "Low": l, "Close": c, "Volume": v}
+
+        # RSI (Wilder EMA of gains/losses)
+        diff = c - pc
+        a = 1 / 14
+        self.emaup = (1 - a) * self.emaup + a * max(diff, 0.0)
+        self.emadn = (1 - a) * self.emadn + a * max(-diff, 0.0)
+        row["RSI"] = 100.0 if self.emadn == 0 else 100.0 - 100.0 / (1.0 + self.emaup / self.emadn)
+
+        # MACD 12/26/9 and EMA 20
+        self.ema12 += 2 / 13 * (c - self.ema12)
+        self.ema26 += 2 / 27 * (c - self.ema26)
+        macd = self.ema12 - self.ema26
+        self.signal += 2 / 10 * (macd - self.signal)
+        self.ema20 += 2 / 21 * (c - self.ema20)
+        row["MACD"], row["MACD_Signal"], row["MACD_Hist"] = macd, self.signal, macd - self.signal
+
+        # Stochastic and Williams %R share the 14-bar extremes
+        self.highs.append(h)
+        self.lows.append(l)
+        highest, lowest = max(self.highs), min(self.lows)
+        stoch_k = _ratio(c - lowest, highest - lowest, 100)
+        self.stoch_k.append(stoch_k)
+        row["Stoch_K"] = stoch_k
+        row["Stoch_D"] = sum(self.stoch_k) / len(self.stoch_k)
+        row["Williams"] = _ratio(highest - c, highest - lowest, -100)
+
+        # SMA / Bollinger 20
+        self.closes.append(c)
+        mean = sum(self.closes) / 20
+        std = math.sqrt(sum((x - mean) ** 2 for x in self.closes) / 20)
+        row["BB_High"], row["BB_Low"], row["BB_Mid"] = mean + 2 * std, mean - 2 * std, mean
+        row["SMA_20"] = mean
+        row["EMA_20"] = self.ema20
+
+        # True range, ATR and ADX (Wilder, window 14)
+        tr = max(h, pc) - min(l, pc)
+        self.atr = (self.atr * 13 + tr) / 14
+        row["ATR"] = self.atr
+
+        up_move, down_move = h - ph, pl - l
+        pos = up_move if (up_move > down_move and up_move > 0) else 0.0
+        neg = down_move if (down_move > up_move and down_move > 0) else 0.0
+        self.trs = self.trs - self.trs / 14 + tr
+        self.dip = self.dip - self.dip / 14 + pos
+        self.din = self.din - self.din / 14 + neg
+        di_pos = 100 * self.dip / self.trs if self.trs != 0 else 0.0
+        di_neg = 100 * self.din / self.trs if self.trs != 0 else 0.0
+        total = di_pos + di_neg
+        dx = 100 * abs((di_pos - di_neg) / total) if total != 0 else 0.0
+        self.adx = (self.adx * 13 + dx) / 14
+        row["ADX"] = self.adx
+
+        # CCI 20
+        typical = (h + l + c) / 3.0
+        self.typical.append(typical)
+        tp_mean = sum(self.typical) / 20
+        mad = sum(abs(x - tp_mean) for x in self.typical) / 20
+        row["CCI"] = _ratio(typical - tp_mean, 0.015 * mad, 1)
+
+        # OBV
+        self.obv += -v if c < pc else v
+        row["OBV"] = self.obv
+
+        self.prev_close, self.prev_high, self.prev_low = c, h, l
+        ts = bar.get("ts", bar.get("Date"))
+        if ts is not None:
+            self.last_ts = _timestamp(ts)
+        self.last_row = row
+        return row
+
+    def catch_up(self, history):
+        """
+        Brings a restored state up to the end of `history`: its last bar is
+        revised if it changed since (a session that was still forming) and
+        the newer bars are applied. Returns [(ts, row), ...] from the state's
+        last bar on, or None when `history` doesn't continue this state (the
+        bar is gone, or earlier bars were re-adjusted for a dividend/split);
+        the state must then be rebuilt with from_history.
+        """
+        stamps = history.index.as_unit("ns").asi8
+        pos = int(np.searchsorted(stamps, self.last_ts)) if self.last_ts is not None else len(stamps)
+        if pos >= len(stamps) or stamps[pos] != self.last_ts or self.last_row is None:
+            return None
+        fields = ("Open", "High", "Low", "Close", "Volume")
+        values = history[list(fields)].to_numpy(dtype=float)
+        # The snapshot before the last update remembers the previous close: if it moved, so did the history
+        before = self._before_last
+        if before is not None and pos > 0 and float(before["prev_close"]) != values[pos - 1][3]:
+            return None
+
+        bars = [dict(zip(fields, row), ts=int(ts)) for ts, row in zip(stamps[pos:], values[pos:].tolist())]
+        first = bars[0]
+        if all(first[f] == self.last_row[f] for f in fields):
+            rows = [(first["ts"], self.last_row)]
+        elif before is not None:
+            rows = [(first["ts"], self.update(first, replace_last=True))]
+        else:
+            return None
+        return rows + [(bar["ts"], self.update(bar)) for bar in bars[1:]]
+
+    def technical(self):
+        """Latest values in the shape of calculate_advanced_indicators' dashboard dict."""
+        r = self.last_row or {}
+        return {
+            "RSI": r.get("RSI"),
+            "MACD": {"macd": r.get("MACD"), "signal": r.get("MACD_Signal"), "hist": r.get("MACD_Hist")},
+            "Stoch": {"k": r.get("Stoch_K"), "d": r.get("Stoch_D")},
+            "BB": {"high": r.get("BB_High"), "low": r.get("BB_Low"), "mid": r.get("BB_Mid"), "price": r.get("Close")},
+            "ADX": r.get("ADX"),
+            "ATR": r.get("ATR"),
+            "CCI": r.get("CCI"),
+            "Williams": r.get("Williams"),
+            "OBV": r.get("OBV"),
+        }
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    def to_dict(self, include_snapshot=True):
+        data = {name: getattr(self, name) for name in _SCALARS}
+        data.update({name: list(getattr(self, name)) for name in _BUFFERS})
+        data["last_ts"] = self.last_ts
+        data["last_row"] = dict(self.last_row) if self.last_row else None
+        if include_snapshot:
+            data["before_last"] = self._before_last
+        return data
+
+    def _restore(self, data):
+        for name in _SCALARS:
+            setattr(self, name, float(data[name]))
+        for name, size in _BUFFERS.items():
+            setattr(self, name, deque(data[name], maxlen=size))
+        self.last_ts = data.get("last_ts")
+        self.last_row = data.get("last_row")
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state._restore(data)
+        state._before_last = data.get("before_last")
+        return state
+
+
+def save_state(symbol, interval, state, replay=None):
+    """
+    Persists a state next to the symbol's price store file, with the
+    caller's replay bars (live's formatted bars) if any.
+    """
+    path = base_path(symbol, interval) + ".state.json"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = state.to_dict()
+    data["replay"] = list(replay or [])
+    # Per process and thread (as translation_cache does): saves of one channel may overlap
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_state(symbol, interval):
+    """Returns (state, replay bars) persisted for a symbol/interval, or (None, [])."""
+    try:
+        with open(base_path(symbol, interval) + ".state.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return IndicatorState.from_dict(data), data.get("replay", [])
+    except (OSError, ValueError, KeyError):
+        return None, []
+
+
+def _timestamp(value):
+    """Epoch nanoseconds (UTC) for a timestamp-like value."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).as_unit("ns").value)
@@ -0,0 +1,212 @@
+"""
+Fused NumPy engine for the technical indicators shown in the dashboard.
+
+Reproduces the `ta` library columns used by calculate_advanced_indicators
+(same windows, warm-up NaNs/zeros and smoothing conventions, and the same
+NaN handling: a gap in High/Low/Close leaves ADX NaN from there on, as in
+`ta`) working on contiguous float64 arrays. Intermediates are computed once and shared:
+the previous close and true range (ATR/ADX), the 14-bar rolling high/low
+(Stochastic/Williams), the 20-bar window view (SMA/Bollinger/CCI), and the
+exponential recursions run as C-level IIR filters instead of pandas `ewm`.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+# Column order matches the frame historically produced with `ta`
+INDICATOR_COLUMNS = [
+    "RSI", "MACD", "MACD_Signal", "MACD_Hist", "Stoch_K", "Stoch_D",
+    "BB_High", "BB_Low", "BB_Mid", "ADX", "ATR", "CCI", "Williams", "OBV",
+    "SMA_20", "EMA_20",
+]
+
+
+def _recursive(x, decay, seed):
+    """y[i] = decay * y[i-1] + x[i], starting from y[-1] = seed."""
+    if len(x) == 0:
+        return np.empty(0)
+    y, _ = lfilter([1.0], [1.0, -decay], x, zi=[decay * seed])
+    return y
+
+
+def ewm(x, alpha, min_periods):
+    """
+    Same as pandas `ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()`
+    for series that are only NaN at the start (e.g. MACD before its warm-up).
+    """
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) == 0:
+        return out
+
+    start = valid[0]
+    if len(valid) != len(x) - start:
+        # Gaps in the middle: let pandas apply its NaN weighting rules
+        return pd.Series(x).ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean().to_numpy()
+
+    seeded = x[start:]
+    out[start] = seeded[0]
+    out[start + 1:] = _recursive(alpha * seeded[1:], 1.0 - alpha, seeded[0])
+    out[start:start + min_periods - 1] = np.nan
+    return out
+
+
+def _rolling(x, window):
+    """Strided (n - window + 1, window) view; no copy."""
+    if len(x) < window:
+        return np.empty((0, window))
+    return sliding_window_view(x, window)
+
+
+def _pad(values, n):
+    """Left-pads a rolling result with NaN back to the series length."""
+    out = np.full(n, np.nan)
+    out[n - len(values):] = values
+    return out
+
+
+def _wilder(x, window, start):
+    """
+    `ta`'s Wilder smoothing as used by ATR/ADX: zeros before `start`, the plain
+    mean of the first `window` inputs at `start`, then
+    y[i] = (y[i-1] * (window - 1) + x[i]) / window.
+    """
+    out = np.zeros(len(x) + start - (window - 1))
+    first = x[:window].mean()
+    out[start] = first
+    out[start + 1:] = _recursive(x[window:window + len(out) - start - 1] / window, 1.0 - 1.0 / window, first)
+    return out
+
+
+def compute_indicators(high, low, close, volume, state=None):
+    """
+    Computes every dashboard indicator in a few vectorized passes.
+
+    Args:
+        high, low, close, volume: 1-D array-likes of equal length
+        state: optional dict that receives the recursive accumulators at the
+            last bar (EMAs, Wilder sums), used to bootstrap IndicatorState
+    Returns:
+        dict column name -> float64 ndarray (see INDICATOR_COLUMNS)
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    volume = np.ascontiguousarray(volume, dtype=np.float64)
+    n = len(close)
+    if n == 0:
+        return {col: np.empty(0) for col in INDICATOR_COLUMNS}
+    out = {}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # --- Shared: previous close, price change ---
+        prev_close = np.empty(n)
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+        diff = close - prev_close
+
+        # --- RSI (14, Wilder via ewm alpha=1/14) ---
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+        emaup = ewm(up, 1 / 14, 14)
+        emadn = ewm(down, 1 / 14, 14)
+        out["RSI"] = np.where(emadn == 0, 100.0, 100.0 - 100.0 / (1.0 + emaup / emadn))
+
+        # --- EMAs (MACD 12/26/9 and EMA 20) ---
+        ema12 = ewm(close, 2 / 13, 12)
+        ema26 = ewm(close, 2 / 27, 26)
+        macd = ema12 - ema26
+        signal = ewm(macd, 2 / 10, 9)
+        out["MACD"] = macd
+        out["MACD_Signal"] = signal
+        out["MACD_Hist"] = macd - signal
+
+        # --- Shared 14-bar rolling extremes (Stochastic, Williams %R) ---
+        highest = _pad(_rolling(high, 14).max(axis=1), n)
+        lowest = _pad(_rolling(low, 14).min(axis=1), n)
+        stoch_k = 100 * (close - lowest) / (highest - lowest)
+        out["Stoch_K"] = stoch_k
+        out["Stoch_D"] = _pad(_rolling(stoch_k, 3).mean(axis=1), n)
+
+        # --- Shared 20-bar window over close (SMA, Bollinger) ---
+        window20 = _rolling(close, 20)
+        mavg = _pad(window20.mean(axis=1), n)
+        mstd = _pad(window20.std(axis=1), n)
+        out["BB_High"] = mavg + 2 * mstd
+        out["BB_Low"] = mavg - 2 * mstd
+        out["BB_Mid"] = mavg
+
+        # --- True range (ATR): max of high-low, |high-prev|, |low-prev|, skipping NaNs as ta does ---
+        pdm = np.fmax(high, prev_close)          # max(high, prev_close); high on the first bar
+        pdn = np.fmin(low, prev_close)
+        true_range = pdm - pdn
+        gaps = np.isnan(high).any() or np.isnan(low).any() or np.isnan(close).any()
+        if gaps:
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+        # --- ADX (14), following ta's indexing: zeros until bar 2*14-1 ---
+        # ta's ADX doesn't skip NaNs: a gap in High/Low/Close makes it NaN from there on
+        adx = np.zeros(n)
+        if n >= 2 * 14:
+            w = 14
+            m = n - w + 1
+            dm = true_range[1:]                  # ta skips the first bar here
+            if gaps:
+                dm = (np.maximum(high, prev_close) - np.minimum(low, prev_close))[1:]
+            up_move = high[1:] - high[:-1]
+            down_move = low[:-1] - low[1:]
+            pos = np.abs(((up_move > down_move) & (up_move > 0)) * up_move)
+            neg = np.abs(((down_move > up_move) & (down_move > 0)) * down_move)
+
+            decay = 1.0 - 1.0 / w
+            smoothed = []
+            for series in (dm, pos, neg):
+                s = np.zeros(m)                  # the last slot stays 0, as in ta
+                s[0] = series[~np.isnan(series)][:w].sum()   # ta seeds from the first non-NaN values
+                s[1:m - 1] = _recursive(series[w:w + m - 2], decay, s[0])
+                smoothed.append(s)
+            trs, dip_s, din_s = smoothed
+
+            nonzero = trs != 0
+            dip = np.where(nonzero, 100 * dip_s / trs, 0.0)
+            din = np.where(nonzero, 100 * din_s / trs, 0.0)
+            total = dip + din
+            dx = np.where(total != 0, 100 * np.abs((dip - din) / total), 0.0)
+
+            adx[w - 1:] = _wilder(dx, w, w)[:m]
+            if state is not None:
+                # Slot k belongs to bar k + w, so the last real bar is m - 2
+                state.update(trs=trs[m - 2], dip=dip_s[m - 2], din=din_s[m - 2])
+        out["ADX"] = adx
+
+        # --- ATR (14) ---
+        atr = np.zeros(n)
+        if n >= 14:
+            atr = _wilder(true_range, 14, 13)
+        out["ATR"] = atr
+
+        # --- CCI (20) ---
+        typical = (high + low + close) / 3.0
+        tp_window = _rolling(typical, 20)
+        tp_mean = tp_window.mean(axis=1)
+        mad = np.abs(tp_window - tp_mean[:, None]).mean(axis=1)
+        out["CCI"] = (typical - _pad(tp_mean, n)) / (0.015 * _pad(mad, n))
+
+        # --- Williams %R (14), reuses the stochastic extremes ---
+        out["Williams"] = -100 * (highest - close) / (highest - lowest)
+
+        # --- OBV ---
+        out["OBV"] = np.cumsum(np.where(close < prev_close, -volume, volume))
+
+        # --- Moving averages for the chart ---
+        out["SMA_20"] = mavg
+        out["EMA_20"] = ewm(close, 2 / 21, 20)
+
+    if state is not None:
+        state.update(
+            emaup=emaup[-1], emadn=emadn[-1],
+            ema12=ema12[-1], ema26=ema26[-1], ema20=out["EMA_20"][-1],
+        )
+
+    return {col: out[col] for col in INDICATOR_COLUMNS}
@@ -0,0 +1,386 @@
+"""
+Live updates over WebSocket: new/revised bars with their indicator values.
+
+One Channel per (symbol, interval) polls the feed and fans every change
+out to all of its subscribers, so a hundred open dashboards on one symbol
+cost one upstream poll. The channel bootstraps an IndicatorState from the
+stored history once; after that each bar is an O(1) `update` (a revised,
+still-forming bar rolls back and re-applies), so pushes carry only the
+changed bars, their indicator values and the `technical` snapshot. The
+state and the replay buffer are saved next to the price store after every
+change, and the next channel for the symbol (after a restart, or once
+everyone left) resumes from them instead of recomputing the whole history.
+
+Messages (JSON text):
+    {"type": "snapshot", "bars": [...], "technical": {...}}  on subscribe:
+        the latest bar, or every bar since `since` still in the replay buffer
+    {"type": "bars", "bars": [...], "technical": {...}}      on a change;
+        bars with "revised": true replace the client's bar of the same Date
+    {"type": "resync"}   the client fell too far behind (or `since` is older
+        than the replay buffer): refetch over REST
+    {"type": "error", "detail": "..."}
+
+LIVE_FEED=simulated swaps Yahoo for SimulatedFeed, a seeded local tick
+feed (each poll is one tick, every few ticks start a new bar), so the
+channel can be exercised without network or market hours.
+"""
+import os
+import zlib
+import asyncio
+from collections import deque
+import numpy as np
+import pandas as pd
+import encoding
+import http_cache
+from indicator_state import IndicatorState, MIN_BARS, load_state, save_state
+from indicators import INDICATOR_COLUMNS
+from price_store import load_history, STORED_INTERVALS
+from pipeline import run_stage, run_analytics
+
+FEED = os.environ.get("LIVE_FEED", "yahoo")
+# Seconds between polls of one channel
+POLL_SECONDS = {
+    "intraday": float(os.environ.get("LIVE_POLL_SECONDS_INTRADAY", "15")),
+    "daily": float(os.environ.get("LIVE_POLL_SECONDS_DAILY", "60")),
+}
+MAX_POLL_BACKOFF = 300.0
+REPLAY_BARS = int(os.environ.get("LIVE_REPLAY_BARS", "500"))
+QUEUE_SIZE = int(os.environ.get("LIVE_QUEUE_SIZE", "100"))
+
+_BAR_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _intraday(interval):
+    return interval in http_cache.INTRADAY_INTERVALS
+
+
+def _frame_bars(frame):
+    """[(ts ns UTC, {Open..Volume, ts}), ...] of a yfinance-style frame."""
+    stamps = frame.index.as_unit("ns").asi8 if frame.index.tz is not None \
+        else frame.index.tz_localize("UTC").as_unit("ns").asi8
+    values = frame[list(_BAR_FIELDS)].to_numpy(dtype=float)
+    return [(int(ts), dict(zip(_BAR_FIELDS, map(float, row)), ts=int(ts))) for ts, row in zip(stamps, values)]
+
+
+def _format(ts, row, tz, interval, revised=False):
+    """A pushed bar: Date as in chart_data, OHLCV, the indicator values and its ts (not sent)."""
+    stamp = pd.Timestamp(ts, unit="ns", tz="UTC").tz_convert(tz or "UTC")
+    date = stamp.strftime('%Y-%m-%d %H:%M' if _intraday(interval) else '%Y-%m-%d')
+    bar = {"Date": date, **{col: row.get(col) for col in (*_BAR_FIELDS, *INDICATOR_COLUMNS)}, "ts": ts}
+    if revised:
+        bar["revised"] = True
+    return bar
+
+
+def _warm_up(history, interval, saved=None, replay=()):
+    """
+    (state, tz, replay bars, last bar) for a channel, built off the event
+    loop; nothing is shared until the channel takes the result. A `saved`
+    state (persisted by an earlier channel with its `replay` bars) only has
+    to catch up with the bars since; if the history no longer continues it,
+    it starts over.
+    """
+    if len(history) <= MIN_BARS:
+        raise ValueError(f"Need more than {MIN_BARS} bars for live indicators")
+    tz = str(history.index.tz) if history.index.tz is not None else None
+    last_bar = _frame_bars(history.iloc[-1:])[0][1]
+    rows = saved.catch_up(history) if saved is not None else None
+    if rows is not None:
+        recent = [bar for bar in replay if bar["ts"] < rows[0][0]]
+        recent += [_format(ts, row, tz, interval) for ts, row in rows]
+        return saved, tz, recent[-REPLAY_BARS:], last_bar
+    # The replay tail goes through update() (so the last bar can be revised
+    # and late subscribers can catch up); everything before it in one pass
+    tail = min(REPLAY_BARS, len(history) - MIN_BARS)
+    state = IndicatorState.from_history(history.iloc[:-tail])
+    recent = [_format(ts, state.update(bar), tz, interval) for ts, bar in _frame_bars(history.iloc[-tail:])]
+    return state, tz, recent, last_bar
+
+
+class YahooFeed:
+    """History from the price store; polls go through it too (delta fetch, REFRESH_SECONDS throttle)."""
+
+    def history(self, symbol, interval):
+        return load_history(symbol, interval=interval, period="max" if interval in STORED_INTERVALS else "5d")
+
+    def recent(self, symbol, interval):
+        return load_history(symbol, interval=interval, period="5d" if interval in STORED_INTERVALS else "1d")
+
+
+_SIM_STEPS = {"1d": pd.offsets.BDay(1), "5d": pd.offsets.BDay(5), "1wk": pd.offsets.Week(1), "1mo": pd.offsets.MonthBegin(1)}
+
+
+class SimulatedFeed:
+    """
+    Seeded random-walk tick feed. Each `recent` call is one tick: it revises
+    the forming bar, and every `ticks_per_bar` ticks opens a new one.
+    """
+
+    def __init__(self, seed=0, bars=300, ticks_per_bar=4):
+        self.seed = seed
+        self.bars = bars
+        self.ticks_per_bar = ticks_per_bar
+        self._frames = {}
+        self._ticks = {}
+        self._rngs = {}
+
+    def _step(self, interval):
+        minutes = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}.get(interval)
+        return pd.Timedelta(minutes=minutes) if minutes else _SIM_STEPS.get(interval, pd.offsets.BDay(1))
+
+    def _frame(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self._frames:
+            rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode("utf-8"))])
+            n = self.bars
+            close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, n)))
+            open_ = close * (1 + rng.normal(0, 0.003, n))
+            high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n)))
+            low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n)))
+            volume = rng.integers(100_000, 5_000_000, n).astype(float)
+            end = pd.Timestamp.now(tz="America/New_York").floor("min")
+            step = self._step(interval)
+            if isinstance(step, pd.Timedelta):
+                index = pd.date_range(end=end, periods=n, freq=step, name="Date")
+            else:
+                index = pd.date_range(end=end.normalize(), periods=n, freq=step, name="Date")
+            self._frames[key] = pd.DataFrame(
+                {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index
+            )
+            self._ticks[key] = 0
+            self._rngs[key] = rng
+        return self._frames[key]
+
+    def history(self, symbol, interval):
+        return self._frame(symbol, interval).copy()
+
+    def recent(self, symbol, interval):
+        frame = self._frame(symbol, interval)
+        key = (symbol, interval)
+        rng = self._rngs[key]
+        self._ticks[key] += 1
+        last = frame.iloc[-1]
+        if self._ticks[key] % self.ticks_per_bar == 0:
+            price = float(last["Close"])
+            row = pd.DataFrame(
+                {"Open": [price], "High": [price], "Low": [price], "Close": [price], "Volume": [0.0]},
+                index=pd.DatetimeIndex([frame.index[-1] + self._step(interval)], name="Date")
+            )
+            frame = self._frames[key] = pd.concat([frame, row])
+        else:
+            close = float(last["Close"]) * (1 + rng.normal(0, 0.003))
+            frame.iloc[-1] = [
+                last["Open"], max(last["High"], close), min(last["Low"], close), close,
+                last["Volume"] + float(rng.integers(1_000, 50_000)),
+            ]
+        return frame.tail(5).copy()
+
+
+class Channel:
+    def __init__(self, hub, symbol, interval):
+        self.hub = hub
+        self.symbol = symbol
+        self.interval = interval
+        self.subscribers = {}  # queue -> `since` (ns) until its snapshot is sent, else None
+        self.state = None
+        self.tz = None
+        self.last_bar = None
+        self.recent = deque(maxlen=REPLAY_BARS)  # Formatted bars, oldest first
+        self.polls = 0
+        self.pushes = 0
+        self.errors = 0
+        self.task = None
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+    def subscribe(self, since=None):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers[queue] = since
+        if self.state is not None:
+            self._send_snapshot(queue)
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.pop(queue, None)
+
+    def _send_snapshot(self, queue):
+        since = self.subscribers.get(queue)
+        self.subscribers[queue] = None
+        if since is not None and since < self.recent[0]["ts"]:
+            # Missed more than the replay buffer holds
+            self._put(queue, encoding.dumps({"type": "resync"}))
+            since = None
+        bars = [bar for bar in self.recent if since is not None and bar["ts"] >= since] or list(self.recent)[-1:]
+        self._put(queue, encoding.dumps(self._message("snapshot", bars)))
+
+    def _put(self, queue, text):
+        if queue.full():
+            # Behind by QUEUE_SIZE messages: drop the backlog, the client refetches instead
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(encoding.dumps({"type": "resync"}))
+            return
+        queue.put_nowait(text)
+
+    def _broadcast(self, message):
+        # Encoded once, whatever the number of subscribers
+        text = encoding.dumps(message)
+        for queue in list(self.subscribers):
+            self._put(queue, text)
+        self.pushes += 1
+
+    def _message(self, kind, bars):
+        return {
+            "type": kind, "symbol": self.symbol, "interval": self.interval,
+            "bars": [{k: v for k, v in bar.items() if k != "ts"} for bar in bars],
+            "technical": self.state.technical(),
+        }
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+    def _format(self, ts, row, revised=False):
+        return _format(ts, row, self.tz, self.interval, revised)
+
+    def _apply(self, frame):
+        """
+        Feeds the polled bars into the state; returns the changed bars. Runs
+        on the event loop (a few O(1) updates), so snapshots never see a
+        half-applied bar.
+        """
+        changed = []
+        for ts, bar in _frame_bars(frame):
+            last_ts = self.last_bar["ts"]
+            if ts < last_ts:
+                continue
+            if ts == last_ts:
+                if all(bar[f] == self.last_bar[f] for f in _BAR_FIELDS):
+                    continue
+                row = self.state.update(bar, replace_last=True)
+                formatted = self._format(ts, row, revised=True)
+                if self.recent and self.recent[-1]["ts"] == ts:
+                    self.recent[-1] = formatted
+            else:
+                row = self.state.update(bar)
+                formatted = self._format(ts, row)
+                self.recent.append(formatted)
+            self.last_bar = bar
+            changed.append(formatted)
+        return changed
+
+    def _poll_seconds(self):
+        return self.hub.poll_seconds or POLL_SECONDS["intraday" if _intraday(self.interval) else "daily"]
+
+    async def _run(self):
+        try:
+            history = await run_stage("history", self.hub.feed.history, self.symbol, self.interval)
+            saved, replay = await run_stage("live_state", load_state, self.symbol, self.interval, default=(None, []))
+            state, self.tz, recent, self.last_bar = await run_analytics(
+                "live_bootstrap", _warm_up, history, self.interval, saved, replay
+            )
+            self.recent.extend(recent)
+            self.state = state
+            await self._save()
+        except Exception as e:
+            self.errors += 1
+            self._broadcast_error(f"Could not start live updates for {self.symbol}: {e}")
+            for queue in list(self.subscribers):
+                queue.put_nowait(None)  # End of stream
+            self.subscribers.clear()
+            self.hub._closed(self)
+            return
+        # Everyone who subscribed while the history was loading
+        for queue in list(self.subscribers):
+            self._send_snapshot(queue)
+
+        delay = self._poll_seconds()
+        while self.subscribers:
+            await asyncio.sleep(delay)
+            try:
+                frame = await run_stage("live_poll", self.hub.feed.recent, self.symbol, self.interval)
+                self.polls += 1
+                changed = self._apply(frame) if len(frame) else []
+                if changed:
+                    self._broadcast(self._message("bars", changed))
+                    await self._save()
+                delay = self._poll_seconds()
+            except Exception as e:
+                self.errors += 1
+                delay = min(delay * 2, MAX_POLL_BACKOFF)
+                print(f"⚠️ Live poll failed for {self.symbol} ({self.interval}), retrying in {delay:.0f}s: {e}")
+        self.hub._closed(self)
+
+    async def _save(self):
+        # A copy taken on the loop, so the write never sees a half-applied bar
+        snapshot = IndicatorState.from_dict(self.state.to_dict())
+        await run_stage(
+            "live_state", save_state, self.symbol, self.interval, snapshot, list(self.recent), default=None
+        )
+
+    def _broadcast_error(self, detail):
+        text = encoding.dumps({"type": "error", "detail": detail})
+        for queue in list(self.subscribers):
+            self._put(queue, text)
+
+
+class LiveHub:
+    def __init__(self, feed=None, poll_seconds=None):
+        self.feed = feed or (SimulatedFeed() if FEED == "simulated" else YahooFeed())
+        # Overrides the per-interval poll period (tests / simulated feed)
+        self.poll_seconds = poll_seconds
+        self.channels = {}
+
+    def subscribe(self, symbol, interval, since=None):
+        """(channel, queue of JSON texts; None ends the stream) for one subscriber."""
+        key = (symbol, interval)
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = self.channels[key] = Channel(self, symbol, interval)
+        return channel, channel.subscribe(since)
+
+    def unsubscribe(self, channel, queue):
+        channel.unsubscribe(queue)
+        # The poller notices the empty channel at its next wake-up; stop it now instead
+        if not channel.subscribers and channel.task is not None:
+            channel.task.cancel()
+            self._closed(channel)
+
+    def _closed(self, channel):
+        if self.channels.get((channel.symbol, channel.interval)) is channel and not channel.subscribers:
+            del self.channels[(channel.symbol, channel.interval)]
+
+    async def close(self):
+        for channel in list(self.channels.values()):
+            if channel.task is not None:
+                channel.task.cancel()
+        self.channels.clear()
+
+    def stats(self):
+        return {
+            "feed": type(self.feed).__name__,
+            "channels": [
+                {
+                    "symbol": c.symbol, "interval": c.interval, "subscribers": len(c.subscribers),
+                    "polls": c.polls, "pushes": c.pushes, "errors": c.errors,
+                }
+                for c in self.channels.values()
+            ],
+        }
+
+
+def parse_since(value):
+    """`since` query value (date/datetime string or epoch ns) -> epoch ns, or None."""
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    return int(stamp.as_unit("ns").value)
+
+
+hub = LiveHub(poll_seconds=float(os.environ["LIVE_POLL_SECONDS"]) if os.environ.get("LIVE_POLL_SECONDS") else None)
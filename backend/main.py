@@ -1,7 +1,10 @@
 import os
+import time
+import asyncio
 import shutil
 import tempfile
 import certifi
+from datetime import datetime
 
 # === SSL CERTIFICATE FIX FOR WINDOWS & NON-ASCII PATHS ===
 # The path to certifi's cacert.pem might contain non-ASCII characters (e.g., "Programación"),
@@ -27,21 +30,34 @@ except Exception as e:
     print(f"⚠️ SSL Cert fix failed: {e}")
 # ========================================================
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from typing import List, Dict
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-import yfinance as yf
+import numpy as np
 import pandas as pd
-import json
-from deep_translator import GoogleTranslator
-from analysis import (
-    calculate_advanced_indicators, 
-    calculate_seasonality, 
-    calculate_distribution, 
-    calculate_drawdowns, 
-    calculate_ratios,
-    calculate_statistics
-)
+from price_store import load_histories
+import benchmark_cache
+from pipeline import run_stage, run_analytics, get_process_pool, ANALYTICS_PROCESSES
+import batch
+import encoding
+from downsample import METHODS as DOWNSAMPLE_METHODS
+from ticker_context import TickerContext, parse_sections, needs_history
+import http_cache
+import singleflight
+import symbol_search
+import metrics
+import range_stats
+import scheduler
+import frame_cache
+import risk_engine
+import backtest
+import panel
+import live
+from analysis import AnalysisContext
+from singleflight import response_flight, compressed_flight
 
 app = FastAPI(
     title="Financial Analyzer API",
@@ -57,8 +73,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
 
+@app.on_event("startup")
+async def start_scheduler():
+    if scheduler.ENABLED:
+        scheduler.scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.scheduler.stop()
+    await live.hub.close()
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """Times the request and reports its stages in a Server-Timing header."""
+    timings = []
+    metrics.request_timings.set(timings)
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    metrics.REQUEST_SECONDS.observe(
+        elapsed, route=getattr(route, "path", "unmatched"), status=response.status_code
+    )
+    response.headers["Server-Timing"] = metrics.server_timing(timings, total=elapsed)
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
 @app.get("/")
 async def root():
     return {"message": "Financial Analyzer API v2 is running"}
@@ -66,121 +110,453 @@ async def root():
 @app.get("/api/search")
 def search_ticker(q: str = Query(..., min_length=1)):
     """
-    Search for tickers using Yahoo Finance.
+    Search for tickers: cached results, then the local symbol index, then
+    Yahoo Finance over a pooled session (see symbol_search).
     """
-    try:
-        import requests
-        url = f"https://query2.finance.yahoo.com/v1/finance/search?q={q}"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=5)
-        data = response.json()
-        
-        results = []
-        if 'quotes' in data:
-            for quote in data['quotes']:
-                results.append({
-                    "symbol": quote.get('symbol'),
-                    "shortname": quote.get('shortname', quote.get('longname')),
-                    "type": quote.get('quoteType'),
-                    "exchange": quote.get('exchange')
-                })
-        return results
-    except Exception as e:
-        print(f"Search error: {e}")
-        return []
+    return symbol_search.search(q)
 
 @app.get("/api/ticker/{symbol}")
-def get_ticker_data(
+async def get_ticker_data(
+    request: Request,
     symbol: str, 
     period: str = "max", 
     interval: str = "1d",
     start_date: str = None,  # ← NUEVO: Fecha de inicio en formato YYYY-MM-DD
-    end_date: str = None     # ← NUEVO: Fecha de fin en formato YYYY-MM-DD
+    end_date: str = None,    # ← NUEVO: Fecha de fin en formato YYYY-MM-DD
+    format: str = None,      # json (default) | columnar | arrow | f32, or via Accept header
+    max_points: int = Query(None, ge=10),  # Downsample chart/drawdown series to ~this many points
+    downsample: str = "lttb",               # lttb | minmax
+    view_start: str = None,  # Visible window kept at full resolution (YYYY-MM-DD)
+    view_end: str = None,
+    sections: str = None     # Comma-separated subset of: chart, technical, stats, info, ratios, seasonality, distribution, drawdowns
 ):
+    fmt = encoding.negotiate(format, request.headers.get("accept"))
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"downsample must be one of: {', '.join(DOWNSAMPLE_METHODS)}")
+    view_start, view_end = _parse_date(view_start, "view_start"), _parse_date(view_end, "view_end")
+    requested = parse_sections(sections)
+    request_key = (symbol, period, interval, start_date, end_date, fmt, max_points, downsample,
+                   view_start, view_end, tuple(requested))
+    coding = http_cache.choose_encoding(request.headers.get("accept-encoding"))
+    # Hot requests precomputed in the background are answered straight from memory
+    precomputed = scheduler.lookup(request_key, coding)
+    if precomputed is not None:
+        scheduler.record(request_key)
+        response, etag, modified = precomputed
+        if http_cache.is_not_modified(request.headers, etag, modified):
+            return http_cache.not_modified_response(etag, modified, interval)
+        return response
     try:
-        # Fetch Data
-        ticker = yf.Ticker(symbol)
-        
-        # CAMBIO: Descargar con fechas específicas si se proporcionan
-        if start_date and end_date:
-            history = ticker.history(start=start_date, end=end_date, interval=interval)
-        else:
-            history = ticker.history(period=period, interval=interval)
-        
-        if history.empty:
-            raise HTTPException(status_code=404, detail="No data found for symbol")
-            
-        # Basic Info & Translation
-        info = ticker.info
-        summary_en = info.get('longBusinessSummary') or info.get('description') or "No summary available."
-        
-        try:
-            summary_es = GoogleTranslator(source='auto', target='es').translate(summary_en)
-        except Exception as e:
-            print(f"Translation failed: {e}")
-            summary_es = summary_en # Fallback
-
-        info['longBusinessSummary_es'] = summary_es
-        
-        # 1. Advanced Indicators (TA)
-        # We use the full history for calculation accuracy, but might chop it for the chart if too big?
-        # For now, let's keep it simple. If period is 'max', calculations are robust.
-        # We'll calculate indicators on the full dataset.
-        df_indicators, technical_indicators = calculate_advanced_indicators(history)
-        
-        # 2. Seasonality - CAMBIO: Pasar fechas a la función
-        seasonality = calculate_seasonality(
-            history, 
-            ticker=symbol,
-            start_date=start_date,  # ← NUEVO
-            end_date=end_date        # ← NUEVO
+        # Only what the requested sections need is fetched/computed, concurrently;
+        # each finished section is cached on its own (see ticker_context)
+        context = TickerContext(
+            symbol,
+            period=period,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            max_points=max_points,
+            downsample=downsample,
+            view_start=view_start,
+            view_end=view_end
         )
+        # Validators come from the last bar, so a revalidation is answered before any analysis runs
+        etag = modified = None
+        if needs_history(requested):
+            context.prefetch(requested)
+            try:
+                history = await context.history()
+            except BaseException:
+                context.cancel()
+                raise
+            etag = http_cache.history_etag(
+                history, symbol, period, interval, start_date, end_date, fmt,
+                max_points, downsample, view_start, view_end, ",".join(requested)
+            )
+            modified = http_cache.last_modified(history)
+            if http_cache.is_not_modified(request.headers, etag, modified):
+                context.cancel()
+                scheduler.record(request_key)
+                return http_cache.not_modified_response(etag, modified, interval)
+
+        async def build_response():
+            payload, chart = await context.build(requested)
+            # The chart is encoded straight from the indicator frame (no to_json -> loads -> re-encode)
+            response = await run_analytics("encode", encoding.render, payload, chart, fmt)
+            # A degraded body must not be revalidated under the history ETag until the next bar
+            return response, bool(context.degraded)
+
+        # Identical concurrent requests share one build, and each compressed variant of it,
+        # for a few seconds after it finishes
+        key = request_key + (etag,)
+
+        async def compressed_response():
+            response, degraded = await response_flight.run(key, build_response)
+            return await run_analytics(
+                "compress", http_cache.finalize, response, etag, modified, interval, coding, not degraded
+            )
+
+        response = await compressed_flight.run(key + (coding,), compressed_response)
+        # Only requests that succeeded count for the learned watchlist (no unknown symbols or failures)
+        scheduler.record(request_key)
+        if etag is None and "etag" in response.headers and http_cache.is_not_modified(request.headers, response.headers["etag"]):
+            return http_cache.not_modified_response(response.headers["etag"], modified, interval)
+        return response
         
-        # 3. Distribution & Drawdowns
-        distribution = calculate_distribution(history)
-        drawdowns = calculate_drawdowns(history)
-        
-        # 4. Ratios (Fundamentals)
-        ratios = calculate_ratios(info)
-        
-        # 5. Basic Stats (for top cards)
-        # Recalculate basic stats on specific periods if user changes it in frontend? 
-        # For now, let's calc stats on the last 1 year for the "Overview" cards or pass the full history stats.
-        # Let's trust the 'period' param handled by frontend for the MAIN chart, 
-        # but for advanced stats we might want to ensure we have enough data.
-        # The endpoint defaults to 'max' to serve all tabs.
-        stats_card = calculate_statistics(history.tail(252)) # Last year for the "Current" stats card
-        
-        # Prepare Chart Data (optimize size if needed, but sending full 'max' might be heavy)
-        # If period is 'max', finding the start date.
-        # Recommendation: The frontend should request specific periods for the CHART.
-        # But this endpoint is doing EVERYTHING.
-        # Optimization: Return only last 5 years for chart if max is huge, or let frontend slice.
-        # We will return the DataFrame as JSON.
-        
-        df_indicators.reset_index(inplace=True)
-        df_indicators['Date'] = df_indicators['Date'].dt.strftime('%Y-%m-%d')
-        chart_data = json.loads(df_indicators.to_json(orient="records"))
-        
-        return {
-            "symbol": symbol,
-            "info": info,
-            "stats": stats_card,
-            "chart_data": chart_data,
-            "analysis": {
-                "technical": technical_indicators,
-                "seasonality": seasonality,
-                "distribution": distribution,
-                "drawdowns": drawdowns,
-                "ratios": ratios
-            }
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         print(f"Error fetching data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_date(value, name):
+    """YYYY-MM-DD query value (None if empty); anything else is a 400."""
+    if not value:
+        return None
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a date as YYYY-MM-DD, got '{value}'")
+    return value
+
+async def _range_index(symbol, interval):
+    """RangeIndex over the symbol's full stored history (rebuilt only when a bar changes)."""
+    history = await TickerContext(symbol, period="max", interval=interval).history()
+    return await run_analytics("range_index", range_stats.get_index, symbol, interval, history)
+
+@app.get("/api/ticker/{symbol}/range_stats")
+async def get_range_stats(
+    symbol: str,
+    interval: str = "1d",
+    start_date: str = None,  # YYYY-MM-DD, inclusive
+    end_date: str = None,    # YYYY-MM-DD, exclusive
+    ranges: str = None       # Bulk: "2020-01-01:2021-01-01,2021-01-01:2022-01-01"
+):
+    """
+    Total return, volatility, Sharpe and max drawdown for any date range,
+    answered in O(1) from a precomputed index (see range_stats).
+    """
+    # Dates are checked before the history is loaded
+    if ranges:
+        bounds = []
+        for part in ranges.split(","):
+            start, _, end = part.strip().partition(":")
+            bounds.append((_parse_date(start, "ranges start"), _parse_date(end, "ranges end")))
+    else:
+        start_date, end_date = _parse_date(start_date, "start_date"), _parse_date(end_date, "end_date")
+
+    index = await _range_index(symbol, interval)
+    if ranges:
+        result = [index.range(start, end) for start, end in bounds]
+        return encoding.clean({"symbol": symbol, "interval": interval, "ranges": result})
+    return encoding.clean({"symbol": symbol, "interval": interval, "range": index.range(start_date, end_date)})
+
+@app.get("/api/ticker/{symbol}/range_stats/yearly")
+async def get_yearly_stats(symbol: str, interval: str = "1d"):
+    """Range statistics for every calendar year."""
+    index = await _range_index(symbol, interval)
+    return encoding.clean({"symbol": symbol, "interval": interval, "years": index.calendar_years()})
+
+@app.get("/api/ticker/{symbol}/range_stats/rolling")
+async def get_rolling_stats(
+    symbol: str,
+    interval: str = "1d",
+    window: int = Query(252, ge=2),  # Returns per window (bars)
+    step: int = Query(21, ge=1)      # Bars between consecutive windows
+):
+    """Range statistics over rolling windows (the latest window always included)."""
+    index = await _range_index(symbol, interval)
+    return encoding.clean({
+        "symbol": symbol, "interval": interval, "window": window, "step": step,
+        "rows": index.rolling(window, step)
+    })
+
+@app.get("/api/ticker/{symbol}/risk")
+async def get_risk(
+    symbol: str,
+    period: str = "max",
+    interval: str = "1d",
+    method: str = "bootstrap",  # bootstrap | parametric
+    paths: int = Query(risk_engine.DEFAULT_PATHS, ge=100, le=risk_engine.MAX_PATHS),
+    horizons: str = None,       # Bars, comma-separated (default 1,5,10,21,63,252)
+    block: int = Query(None, ge=1, le=250),  # Bootstrap block length (default ~ n^(1/3))
+    resamples: int = Query(risk_engine.DEFAULT_RESAMPLES, ge=100, le=20000),  # For the Sharpe/Sortino CIs
+    seed: int = Query(None, ge=0)  # Same seed -> same numbers
+):
+    """
+    Monte Carlo risk: VaR/CVaR at several horizons, max drawdown
+    distribution and Sharpe/Sortino confidence intervals (see risk_engine).
+    """
+    if method not in risk_engine.METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(risk_engine.METHODS)}")
+    try:
+        days = [int(h) for h in horizons.split(",") if h.strip()] if horizons else list(risk_engine.DEFAULT_HORIZONS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="horizons must be comma-separated integers")
+    if not days or any(h < 1 or h > risk_engine.MAX_HORIZON for h in days):
+        raise HTTPException(status_code=400, detail=f"horizons must be between 1 and {risk_engine.MAX_HORIZON}")
+
+    history = await TickerContext(symbol, period=period, interval=interval).history()
+    try:
+        result = await risk_engine.simulate(
+            AnalysisContext(history).returns.to_numpy(),
+            method=method, paths=paths, horizons=days, block=block, resamples=resamples, seed=seed,
+            periods_per_year=range_stats.PERIODS_PER_YEAR.get(interval, 252),
+            pool=get_process_pool()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return encoding.clean({"symbol": symbol, "period": period, "interval": interval, **result})
+
+class BacktestRequest(BaseModel):
+    strategy: str = "rsi"  # rsi | macd | bollinger | stoch
+    grid: Dict[str, List[float]] = {}  # Parameter -> values to sweep (missing: dashboard defaults)
+    period: str = "max"
+    interval: str = "1d"
+    cost_bps: float = 0.0  # Per unit of turnover (entry or exit)
+    sort: str = "sharpe"  # Metric to rank the cells by (descending)
+    top: int = 50  # Best cells returned (0: all)
+
+@app.post("/api/ticker/{symbol}/backtest")
+async def run_backtest(symbol: str, request: BacktestRequest):
+    """
+    Backtests an indicator strategy for every cell of a parameter grid at once.
+    Returns the best cells as a compact table: {"columns": [...params, ...metrics], "rows": [...]}.
+    """
+    if request.sort not in backtest.METRIC_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(backtest.METRIC_COLUMNS)}")
+    if request.top < 0 or request.cost_bps < 0:
+        raise HTTPException(status_code=400, detail="top and cost_bps must not be negative")
+
+    history = await TickerContext(symbol, period=request.period, interval=request.interval).history()
+    try:
+        result = await backtest.run(
+            history, request.strategy, request.grid, cost_bps=request.cost_bps,
+            periods_per_year=range_stats.PERIODS_PER_YEAR.get(request.interval, 252),
+            pool=get_process_pool()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    params, values = result.pop("params"), result.pop("metrics")
+    ranking = np.nan_to_num(values[request.sort], nan=-np.inf)
+    order = np.argsort(-ranking, kind="stable")[:request.top or None]
+    columns = [*params, *backtest.METRIC_COLUMNS]
+    table = np.column_stack([*params.values(), *values.values()])[order]
+    return encoding.clean({
+        "symbol": symbol, "period": request.period, "interval": request.interval, **result,
+        "columns": columns, "rows": table.tolist(),
+    })
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: stage/request histograms, cache and upstream error counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/stats/scheduler")
+async def scheduler_stats():
+    """Precompute scheduler: watchlist size, stored payloads and run counters."""
+    return scheduler.scheduler.stats()
+
+@app.get("/api/stats/frame_cache")
+async def frame_cache_stats():
+    """Budgeted caches (frames, sections, range indexes): occupancy, hits and evictions, plus the shared budget."""
+    return {**frame_cache.stats(), "budget": frame_cache.budget.stats()}
+
+@app.get("/api/stats/panel")
+async def panel_stats():
+    """Aligned return panels: size, memory and incremental update counters."""
+    return panel.stats()
+
+@app.get("/api/stats/live")
+async def live_stats():
+    """Live channels: subscribers, polls and pushes per symbol/interval."""
+    return live.hub.stats()
+
+@app.get("/api/stats/coalescing")
+async def coalescing_stats():
+    """Single-flight counters: how many requests shared an in-flight or recent result."""
+    return singleflight.stats()
+
+class BatchRequest(BaseModel):
+    symbols: List[str]
+    metrics: List[str] = batch.DEFAULT_METRICS
+    period: str = "1y"
+    interval: str = "1d"
+
+@app.post("/api/batch")
+async def batch_analytics(request: BatchRequest):
+    """
+    Screen-style metrics for many symbols in one call.
+    Returns a compact table: {"columns": [...], "rows": [[symbol, ...metrics, error], ...]}.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in request.symbols if s.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(symbols) > batch.MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {batch.MAX_SYMBOLS} symbols per batch")
+    unknown = [m for m in request.metrics if m not in batch.METRICS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown metrics: {', '.join(unknown)}. Available: {', '.join(batch.METRICS)}"
+        )
+
+    try:
+        histories, errors = await run_stage(
+            "history", load_histories, symbols,
+            interval=request.interval, period=request.period,
+            timeout=max(60.0, len(symbols) * 0.5)
+        )
+
+        benchmarks = None
+        if "beta" in request.metrics:
+            await run_stage("benchmarks", benchmark_cache.refresh, ["SPY"], default=None)
+            benchmarks = benchmark_cache.benchmark_returns(symbols=["SPY"])
+
+        by_symbol = await batch.run_batch(
+            histories, errors, request.metrics,
+            pool=get_process_pool(), workers=ANALYTICS_PROCESSES, benchmarks=benchmarks
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"Error in batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "columns": ["symbol", *request.metrics, "error"],
+        "rows": [by_symbol[symbol] for symbol in symbols]
+    }
+
+class PanelRequest(BaseModel):
+    symbols: List[str]
+    interval: str = "1d"
+    lookback: int = None  # Last N dates of the aligned calendar (default: full history)
+
+class RollingCorrelationRequest(PanelRequest):
+    target: str
+    window: int = 63
+    step: int = 1  # Keep every step-th point (the latest always included)
+
+class PortfolioRequest(BaseModel):
+    weights: Dict[str, float]
+    interval: str = "1d"
+    lookback: int = None
+
+async def _load_panel(symbols, interval, lookback=None):
+    """Loads/refreshes the symbols' histories and syncs them into the interval's panel."""
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(symbols) > batch.MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {batch.MAX_SYMBOLS} symbols per request")
+    if lookback is not None and lookback < 2:
+        raise HTTPException(status_code=400, detail="lookback must be at least 2")
+
+    histories, errors = await run_stage(
+        "history", load_histories, symbols,
+        interval=interval, period="max", timeout=max(60.0, len(symbols) * 0.5)
+    )
+    data = panel.get_panel(interval)
+    outcomes = await run_analytics("panel", data.sync, histories)
+    for symbol, outcome in outcomes.items():
+        if outcome == "skipped":
+            errors[symbol] = "Panel is full (PANEL_MAX_SYMBOLS)"
+    return data, [s for s in symbols if s not in errors], errors
+
+@app.post("/api/panel/correlation")
+async def panel_correlation(request: PanelRequest):
+    """
+    Pairwise-complete correlation and (annualized) covariance matrices of
+    daily returns, from the date-aligned panel (see panel.py).
+    """
+    data, symbols, errors = await _load_panel(request.symbols, request.interval, request.lookback)
+    cov, corr, observations = await run_analytics("correlation", data.matrices, symbols, request.lookback)
+    periods = range_stats.PERIODS_PER_YEAR.get(request.interval, 252)
+    return encoding.clean({
+        "symbols": symbols,
+        "correlation": corr.tolist(),
+        "covariance": (cov * periods).tolist(),
+        "observations": observations.tolist(),
+        "errors": errors,
+    })
+
+@app.post("/api/panel/rolling_correlation")
+async def panel_rolling_correlation(request: RollingCorrelationRequest):
+    """Trailing-window correlation of `target` with every other symbol."""
+    if request.window < 3:
+        raise HTTPException(status_code=400, detail="window must be at least 3")
+    target = request.target.strip().upper()
+    data, symbols, errors = await _load_panel([target, *request.symbols], request.interval)
+    if target not in symbols:
+        raise HTTPException(status_code=404, detail=f"No data found for {target}: {errors.get(target)}")
+    others = [s for s in symbols if s != target]
+    dates, values = await run_analytics("rolling_correlation", data.rolling_correlation, target, others, request.window)
+    keep = np.arange(len(dates) - 1, -1, -max(request.step, 1))[::-1]
+    return encoding.clean({
+        "target": target,
+        "window": request.window,
+        "dates": list(pd.to_datetime(dates[keep]).strftime('%Y-%m-%d')),
+        "series": {symbol: values[keep, i].tolist() for i, symbol in enumerate(others)},
+        "errors": errors,
+    })
+
+@app.post("/api/panel/portfolio")
+async def panel_portfolio(request: PortfolioRequest):
+    """Annualized volatility of a weighted portfolio and each position's share of its variance."""
+    weights = {}
+    for symbol, weight in request.weights.items():
+        symbol = symbol.strip().upper()
+        weights[symbol] = weights.get(symbol, 0.0) + weight
+    data, symbols, errors = await _load_panel(list(weights), request.interval, request.lookback)
+    if errors:
+        raise HTTPException(status_code=404, detail={"errors": errors})
+    result = await run_analytics(
+        "portfolio", data.portfolio, {s: weights[s] for s in symbols}, request.lookback,
+        range_stats.PERIODS_PER_YEAR.get(request.interval, 252)
+    )
+    return encoding.clean(result)
+
+@app.websocket("/api/ws/ticker/{symbol}")
+async def live_ticker(websocket: WebSocket, symbol: str, interval: str = "1d", since: str = None):
+    """
+    Live bars for a symbol: a snapshot, then only new/revised bars with their
+    indicator values and the latest technical summary. `since` (the client's
+    last Date) replays the bars it missed, as far as the replay buffer goes.
+    """
+    await websocket.accept()
+    try:
+        since = live.parse_since(since)
+    except ValueError:
+        await websocket.send_text(encoding.dumps({"type": "error", "detail": "Invalid 'since'"}))
+        await websocket.close(code=1008)
+        return
+
+    channel, queue = live.hub.subscribe(symbol.upper(), interval, since)
+
+    async def pump():
+        while (text := await queue.get()) is not None:
+            await websocket.send_text(text)
+        await websocket.close(code=1011)
+
+    async def drain():
+        # Nothing is expected from the client; this only notices the disconnect
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        live.hub.unsubscribe(channel, queue)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
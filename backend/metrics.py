@@ -0,0 +1,154 @@
+"""
+Lightweight instrumentation: stage timings, cache hit/miss and upstream
+error counters, exported in Prometheus text format on /metrics.
+
+Every pipeline stage (history, info, translation, benchmarks and each
+calculate_* run through run_analytics) is timed by `pipeline.run_stage`.
+The timings of the current request are also collected in a context
+variable and returned to the client as a `Server-Timing` header, so a slow
+response shows where its time went.
+"""
+import math
+import threading
+import contextvars
+
+# Seconds; upper bounds of the histogram buckets (+Inf is implicit)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_collectors = []
+
+# [(name, seconds), ...] of the request being served, or None outside a request
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, {'le': _number(bound)})} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, {'le': '+Inf'})} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+def register_collector(fn):
+    """`fn()` returns extra exposition lines (for stats kept elsewhere), rendered on every scrape."""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = Histogram("finanalyzer_request_seconds", "HTTP request latency.", ["route", "status"])
+STAGE_SECONDS = Histogram("finanalyzer_stage_seconds", "Latency of each request stage / analysis function.", ["stage"])
+STAGE_FAILURES = Counter(
+    "finanalyzer_stage_failures_total", "Stages that failed or timed out (degraded or raised).", ["stage", "reason"]
+)
+CACHE_REQUESTS = Counter("finanalyzer_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+UPSTREAM_ERRORS = Counter("finanalyzer_upstream_errors_total", "Errors from upstream services.", ["source"])
+
+
+def observe_stage(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def cache_hit(cache):
+    CACHE_REQUESTS.inc(cache=cache, result="hit")
+
+
+def cache_miss(cache):
+    CACHE_REQUESTS.inc(cache=cache, result="miss")
+
+
+def upstream_error(source):
+    UPSTREAM_ERRORS.inc(source=source)
+
+
+def server_timing(timings, total=None):
+    """Server-Timing header value; repeated stages are summed."""
+    merged = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
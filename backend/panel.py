@@ -0,0 +1,336 @@
+"""
+Date-aligned multi-symbol return panel: correlation, covariance, rolling
+correlation and portfolio volatility.
+
+All symbols of an interval live in one T x N float64 array of returns on
+the union of their dates (NaN where a symbol has no bar). A symbol's return
+on a date is measured from its previous bar, so holidays on one exchange
+don't create fake zero returns for it.
+
+Correlation and covariance are pairwise-complete: each pair uses the dates
+where both have a return. They come from four N x N sufficient statistics
+(counts, sums, sums of squares, cross products), each one matrix product
+of the masked panel, so the heavy lifting is BLAS. The statistics of the
+full history are kept up to date incrementally: when a symbol gets a new or
+revised bar only the affected rows are subtracted and added back (rank-k
+updates), and a new symbol only adds its own row/column. Nothing is rebuilt
+unless a symbol's whole history changed (e.g. re-adjusted after a dividend).
+"""
+import os
+import threading
+import numpy as np
+
+MAX_COLUMNS = int(os.environ.get("PANEL_MAX_SYMBOLS", "2000"))
+# Rewrite instead of patching when a change touches more than this share of the rows
+REBUILD_FRACTION = 0.25
+# New symbols in one sync above which the statistics are recomputed once instead of grown per column
+BULK_ADD = 4
+
+_DAILY_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+
+class MomentStats:
+    """Pairwise-complete sufficient statistics of a returns matrix with NaNs."""
+
+    def __init__(self, n_cols=0):
+        self.n = np.zeros((n_cols, n_cols))   # rows where both i and j have a value
+        self.s = np.zeros((n_cols, n_cols))   # sum of x_i over those rows
+        self.ss = np.zeros((n_cols, n_cols))  # sum of x_i ** 2 over those rows
+        self.p = np.zeros((n_cols, n_cols))   # sum of x_i * x_j
+
+    @classmethod
+    def of(cls, rows):
+        stats = cls(rows.shape[1])
+        stats.add(rows)
+        return stats
+
+    @staticmethod
+    def _masked(rows):
+        mask = np.isfinite(rows)
+        return mask.astype(np.float64), np.where(mask, rows, 0.0)
+
+    def add(self, rows, sign=1.0):
+        """Adds (sign=1) or removes (sign=-1) the contribution of a block of rows."""
+        if not len(rows):
+            return
+        m, x = self._masked(rows)
+        x2 = x * x
+        for acc, term in ((self.n, m.T @ m), (self.s, x.T @ m), (self.ss, x2.T @ m), (self.p, x.T @ x)):
+            if sign > 0:
+                acc += term
+            else:
+                acc -= term
+
+    def remove(self, rows):
+        self.add(rows, sign=-1.0)
+
+    def add_column(self, rows):
+        """Grows the statistics by the last column of `rows` (every row, all columns)."""
+        m, x = self._masked(rows)
+        mk, xk = m[:, -1], x[:, -1]
+        k = rows.shape[1] - 1
+        for name in ("n", "s", "ss", "p"):
+            grown = np.zeros((k + 1, k + 1))
+            grown[:k, :k] = getattr(self, name)
+            setattr(self, name, grown)
+        self.n[:, k] = self.n[k, :] = m.T @ mk
+        self.s[:, k] = x.T @ mk
+        self.s[k, :] = m.T @ xk
+        self.ss[:, k] = (x * x).T @ mk
+        self.ss[k, :] = m.T @ (xk * xk)
+        self.p[:, k] = self.p[k, :] = x.T @ xk
+
+    def moments(self, idx=None):
+        """(covariance, correlation, observations) for the columns `idx`."""
+        if idx is not None:
+            sel = np.ix_(idx, idx)
+            n, s, ss, p = self.n[sel], self.s[sel], self.ss[sel], self.p[sel]
+        else:
+            n, s, ss, p = self.n, self.s, self.ss, self.p
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (p - s * s.T / n) / (n - 1)
+            # Variance of i over the rows it shares with j
+            var = np.maximum(ss - s * s / n, 0.0) / (n - 1)
+            corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+        enough = n >= 2
+        cov = np.where(enough, cov, np.nan)
+        corr = np.where(enough, corr, np.nan)
+        return cov, corr, n.astype(np.int64)
+
+
+def _align_dates(index, interval):
+    """int64 keys to align bars on: calendar day for daily+ bars, the exact instant intraday."""
+    if interval in _DAILY_INTERVALS:
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        index = index.normalize()
+    elif index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.as_unit("ns").asi8
+
+
+class Panel:
+    def __init__(self, interval="1d"):
+        self.interval = interval
+        self.symbols = []
+        self._col = {}
+        self.dates = np.empty(0, dtype=np.int64)
+        self._buffer = np.full((0, 0), np.nan)  # Spare capacity in both dimensions
+        self._series = {}  # symbol -> (dates, closes) it was last built from
+        self._fingerprints = {}  # symbol -> (bars, last timestamp, first close, last close) of its history
+        self.stats = MomentStats(0)
+        self._lock = threading.RLock()
+        self.rebuilds = 0
+        self.patched_rows = 0
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def returns(self):
+        """T x N view of the aligned returns."""
+        return self._buffer[:len(self.dates), :len(self.symbols)]
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _reserve(self, rows, cols):
+        cap_rows, cap_cols = self._buffer.shape
+        if rows <= cap_rows and cols <= cap_cols:
+            return
+        # Only the short dimension grows (geometrically, so appends stay amortized O(1))
+        rows = max(rows, cap_rows + cap_rows // 2, 256) if rows > cap_rows else cap_rows
+        cols = max(cols, cap_cols * 2, 8) if cols > cap_cols else cap_cols
+        grown = np.full((rows, cols), np.nan)
+        grown[:len(self.dates), :len(self.symbols)] = self.returns
+        self._buffer = grown
+
+    def _add_dates(self, new_dates):
+        """Adds rows for unseen dates. Existing columns are NaN there, so the statistics don't change."""
+        t, n = len(self.dates), len(self.symbols)
+        if not t or new_dates[0] > self.dates[-1]:
+            self._reserve(t + len(new_dates), n)
+            self.dates = np.concatenate([self.dates, new_dates])
+            return
+        dates = np.union1d(self.dates, new_dates)
+        grown = np.full((max(len(dates) + len(dates) // 2, 256), self._buffer.shape[1]), np.nan)
+        grown[np.searchsorted(dates, self.dates), :n] = self.returns
+        self.dates = dates
+        self._buffer = grown
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def set_series(self, symbol, dates, closes, update_stats=True):
+        """
+        Brings one symbol's column up to date with its close series.
+        Returns "unchanged", "added", "patched" or "rebuilt". With
+        update_stats=False a new column is only stored (the caller recomputes
+        the statistics).
+        """
+        keep = np.isfinite(closes) & (closes > 0)
+        dates, closes = dates[keep], closes[keep]
+        old = self._series.get(symbol)
+        if old is not None and len(old[0]) == len(dates) and np.array_equal(old[0], dates) \
+                and np.array_equal(old[1], closes):
+            return "unchanged"
+
+        missing = np.setdiff1d(dates, self.dates, assume_unique=True)
+        if len(missing):
+            self._add_dates(missing)
+        rows = np.searchsorted(self.dates, dates)
+        returns = closes[1:] / closes[:-1] - 1
+
+        if old is None:
+            col = len(self.symbols)
+            self._reserve(len(self.dates), col + 1)
+            self.symbols.append(symbol)
+            self._col[symbol] = col
+            self._buffer[:len(self.dates), col] = np.nan
+            self._buffer[rows[1:], col] = returns
+            if update_stats:
+                self.stats.add_column(self.returns)
+            self._series[symbol] = (dates, closes)
+            return "added"
+
+        col = self._col[symbol]
+        old_dates, old_closes = old
+        # First bar (date or value) that differs; returns change from there on
+        common = min(len(dates), len(old_dates))
+        differs = np.flatnonzero((dates[:common] != old_dates[:common]) | (closes[:common] != old_closes[:common]))
+        first = int(differs[0]) if len(differs) else common
+        first = max(first, 1)
+        affected = np.union1d(rows[first:], np.searchsorted(self.dates, old_dates[first:]))
+        self._series[symbol] = (dates, closes)
+
+        if len(affected) > REBUILD_FRACTION * len(self.dates):
+            self._buffer[:len(self.dates), col] = np.nan
+            self._buffer[rows[1:], col] = returns
+            self.stats = MomentStats.of(self.returns)
+            self.rebuilds += 1
+            return "rebuilt"
+
+        self.stats.remove(self.returns[affected])
+        self._buffer[affected, col] = np.nan
+        self._buffer[rows[first:], col] = returns[first - 1:]
+        self.stats.add(self.returns[affected])
+        self.patched_rows += len(affected)
+        return "patched"
+
+    def sync(self, histories):
+        """Updates every symbol from {symbol: history}; returns {symbol: outcome}."""
+        outcomes = {}
+        with self._lock:
+            bulk = sum(symbol not in self._col for symbol in histories) > BULK_ADD
+            for symbol, history in histories.items():
+                if symbol not in self._col and len(self.symbols) >= MAX_COLUMNS:
+                    outcomes[symbol] = "skipped"
+                    continue
+                close = history['Close']
+                fingerprint = (len(close), history.index[-1].value, float(close.iloc[0]), float(close.iloc[-1])) \
+                    if len(close) else (0,)
+                if self._fingerprints.get(symbol) == fingerprint:
+                    outcomes[symbol] = "unchanged"
+                    continue
+                self._fingerprints[symbol] = fingerprint
+                dates = _align_dates(history.index, self.interval)
+                closes = close.to_numpy(dtype=np.float64)
+                # Several bars on one aligned day (shouldn't happen for daily data): keep the last
+                last = np.append(dates[1:] != dates[:-1], True)
+                outcomes[symbol] = self.set_series(symbol, dates[last], closes[last], update_stats=not bulk)
+            if bulk:
+                # One BLAS pass over the whole panel beats growing it column by column
+                self.stats = MomentStats.of(self.returns)
+        return outcomes
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def columns(self, symbols):
+        return [self._col[s] for s in symbols]
+
+    def matrices(self, symbols, lookback=None):
+        """
+        (covariance, correlation, observations) of daily returns for
+        `symbols`, over the full history or the last `lookback` dates.
+        """
+        with self._lock:
+            idx = self.columns(symbols)
+            if lookback is None:
+                return self.stats.moments(idx)
+            rows = self.returns[-lookback:, idx].copy()
+        return MomentStats.of(rows).moments()
+
+    def rolling_correlation(self, target, symbols, window=63, min_periods=None):
+        """
+        Correlation of `target` with each symbol over a trailing window of
+        `window` dates. Returns (dates, T x len(symbols) array).
+        """
+        min_periods = min_periods or max(window // 2, 2)
+        with self._lock:
+            x = self.returns[:, self._col[target]].copy()[:, None]
+            y = self.returns[:, self.columns(symbols)].copy()
+            dates = self.dates.copy()
+        both = np.isfinite(x) & np.isfinite(y)
+        x = np.where(both, x, 0.0)
+        y = np.where(both, y, 0.0)
+
+        def windowed(values):
+            total = np.cumsum(values, axis=0)
+            total[window:] = total[window:] - total[:-window]
+            return total
+
+        n = windowed(both.astype(np.float64))
+        sx, sy = windowed(x), windowed(y)
+        sxx, syy, sxy = windowed(x * x), windowed(y * y), windowed(x * y)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sy / n
+            var_x = np.maximum(sxx - sx * sx / n, 0.0)
+            var_y = np.maximum(syy - sy * sy / n, 0.0)
+            corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+        return dates, np.where(n >= min_periods, corr, np.nan)
+
+    def portfolio(self, weights, lookback=None, periods_per_year=252):
+        """
+        Annualized volatility of a weighted portfolio (weights as given, not
+        normalized) and each position's share of the variance.
+        """
+        symbols = list(weights)
+        w = np.array([weights[s] for s in symbols], dtype=np.float64)
+        cov = self.matrices(symbols, lookback)[0]
+        cov = np.nan_to_num(cov)
+        marginal = cov @ w
+        variance = float(w @ marginal)
+        volatility = np.sqrt(max(variance, 0.0) * periods_per_year)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            contributions = w * marginal / variance if variance > 0 else np.full(len(w), np.nan)
+        return {
+            "volatility": float(volatility),
+            "contributions": dict(zip(symbols, contributions.tolist())),
+        }
+
+    def stats_summary(self):
+        return {
+            "interval": self.interval,
+            "symbols": len(self.symbols),
+            "dates": len(self.dates),
+            "bytes": int(self._buffer.nbytes + sum(a.nbytes for a in (self.stats.n, self.stats.s, self.stats.ss, self.stats.p))),
+            "rebuilds": self.rebuilds,
+            "patched_rows": self.patched_rows,
+        }
+
+
+_panels = {}
+_panels_lock = threading.Lock()
+
+
+def get_panel(interval):
+    with _panels_lock:
+        panel = _panels.get(interval)
+        if panel is None:
+            panel = _panels[interval] = Panel(interval)
+        return panel
+
+
+def stats():
+    return {interval: panel.stats_summary() for interval, panel in _panels.items()}
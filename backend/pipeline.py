@@ -0,0 +1,89 @@
+"""
+Helpers to run the stages of a ticker request concurrently.
+
+Network stages (history, info, translation, benchmarks) run on an I/O thread
+pool and pandas/NumPy analytics on a separate, CPU-sized worker pool, so the
+event loop never blocks. Every stage has its own timeout; optional stages
+return a default instead of failing the whole request. Every stage is timed
+(see metrics).
+"""
+import os
+import time
+import asyncio
+import functools
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import metrics
+
+STAGE_TIMEOUTS = {
+    "history": float(os.environ.get("STAGE_TIMEOUT_HISTORY", "30")),
+    "info": float(os.environ.get("STAGE_TIMEOUT_INFO", "15")),
+    "translation": float(os.environ.get("STAGE_TIMEOUT_TRANSLATION", "5")),
+    "benchmarks": float(os.environ.get("STAGE_TIMEOUT_BENCHMARKS", "20")),
+    "analytics": float(os.environ.get("STAGE_TIMEOUT_ANALYTICS", "60")),
+}
+
+ANALYTICS_WORKERS = int(os.environ.get("ANALYTICS_WORKERS", str(os.cpu_count() or 4)))
+
+io_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("IO_WORKERS", "32")),
+    thread_name_prefix="io"
+)
+# NumPy/pandas release the GIL in their heavy loops, so threads get real
+# parallelism here without pickling whole histories into other processes.
+analytics_pool = ThreadPoolExecutor(max_workers=ANALYTICS_WORKERS, thread_name_prefix="analytics")
+
+ANALYTICS_PROCESSES = int(os.environ.get("ANALYTICS_PROCESSES", str(os.cpu_count() or 4)))
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+_REQUIRED = object()
+
+
+def get_process_pool():
+    """
+    Process pool for fan-out work over many symbols (batch endpoints), where
+    per-symbol pandas work would otherwise serialize on the GIL. Created on
+    first use so the server doesn't spawn workers it never needs.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=ANALYTICS_PROCESSES)
+        return _process_pool
+
+
+async def run_stage(name, fn, *args, timeout=None, default=_REQUIRED, pool=None, **kwargs):
+    """
+    Runs `fn(*args, **kwargs)` on a worker pool with a timeout.
+
+    If `default` is given the stage is optional: any error or timeout is
+    logged and `default` is returned. Otherwise the exception propagates.
+    A timed-out call keeps running in its thread; only the wait is abandoned.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    if timeout is None:
+        timeout = STAGE_TIMEOUTS.get(name, STAGE_TIMEOUTS["analytics"])
+
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(pool or io_pool, call), timeout)
+    except Exception as e:
+        timed_out = isinstance(e, asyncio.TimeoutError)
+        metrics.STAGE_FAILURES.inc(stage=name, reason="timeout" if timed_out else "error")
+        if default is _REQUIRED:
+            raise
+        reason = "timed out" if timed_out else repr(e)
+        print(f"⚠️ Stage '{name}' degraded ({reason}), using fallback")
+        return default
+    finally:
+        # Wall time as the request sees it (includes waiting for a free worker)
+        metrics.observe_stage(name, time.perf_counter() - start)
+
+
+async def run_analytics(name, fn, *args, **kwargs):
+    """Runs a CPU-bound analysis function on the analytics pool."""
+    return await run_stage(name, fn, *args, timeout=STAGE_TIMEOUTS["analytics"], pool=analytics_pool, **kwargs)
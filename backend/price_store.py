@@ -0,0 +1,339 @@
+"""
+Persistent local OHLCV store.
+
+Each symbol/interval pair lives in a single structured NumPy file
+(`<SYMBOL>_<interval>.npy`) that is memory-mapped on read. A full
+`period="max"` download only happens the first time a symbol is seen; after
+that each request fetches the bars from the last stored one onwards and
+appends them.
+"""
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import yfinance as yf
+import metrics
+
+STORE_DIR = os.environ.get(
+    "PRICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices")
+)
+
+# Minimum seconds between two delta fetches of the same symbol/interval
+REFRESH_SECONDS = float(os.environ.get("PRICE_STORE_REFRESH_SECONDS", "60"))
+
+# Intervals whose full history Yahoo serves with period="max".
+# Intraday intervals only go back a few days/weeks, so they bypass the store.
+STORED_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+DTYPE = np.dtype([("ts", "<i8")] + [(c, "<f8") for c in COLUMNS])
+
+_PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(key):
+    with _locks_guard:
+        if key not in _locks:
+            _locks[key] = threading.Lock()
+        return _locks[key]
+
+
+def base_path(symbol, interval):
+    """Store path prefix for a symbol/interval (without extension)."""
+    safe = re.sub(r"[^A-Z0-9.\-^=]", "_", symbol.upper())
+    return os.path.join(STORE_DIR, f"{safe}_{interval}")
+
+
+def _paths(symbol, interval):
+    base = base_path(symbol, interval)
+    return base + ".npy", base + ".json"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _to_records(df):
+    """Converts a yfinance history frame into the structured on-disk layout."""
+    records = np.zeros(len(df), dtype=DTYPE)
+    index = df.index
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    records["ts"] = index.tz_convert("UTC").as_unit("ns").asi8
+    for col in COLUMNS:
+        if col in df.columns:
+            records[col] = df[col].to_numpy(dtype="float64", na_value=np.nan)
+    return records
+
+
+def _to_frame(records, tz):
+    index = pd.DatetimeIndex(pd.to_datetime(records["ts"], unit="ns", utc=True), name="Date")
+    if tz:
+        index = index.tz_convert(tz)
+    return pd.DataFrame({col: np.asarray(records[col]) for col in COLUMNS}, index=index)
+
+
+def _write_meta(meta_path, meta):
+    tmp_meta = meta_path + ".tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, meta_path)
+
+
+def _write(data_path, meta_path, records, meta):
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    tmp_path = data_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, records)
+    os.replace(tmp_path, data_path)
+    _write_meta(meta_path, meta)
+
+
+def read_stored(symbol, interval="1d"):
+    """
+    Returns the stored history for a symbol without touching the network,
+    or None if nothing has been stored yet.
+    """
+    data_path, meta_path = _paths(symbol, interval)
+    if not os.path.exists(data_path):
+        return None
+    records = np.load(data_path, mmap_mode="r")
+    return _to_frame(records, _read_meta(meta_path).get("tz"))
+
+
+def _tz_of(df):
+    return str(df.index.tz) if df.index.tz is not None else None
+
+
+def _last_day(stored, meta):
+    tz = meta.get("tz") or "UTC"
+    return pd.Timestamp(int(stored["ts"][-1]), unit="ns", tz="UTC").tz_convert(tz).strftime("%Y-%m-%d")
+
+
+def _apply_delta(symbol, interval, stored, meta, delta):
+    """
+    Merges a delta fetch into the stored records and persists the result.
+    Returns the updated frame, or None when the full history has to be
+    downloaded again.
+    """
+    data_path, meta_path = _paths(symbol, interval)
+    last_ts = int(stored["ts"][-1])
+
+    if delta.empty:
+        meta["updated"] = time.time()
+        _write_meta(meta_path, meta)
+        return _to_frame(stored, meta.get("tz"))
+
+    if delta.index.tz is None and meta.get("tz"):
+        # yf.download drops time zones; bars are stamped at local midnight
+        delta = delta.tz_localize(meta["tz"])
+
+    new_records = _to_records(delta)
+    new_records = new_records[new_records["ts"] >= last_ts]
+    # A new dividend or split re-adjusts the whole back-history,
+    # so appending would splice two different adjustment bases.
+    corporate_action = (
+        np.any(new_records["Dividends"][new_records["ts"] > last_ts] != 0)
+        or np.any(new_records["Stock Splits"][new_records["ts"] > last_ts] != 0)
+    )
+    if corporate_action:
+        print(f"📦 {symbol} ({interval}): corporate action detected, re-downloading full history")
+        return None
+
+    keep = stored[stored["ts"] < (new_records["ts"][0] if len(new_records) else last_ts + 1)]
+    merged = np.concatenate([keep, new_records])
+    meta["updated"] = time.time()
+    _write(data_path, meta_path, merged, meta)
+    print(f"📦 {symbol} ({interval}): {len(new_records)} bar(s) refreshed from delta fetch")
+    return _to_frame(merged, meta.get("tz"))
+
+
+def _refresh(symbol, interval, ticker, delta=None):
+    """
+    Brings the stored history up to date and returns it as a DataFrame.
+    `delta` may be supplied by a bulk download; otherwise it is fetched here.
+    """
+    data_path, meta_path = _paths(symbol, interval)
+    meta = _read_meta(meta_path)
+    exists = os.path.exists(data_path)
+
+    if delta is None and exists and time.time() - meta.get("updated", 0) < REFRESH_SECONDS:
+        metrics.cache_hit("price_store")
+        return _to_frame(np.load(data_path, mmap_mode="r"), meta.get("tz"))
+    metrics.cache_miss("price_store")
+
+    # Loaded without mmap: the file gets replaced below, which Windows
+    # refuses to do while a mapping is open.
+    stored = np.load(data_path) if exists else None
+
+    if stored is not None and len(stored) > 0:
+        if delta is None:
+            try:
+                delta = ticker.history(start=_last_day(stored, meta), interval=interval)
+            except Exception as e:
+                metrics.upstream_error("yahoo_history")
+                print(f"⚠️ Delta fetch failed for {symbol} ({interval}), serving stored data: {e}")
+                return _to_frame(stored, meta.get("tz"))
+
+        merged = _apply_delta(symbol, interval, stored, meta, delta)
+        if merged is not None:
+            return merged
+
+    try:
+        full = ticker.history(period="max", interval=interval)
+    except Exception:
+        metrics.upstream_error("yahoo_history")
+        raise
+    if full.empty:
+        return full
+
+    records = _to_records(full)
+    meta = {"tz": _tz_of(full), "updated": time.time()}
+    _write(data_path, meta_path, records, meta)
+    print(f"📦 {symbol} ({interval}): stored {len(records)} bars")
+    return _to_frame(records, meta["tz"])
+
+
+def slice_history(history, period="max", start_date=None, end_date=None):
+    """
+    Cuts a full stored history down to what Yahoo would have returned for
+    the same period or start/end range (end is exclusive, like Yahoo's).
+    """
+    if history.empty:
+        return history
+
+    tz = history.index.tz
+    if start_date and end_date:
+        start = pd.Timestamp(start_date, tz=tz)
+        end = pd.Timestamp(end_date, tz=tz)
+        return history[(history.index >= start) & (history.index < end)]
+
+    if period == "ytd":
+        now = pd.Timestamp.now(tz=tz)
+        return history[history.index >= pd.Timestamp(year=now.year, month=1, day=1, tz=tz)]
+
+    offset = _PERIOD_OFFSETS.get(period)
+    if offset is None:
+        return history
+
+    sliced = history[history.index >= pd.Timestamp.now(tz=tz) - offset]
+    # Over a weekend/holiday a short period can fall between bars;
+    # Yahoo still returns the latest session in that case.
+    return sliced if not sliced.empty else history.tail(1)
+
+
+def load_history(symbol, interval="1d", period="max", start_date=None, end_date=None, ticker=None):
+    """
+    Returns the OHLCV history for a symbol, served from the local store and
+    topped up with a delta fetch. Intraday intervals go straight to Yahoo.
+    """
+    ticker = ticker or yf.Ticker(symbol)
+
+    if interval not in STORED_INTERVALS:
+        if start_date and end_date:
+            return ticker.history(start=start_date, end=end_date, interval=interval)
+        return ticker.history(period=period, interval=interval)
+
+    data_path, _ = _paths(symbol, interval)
+    with _lock_for(data_path):
+        history = _refresh(symbol, interval, ticker)
+
+    return slice_history(history, period=period, start_date=start_date, end_date=end_date)
+
+
+def _ticker_frame(data, symbol):
+    """Extracts one symbol from a (possibly multi-ticker) yf.download frame."""
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return data.iloc[0:0]
+        data = data[symbol]
+    return data.dropna(subset=["Close"])
+
+
+def load_histories(symbols, interval="1d", period="max", start_date=None, end_date=None, max_workers=8):
+    """
+    Bulk version of load_history. Stored symbols that are due for a refresh
+    share a single yf.download call for their deltas; symbols seen for the
+    first time (or intraday intervals) are downloaded individually in parallel.
+
+    Returns ({symbol: history}, {symbol: error message}).
+    """
+    histories, errors = {}, {}
+    stale, individual = [], []
+
+    for symbol in symbols:
+        data_path, meta_path = _paths(symbol, interval)
+        if interval not in STORED_INTERVALS or not os.path.exists(data_path):
+            individual.append(symbol)
+        elif time.time() - _read_meta(meta_path).get("updated", 0) >= REFRESH_SECONDS:
+            stale.append(symbol)
+        else:
+            histories[symbol] = slice_history(read_stored(symbol, interval), period, start_date, end_date)
+
+    if stale:
+        starts = []
+        for symbol in stale:
+            data_path, meta_path = _paths(symbol, interval)
+            starts.append(_last_day(np.load(data_path, mmap_mode="r"), _read_meta(meta_path)))
+        try:
+            bulk = yf.download(
+                stale, start=min(starts), interval=interval, group_by="ticker",
+                auto_adjust=True, actions=True, progress=False, threads=True
+            )
+        except Exception as e:
+            metrics.upstream_error("yahoo_download")
+            print(f"⚠️ Bulk delta fetch failed, serving stored data: {e}")
+            bulk = None
+
+        for symbol in stale:
+            try:
+                if bulk is None:
+                    history = read_stored(symbol, interval)
+                else:
+                    data_path, _ = _paths(symbol, interval)
+                    with _lock_for(data_path):
+                        history = _refresh(symbol, interval, yf.Ticker(symbol), delta=_ticker_frame(bulk, symbol))
+                histories[symbol] = slice_history(history, period, start_date, end_date)
+            except Exception as e:
+                errors[symbol] = str(e)
+
+    if individual:
+        def fetch(symbol):
+            return load_history(symbol, interval=interval, period=period, start_date=start_date, end_date=end_date)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {symbol: pool.submit(fetch, symbol) for symbol in individual}
+            for symbol, future in futures.items():
+                try:
+                    histories[symbol] = future.result()
+                except Exception as e:
+                    errors[symbol] = str(e)
+
+    for symbol in list(histories):
+        if histories[symbol].empty:
+            del histories[symbol]
+            errors[symbol] = "No data found for symbol"
+
+    return histories, errors
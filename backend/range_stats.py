@@ -0,0 +1,226 @@
+"""
+O(1) statistics over arbitrary date ranges of one price series.
+
+A RangeIndex is built once per symbol/interval (and rebuilt when a new bar
+arrives) and then answers total return, annualized volatility, Sharpe and
+max drawdown for any (start, end) without rescanning the data:
+
+  * prefix sums of log returns and squared log returns give the mean and
+    variance of any range in constant time
+  * a disjoint sparse table over log prices stores (max, min, max drawdown)
+    for every block half, so any range is the combination of exactly two
+    precomputed entries. Drawdown isn't idempotent (overlapping halves
+    would double count), which is why the disjoint variant is used rather
+    than the classic overlapping one.
+
+Volatility and Sharpe use log returns with sample standard deviation, like
+calculate_statistics; max drawdown is measured from the range's own first
+bar, like the frontend's range selector.
+"""
+import os
+import numpy as np
+import pandas as pd
+from frame_cache import ObjectCache
+
+RISK_FREE_RATE = 0.04
+PERIODS_PER_YEAR = {"1d": 252, "5d": 52, "1wk": 52, "1mo": 12, "3mo": 4}
+MAX_INDEXES = int(os.environ.get("RANGE_INDEX_CACHE_SIZE", "64"))
+
+_MAX, _MIN, _DD = 0, 1, 2
+
+
+class RangeIndex:
+    def __init__(self, close, periods_per_year=252):
+        """
+        Args:
+            close: date-indexed Series of closes (NaNs are dropped)
+            periods_per_year: bars per year, for annualization
+        """
+        close = close.dropna()
+        close = close[close > 0]
+        self.index = close.index
+        self.periods_per_year = periods_per_year
+        self.n = len(close)
+
+        log_price = np.log(close.to_numpy(dtype=np.float64))
+        self.log_price = log_price
+        log_returns = np.diff(log_price)
+        # cum[k] = sum of the first k log returns, i.e. up to bar k
+        self.cum = np.concatenate([[0.0], np.cumsum(log_returns)])
+        self.cum_sq = np.concatenate([[0.0], np.cumsum(log_returns ** 2)])
+        self.table = _build_table(log_price)
+
+    @property
+    def nbytes(self):
+        """Memory held by the index (the sparse table dominates: 3 x levels x n floats)."""
+        arrays = (self.log_price, self.cum, self.cum_sq, self.table, self.index.asi8)
+        return sum(a.nbytes for a in arrays)
+
+    # ------------------------------------------------------------------
+    # Range queries (positions, inclusive)
+    # ------------------------------------------------------------------
+    def extremes(self, a, b):
+        """(max log price, min log price, max log drawdown) over bars a..b."""
+        a = np.asarray(a)
+        b = np.asarray(b)
+        level = _level(a, b)
+        left = self.table[:, level, a]
+        right = self.table[:, level, b]
+        # a == b (level 0) reads the same single-bar entry twice: max - min = 0
+        return (
+            np.maximum(left[_MAX], right[_MAX]),
+            np.minimum(left[_MIN], right[_MIN]),
+            np.maximum(np.maximum(left[_DD], right[_DD]), left[_MAX] - right[_MIN]),
+        )
+
+    def stats(self, a, b):
+        """
+        Statistics of bars a..b (scalars or equal-length arrays of positions).
+        Returns a dict of arrays (or floats for scalar input).
+        """
+        scalar = np.ndim(a) == 0 and np.ndim(b) == 0
+        a = np.atleast_1d(np.asarray(a, dtype=np.int64))
+        b = np.atleast_1d(np.asarray(b, dtype=np.int64))
+        m = (b - a).astype(np.float64)  # Number of returns
+
+        total_log = self.cum[b] - self.cum[a]
+        sum_sq = self.cum_sq[b] - self.cum_sq[a]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total_log / m
+            variance = np.maximum(sum_sq - m * mean ** 2, 0.0) / (m - 1)
+            volatility = np.sqrt(variance) * np.sqrt(self.periods_per_year)
+            annual_return = mean * self.periods_per_year
+            sharpe = np.where(volatility != 0, (annual_return - RISK_FREE_RATE) / volatility, 0.0)
+            cagr = np.expm1(total_log * self.periods_per_year / m)
+        max_dd_log = self.extremes(a, b)[_DD]
+
+        enough = m >= 2
+        result = {
+            "bars": (m + 1).astype(np.int64),
+            "total_return_pct": np.expm1(total_log) * 100,
+            "annualized_return_pct": np.where(m >= 1, cagr * 100, np.nan),
+            "annualized_volatility_pct": np.where(enough, volatility * 100, np.nan),
+            "sharpe_ratio": np.where(enough, sharpe, np.nan),
+            "max_drawdown_pct": np.expm1(-max_dd_log) * 100,
+        }
+        if scalar:
+            return {k: v[0].item() for k, v in result.items()}
+        return result
+
+    # ------------------------------------------------------------------
+    # Date helpers
+    # ------------------------------------------------------------------
+    def positions(self, start_date=None, end_date=None):
+        """Inclusive bar positions for [start_date, end_date) (end exclusive, like Yahoo)."""
+        tz = self.index.tz
+        a = self.index.searchsorted(pd.Timestamp(start_date, tz=tz)) if start_date else 0
+        b = (self.index.searchsorted(pd.Timestamp(end_date, tz=tz)) if end_date else self.n) - 1
+        return int(a), int(b)
+
+    def _dates(self, positions):
+        return list(self.index[positions].strftime('%Y-%m-%d'))
+
+    def range(self, start_date=None, end_date=None):
+        a, b = self.positions(start_date, end_date)
+        if self.n == 0 or b < a:
+            return None
+        return {"start": self._dates([a])[0], "end": self._dates([b])[0], **self.stats(a, b)}
+
+    def calendar_years(self):
+        """
+        One row per calendar year. Returns are measured from the previous
+        year's last close (or the first bar for the first year).
+        """
+        if self.n == 0:
+            return []
+        years = self.index.year.to_numpy()
+        last = np.flatnonzero(np.append(years[1:] != years[:-1], True))
+        first = np.concatenate([[0], last[:-1]])
+        return self._rows(first, last, labels=years[last].tolist(), label_key="year")
+
+    def rolling(self, window=252, step=21):
+        """Stats over every `window`-return window ending every `step` bars (latest window included)."""
+        if self.n <= window:
+            return []
+        ends = np.arange(self.n - 1, window - 1, -step)[::-1]
+        return self._rows(ends - window, ends)
+
+    def _rows(self, starts, ends, labels=None, label_key=None):
+        stats = self.stats(starts, ends)
+        start_dates, end_dates = self._dates(starts), self._dates(ends)
+        rows = []
+        for i in range(len(starts)):
+            row = {"start": start_dates[i], "end": end_dates[i]}
+            if labels is not None:
+                row = {label_key: labels[i], **row}
+            row.update({k: v[i].item() for k, v in stats.items()})
+            rows.append(row)
+        return rows
+
+
+def _level(a, b):
+    """Sparse-table level holding both a and b in different halves of one block."""
+    return np.frexp(np.bitwise_xor(a, b).astype(np.float64))[1]
+
+
+def _build_table(log_price):
+    """
+    table[agg, level, i] for agg in (max, min, drawdown). At level h the
+    positions are split in blocks of 2**h; left-half entries aggregate from i
+    to the block middle (suffix), right-half entries from the middle to i
+    (prefix). Level 0 holds single bars.
+    """
+    n = len(log_price)
+    levels = max(int(n - 1).bit_length(), 0) + 1
+    size = 1 << (levels - 1)
+    padded = np.full(max(size, 1), log_price[-1] if n else 0.0)
+    padded[:n] = log_price
+
+    table = np.empty((3, levels, len(padded)))
+    table[_MAX, 0] = padded
+    table[_MIN, 0] = padded
+    table[_DD, 0] = 0.0
+
+    for h in range(1, levels):
+        half = 1 << (h - 1)
+        blocks = padded.reshape(-1, 2, half)
+
+        # Left halves: aggregates of [i, mid) -> suffix scans (reverse the axis)
+        left = blocks[:, 0, ::-1]
+        suf_max = np.maximum.accumulate(left, axis=1)
+        suf_min = np.minimum.accumulate(left, axis=1)
+        # Best drop starting at or after i: max over s >= i of (p[s] - min p[s:])
+        suf_dd = np.maximum.accumulate(left - suf_min, axis=1)
+
+        # Right halves: aggregates of [mid, i] -> prefix scans
+        right = blocks[:, 1, :]
+        pre_max = np.maximum.accumulate(right, axis=1)
+        pre_min = np.minimum.accumulate(right, axis=1)
+        pre_dd = np.maximum.accumulate(pre_max - right, axis=1)
+
+        for agg, (suffix, prefix) in enumerate(((suf_max, pre_max), (suf_min, pre_min), (suf_dd, pre_dd))):
+            level = table[agg, h].reshape(-1, 2, half)
+            level[:, 0] = suffix[:, ::-1]
+            level[:, 1] = prefix
+    return table
+
+
+# (symbol, interval) -> (version, RangeIndex), within the per-worker cache budget (see frame_cache)
+_indexes = ObjectCache("range_indexes", MAX_INDEXES, size=lambda entry: entry[1].nbytes)
+
+
+def get_index(symbol, interval, history):
+    """
+    RangeIndex for a symbol's history, rebuilt only when the history changed
+    (new bar or revised last bar).
+    """
+    close = history['Close']
+    version = (len(close), close.index[-1].value, float(close.iloc[-1])) if len(close) else (0,)
+    key = (symbol, interval)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = RangeIndex(close, PERIODS_PER_YEAR.get(interval, 252))
+    _indexes.put(key, (version, index))
+    return index
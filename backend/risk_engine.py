@@ -0,0 +1,231 @@
+"""
+Monte Carlo / bootstrap risk simulation.
+
+Return paths are drawn from a symbol's historical daily returns, either
+    bootstrap   circular block bootstrap: blocks of consecutive returns, so
+                volatility clustering and short-term autocorrelation survive
+    parametric  Student-t matched to the sample mean, variance and excess
+                kurtosis (normal when the sample has none)
+and reduced to
+    * VaR / CVaR of the compounded return at several horizons
+    * the distribution of the max drawdown over the longest horizon
+    * confidence intervals for Sharpe and Sortino, from resampled series of
+      the history's own length (same formulas as calculate_drawdowns)
+
+Every chunk of paths is one batch of NumPy array operations, sized so a
+worker never holds more than about CHUNK_ELEMENTS returns at once, and the
+chunks are spread over the process pool. Each chunk gets its own child of
+one SeedSequence and chunk sizes don't depend on the number of workers, so
+a seed reproduces the same numbers on any machine/pool size.
+"""
+import os
+import math
+import time
+import asyncio
+import numpy as np
+from scipy import stats as scipy_stats
+import metrics
+
+RISK_FREE_RATE = 0.04  # Same as calculate_drawdowns / calculate_statistics
+METHODS = ("bootstrap", "parametric")
+DEFAULT_HORIZONS = (1, 5, 10, 21, 63, 252)
+VAR_LEVELS = (0.95, 0.99)
+CI_LEVEL = 0.95
+
+DEFAULT_PATHS = 20000
+MAX_PATHS = int(os.environ.get("MONTECARLO_MAX_PATHS", "200000"))
+MAX_HORIZON = int(os.environ.get("MONTECARLO_MAX_HORIZON", "2520"))
+DEFAULT_RESAMPLES = 2000
+# Simulated returns per chunk (float64): 2M = 16 MB per worker at a time
+CHUNK_ELEMENTS = int(os.environ.get("MONTECARLO_CHUNK_ELEMENTS", "2000000"))
+
+
+def default_block(n):
+    """Block length ~ n^(1/3), the usual rate for block bootstraps."""
+    return int(min(max(round(n ** (1 / 3)), 1), 50))
+
+
+def fit_parametric(returns):
+    """(mean, scale, degrees of freedom) of the Student-t matching the sample."""
+    mean = float(np.mean(returns))
+    std = float(np.std(returns, ddof=1))
+    excess_kurtosis = float(scipy_stats.kurtosis(returns))
+    if excess_kurtosis <= 0:
+        return mean, std, math.inf
+    df = 4 + 6 / excess_kurtosis  # Method of moments: kurtosis of t = 6 / (df - 4)
+    return mean, std * math.sqrt((df - 2) / df), df
+
+
+def _draw(rng, returns, method, params, rows, length):
+    """(rows, length) simulated returns."""
+    if method == "bootstrap":
+        n, block = len(returns), params
+        blocks = -(-length // block)
+        starts = rng.integers(0, n, size=(rows, blocks, 1))
+        idx = (starts + np.arange(block)) % n  # Circular: blocks may wrap past the last bar
+        return returns[idx.reshape(rows, blocks * block)[:, :length]]
+
+    mean, scale, df = params
+    if math.isinf(df):
+        draws = rng.standard_normal((rows, length))
+    else:
+        draws = rng.standard_t(df, (rows, length))
+    draws *= scale
+    draws += mean
+    # A fat-tailed draw below -100% isn't a return; floor it at a near-total loss
+    return np.maximum(draws, -0.999, out=draws)
+
+
+def simulate_paths(returns, method, params, rows, horizons, seed):
+    """
+    Process-pool entry point: `rows` paths of max(horizons) returns.
+    Returns (compounded return at each horizon (rows, len(horizons)),
+    max drawdown of each path (rows,)).
+    """
+    rng = np.random.default_rng(seed)
+    horizons = np.asarray(horizons)
+    log_wealth = np.log1p(_draw(rng, returns, method, params, rows, int(horizons.max())))
+    np.cumsum(log_wealth, axis=1, out=log_wealth)
+    horizon_returns = np.expm1(log_wealth[:, horizons - 1])
+    # Peak includes the starting wealth (log 1 = 0)
+    peak = np.maximum.accumulate(log_wealth, axis=1)
+    np.maximum(peak, 0.0, out=peak)
+    np.subtract(log_wealth, peak, out=log_wealth)
+    max_drawdown = np.expm1(log_wealth.min(axis=1))
+    return horizon_returns, max_drawdown
+
+
+def sharpe_sortino(sample, periods_per_year):
+    """Sharpe and Sortino of each row, as calculate_drawdowns computes them."""
+    annual_return = sample.mean(axis=1) * periods_per_year
+    volatility = sample.std(axis=1, ddof=1) * np.sqrt(periods_per_year)
+    negative = sample < 0
+    count = negative.sum(axis=1)
+    downside = np.where(negative, sample, 0.0)
+    s1 = downside.sum(axis=1)
+    s2 = np.einsum("ij,ij->i", downside, downside)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        downside_std = np.sqrt(np.maximum(s2 - s1 ** 2 / count, 0.0) / (count - 1)) * np.sqrt(periods_per_year)
+        sharpe = np.where(volatility != 0, (annual_return - RISK_FREE_RATE) / volatility, 0.0)
+        sortino = np.where((count > 1) & (downside_std != 0), annual_return / downside_std, 0.0)
+    return sharpe, sortino
+
+
+def simulate_ratios(returns, method, params, rows, periods_per_year, seed):
+    """Process-pool entry point: Sharpe/Sortino of `rows` resampled histories."""
+    rng = np.random.default_rng(seed)
+    return sharpe_sortino(_draw(rng, returns, method, params, rows, len(returns)), periods_per_year)
+
+
+def _chunk_sizes(total, per_chunk):
+    per_chunk = max(1, per_chunk)
+    return [min(per_chunk, total - start) for start in range(0, total, per_chunk)]
+
+
+def _tail(values, level):
+    """(VaR, CVaR): the (1 - level) quantile of the returns and the mean beyond it."""
+    var = float(np.quantile(values, 1 - level))
+    return var, float(values[values <= var].mean())
+
+
+def _interval(values, estimate):
+    values = values[np.isfinite(values)]
+    low, high = np.quantile(values, [(1 - CI_LEVEL) / 2, (1 + CI_LEVEL) / 2]) if len(values) else (np.nan, np.nan)
+    return {"estimate": float(estimate), "ci_low": float(low), "ci_high": float(high), "level": CI_LEVEL}
+
+
+def _summarize(returns, horizons, horizon_returns, max_drawdown, sharpe, sortino, periods_per_year):
+    result_horizons = []
+    for j, days in enumerate(horizons):
+        values = horizon_returns[:, j]
+        row = {"days": days, "mean": float(values.mean()), "median": float(np.median(values))}
+        for level in VAR_LEVELS:
+            var, cvar = _tail(values, level)
+            pct = int(round(level * 100))
+            row[f"var_{pct}"] = var
+            row[f"cvar_{pct}"] = cvar
+        result_horizons.append(row)
+
+    counts, edges = np.histogram(max_drawdown, bins=50)
+    percentiles = (5, 25, 50, 75, 95)
+    point_sharpe, point_sortino = sharpe_sortino(returns[None, :], periods_per_year)
+    return {
+        "horizons": result_horizons,
+        "max_drawdown": {
+            "days": max(horizons),
+            "mean": float(max_drawdown.mean()),
+            "percentiles": dict(zip(map(str, percentiles), np.percentile(max_drawdown, percentiles).tolist())),
+            "histogram": counts.tolist(),
+            "bins": edges.tolist(),
+        },
+        "sharpe": _interval(sharpe, point_sharpe[0]),
+        "sortino": _interval(sortino, point_sortino[0]),
+    }
+
+
+async def simulate(returns, method="bootstrap", paths=DEFAULT_PATHS, horizons=DEFAULT_HORIZONS,
+                   block=None, resamples=DEFAULT_RESAMPLES, seed=None, periods_per_year=252,
+                   pool=None):
+    """
+    Runs the simulation over `pool` (in this process when None) and returns
+    the summary dict. `seed=None` draws a fresh one; the seed used is
+    reported so the run can be reproduced.
+    """
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+    if len(returns) < 20:
+        raise ValueError("Not enough returns to simulate (need at least 20)")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of: {', '.join(METHODS)}")
+    horizons = sorted(set(int(h) for h in horizons))
+
+    if method == "bootstrap":
+        block = int(block) if block else default_block(len(returns))
+        params = block
+    else:
+        block = None
+        params = fit_parametric(returns)
+    seed = int(np.random.SeedSequence().entropy % (2 ** 63)) if seed is None else int(seed)
+
+    path_chunks = _chunk_sizes(paths, CHUNK_ELEMENTS // max(horizons))
+    ratio_chunks = _chunk_sizes(resamples, CHUNK_ELEMENTS // len(returns))
+    seeds = np.random.SeedSequence(seed).spawn(len(path_chunks) + len(ratio_chunks))
+
+    jobs = [
+        (simulate_paths, returns, method, params, rows, horizons, seeds[i])
+        for i, rows in enumerate(path_chunks)
+    ] + [
+        (simulate_ratios, returns, method, params, rows, periods_per_year, seeds[len(path_chunks) + i])
+        for i, rows in enumerate(ratio_chunks)
+    ]
+
+    start = time.perf_counter()
+    if pool is None:
+        results = [fn(*args) for fn, *args in jobs]
+    else:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(pool, fn, *args) for fn, *args in jobs))
+    elapsed = time.perf_counter() - start
+    metrics.observe_stage("montecarlo", elapsed)
+
+    path_results, ratio_results = results[:len(path_chunks)], results[len(path_chunks):]
+    summary = _summarize(
+        returns, horizons,
+        np.concatenate([r[0] for r in path_results]),
+        np.concatenate([r[1] for r in path_results]),
+        np.concatenate([r[0] for r in ratio_results]),
+        np.concatenate([r[1] for r in ratio_results]),
+        periods_per_year
+    )
+    return {
+        "method": method,
+        "paths": paths,
+        "resamples": resamples,
+        "block_length": block,
+        "parametric": None if method == "bootstrap" else dict(zip(("mean", "scale", "df"), params)),
+        "seed": seed,
+        "observations": len(returns),
+        **summary,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "paths_per_second": round(paths / elapsed) if elapsed > 0 else None,
+    }
@@ -0,0 +1,420 @@
+"""
+Background precompute for hot symbols.
+
+The watchlist is the union of
+    * WATCHLIST (env, comma-separated symbols), precomputed in the shape the
+      dashboard requests (period=max, interval=1d, columnar, all sections)
+    * learned requests: every /api/ticker request is counted by its full
+      parameter set, and the most requested ones (at least LEARN_MIN_HITS,
+      at most LEARNED_MAX) are precomputed as they were asked for. Counts
+      are halved after every post-close run so interest fades out, and are
+      persisted to WATCHLIST_PATH.
+
+Daily/weekly requests are refreshed after the market close (their bars
+don't move again until the next open, which is when the payload expires).
+Intraday requests are refreshed every INTRADAY_REFRESH_SECONDS while the
+market is open. A stored payload is never served for longer than its
+interval's Cache-Control max-age from when it was built (30 s intraday), so
+a precomputed answer is no staler than one a browser could have cached. Each refresh tops up the price store, runs the whole
+pipeline through TickerContext and keeps the encoded response in every
+Content-Encoding, so a matching request is answered from memory.
+
+Refreshes run with at most CONCURRENCY at a time and start no faster than
+RATE_PER_SECOND, so a long watchlist doesn't hammer Yahoo. Market holidays
+aren't modelled: on those days the run is just redundant.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+import pandas as pd
+import encoding
+import http_cache
+import frame_cache
+import metrics
+from ticker_context import TickerContext, SECTIONS
+from pipeline import run_analytics
+
+ENABLED = os.environ.get("SCHEDULER_ENABLED", "1") not in ("0", "false", "False", "")
+WATCHLIST = [s.strip().upper() for s in os.environ.get("WATCHLIST", "").split(",") if s.strip()]
+WATCHLIST_PATH = os.environ.get(
+    "WATCHLIST_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "watchlist.json")
+)
+LEARN_MIN_HITS = int(os.environ.get("SCHEDULER_LEARN_MIN_HITS", "3"))
+LEARNED_MAX = int(os.environ.get("SCHEDULER_LEARNED_MAX", "300"))
+# Distinct request keys counted before the counts are decayed early
+MAX_TRACKED = int(os.environ.get("SCHEDULER_MAX_TRACKED", "20000"))
+
+CONCURRENCY = int(os.environ.get("SCHEDULER_CONCURRENCY", "4"))
+RATE_PER_SECOND = float(os.environ.get("SCHEDULER_RATE_PER_SECOND", "2"))
+# Defaults to the intraday max-age, so payloads are rebuilt as they expire
+INTRADAY_REFRESH_SECONDS = float(os.environ.get("SCHEDULER_INTRADAY_SECONDS", str(http_cache.max_age("1m"))))
+
+MARKET_TZ = os.environ.get("MARKET_TZ", "America/New_York")
+MARKET_OPEN = os.environ.get("MARKET_OPEN", "09:30")
+MARKET_CLOSE = os.environ.get("MARKET_CLOSE", "16:00")
+# Yahoo takes a while to settle the day's final bar
+CLOSE_DELAY_MINUTES = float(os.environ.get("SCHEDULER_CLOSE_DELAY_MINUTES", "20"))
+
+MAX_PAYLOADS = int(os.environ.get("SCHEDULER_MAX_PAYLOADS", "1000"))
+MAX_PAYLOAD_BYTES = int(os.environ.get("SCHEDULER_MAX_PAYLOAD_MB", "512")) * 1024 * 1024
+
+CODINGS = [None, "gzip"] + (["br"] if http_cache.brotli is not None else [])
+
+
+def default_request(symbol):
+    """Request key of the dashboard's main call (see frontend getTickerData)."""
+    return (symbol, "max", "1d", None, None, "columnar", None, "lttb", None, None, tuple(SECTIONS))
+
+
+def is_intraday(key):
+    return key[2] in http_cache.INTRADAY_INTERVALS
+
+
+# ----------------------------------------------------------------------
+# Market clock
+# ----------------------------------------------------------------------
+def market_now():
+    return pd.Timestamp.now(tz=MARKET_TZ)
+
+
+def _at(day, hhmm):
+    hour, minute = map(int, hhmm.split(":"))
+    return day.normalize() + pd.Timedelta(hours=hour, minutes=minute)
+
+
+def is_market_open(now):
+    return now.weekday() < 5 and _at(now, MARKET_OPEN) <= now < _at(now, MARKET_CLOSE)
+
+
+def next_open(now):
+    day = now
+    while True:
+        opening = _at(day, MARKET_OPEN)
+        if day.weekday() < 5 and opening > now:
+            return opening
+        day = day.normalize() + pd.Timedelta(days=1)
+
+
+def next_close_run(now):
+    """Next post-close refresh time strictly after `now`."""
+    day = now
+    while True:
+        run_at = _at(day, MARKET_CLOSE) + pd.Timedelta(minutes=CLOSE_DELAY_MINUTES)
+        if day.weekday() < 5 and run_at > now:
+            return run_at
+        day = day.normalize() + pd.Timedelta(days=1)
+
+
+# ----------------------------------------------------------------------
+# Precomputed payloads
+# ----------------------------------------------------------------------
+class PayloadStore:
+    """
+    request key -> [expires_at, etag, modified, {coding: Response}, last used],
+    LRU with its own entry/byte limits, inside the per-worker cache budget
+    (see frame_cache).
+    """
+
+    name = "payloads"
+
+    def __init__(self, max_entries=MAX_PAYLOADS, max_bytes=MAX_PAYLOAD_BYTES, budget=frame_cache.budget):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if budget is not None:
+            budget.register(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _size(variants):
+        return sum(len(response.body) for response in variants.values())
+
+    def put(self, key, expires_at, etag, modified, variants):
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = [expires_at, etag, modified, variants, time.monotonic()]
+            self.bytes += self._size(variants)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+        if self.budget is not None:
+            self.budget.enforce()
+
+    def get(self, key, coding):
+        """(Response, etag, modified) while fresh, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._drop(key)
+                return None
+            entry[4] = time.monotonic()
+            self._entries.move_to_end(key)
+            return entry[3][coding], entry[1], entry[2]
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= self._size(entry[3])
+
+    def oldest_use(self):
+        with self._lock:
+            return next(iter(self._entries.values()))[4] if self._entries else None
+
+    def evict_oldest(self):
+        with self._lock:
+            if not self._entries:
+                return 0
+            before = self.bytes
+            self._drop(next(iter(self._entries)))
+            return before - self.bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+payloads = PayloadStore()
+
+
+def lookup(key, coding):
+    """Precomputed response for a request key and Content-Encoding, or None."""
+    if not len(payloads):
+        return None
+    result = payloads.get(key, coding)
+    if result is None:
+        metrics.cache_miss("precomputed")
+    else:
+        metrics.cache_hit("precomputed")
+    return result
+
+
+# ----------------------------------------------------------------------
+# Learned watchlist
+# ----------------------------------------------------------------------
+_hits = {}  # request key -> decayed request count
+_hits_lock = threading.Lock()
+
+
+def record(key):
+    """Counts one request for the learned watchlist."""
+    with _hits_lock:
+        _hits[key] = _hits.get(key, 0) + 1
+        crowded = len(_hits) > MAX_TRACKED
+    if crowded:
+        _decay()
+
+
+def learned():
+    with _hits_lock:
+        hot = [(count, key) for key, count in _hits.items() if count >= LEARN_MIN_HITS]
+    hot.sort(key=lambda item: item[0], reverse=True)
+    return [key for _, key in hot[:LEARNED_MAX]]
+
+
+def _decay():
+    with _hits_lock:
+        for key in list(_hits):
+            _hits[key] /= 2
+            if _hits[key] < 0.5:
+                del _hits[key]
+
+
+def load_hits():
+    try:
+        with open(WATCHLIST_PATH, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return
+    with _hits_lock:
+        for key, count in rows:
+            key = tuple(key[:-1]) + (tuple(key[-1]),)
+            _hits[key] = max(_hits.get(key, 0), count)
+
+
+def save_hits():
+    with _hits_lock:
+        rows = [[list(key[:-1]) + [list(key[-1])], count] for key, count in _hits.items()]
+    try:
+        os.makedirs(os.path.dirname(WATCHLIST_PATH), exist_ok=True)
+        tmp_path = WATCHLIST_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, WATCHLIST_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not save watchlist: {e}")
+
+
+def watchlist():
+    keys = [default_request(symbol) for symbol in WATCHLIST] + learned()
+    return list(dict.fromkeys(keys))
+
+
+# ----------------------------------------------------------------------
+# Refresh
+# ----------------------------------------------------------------------
+class RateLimiter:
+    """Spaces out starts to at most `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def precompute(key, expires_at):
+    """
+    Builds every encoded variant of one request and stores it until
+    `expires_at` (epoch seconds), or while the interval's max-age allows if
+    that comes first (intraday bars keep moving while the market is open).
+    """
+    symbol, period, interval, start_date, end_date, fmt, max_points, downsample, view_start, view_end, sections = key
+    if is_intraday(key):
+        expires_at = min(expires_at, time.time() + http_cache.max_age(interval))
+    context = TickerContext(
+        symbol, period=period, interval=interval, start_date=start_date, end_date=end_date,
+        max_points=max_points, downsample=downsample, view_start=view_start, view_end=view_end
+    )
+    try:
+        history = await context.history()
+        # Same validators as the endpoint, so revalidations of a precomputed body still get 304s
+        etag = http_cache.history_etag(history, *key[:-1], ",".join(sections))
+        modified = http_cache.last_modified(history)
+        payload, chart = await context.build(list(sections))
+    except BaseException:
+        context.cancel()
+        raise
+    if context.degraded:
+        # Fallback info/translation: the next request builds it for real instead
+        raise RuntimeError(f"degraded sections: {', '.join(sorted(context.degraded))}")
+    response = await run_analytics("encode", encoding.render, payload, chart, fmt)
+    variants = {}
+    for coding in CODINGS:
+        variants[coding] = await run_analytics(
+            "compress", http_cache.finalize, response, etag, modified, interval, coding
+        )
+    payloads.put(key, expires_at, etag, modified, variants)
+
+
+class Scheduler:
+    def __init__(self):
+        self._task = None
+        self.runs = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_run = None
+        self.next_daily = None
+        self.next_intraday = None
+
+    async def refresh(self, keys, expires_at):
+        """Precomputes `keys` with bounded concurrency and a start rate limit."""
+        if not keys:
+            return
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        limiter = RateLimiter(RATE_PER_SECOND)
+        started = time.perf_counter()
+
+        async def one(key):
+            async with semaphore:
+                await limiter.wait()
+                try:
+                    await precompute(key, expires_at)
+                    self.refreshed += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"⚠️ Precompute failed for {key[0]} ({key[2]}): {e}")
+
+        await asyncio.gather(*(one(key) for key in keys))
+        self.runs += 1
+        self.last_run = time.time()
+        print(f"🗓️ Precomputed {len(keys)} request(s) in {time.perf_counter() - started:.1f}s")
+
+    async def _daily(self, now):
+        keys = [key for key in watchlist() if not is_intraday(key)]
+        await self.refresh(keys, next_open(now).timestamp())
+
+    async def _intraday(self, now):
+        keys = [key for key in watchlist() if is_intraday(key)]
+        await self.refresh(keys, time.time() + INTRADAY_REFRESH_SECONDS)
+
+    async def _loop(self):
+        now = market_now()
+        # Warm start: daily payloads are only worth building while the market is closed
+        if not is_market_open(now):
+            await self._daily(now)
+        self.next_daily = next_close_run(now)
+        self.next_intraday = now
+        while True:
+            now = market_now()
+            if now >= self.next_daily:
+                await self._daily(now)
+                _decay()
+                save_hits()
+                self.next_daily = next_close_run(market_now())
+            if is_market_open(now) and now >= self.next_intraday:
+                await self._intraday(now)
+                self.next_intraday = market_now() + pd.Timedelta(seconds=INTRADAY_REFRESH_SECONDS)
+            intraday_at = self.next_intraday if is_market_open(now) else next_open(now)
+            wake = min(self.next_daily, max(intraday_at, now))
+            await asyncio.sleep(min(max((wake - market_now()).total_seconds(), 1.0), 60.0))
+
+    async def _run(self):
+        try:
+            await self._loop()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Scheduler stopped: {e}")
+
+    def start(self):
+        if self._task is None:
+            load_hits()
+            self._task = asyncio.ensure_future(self._run())
+            print(f"🗓️ Scheduler started ({len(WATCHLIST)} configured, {len(learned())} learned)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        save_hits()
+
+    def stats(self):
+        return {
+            "enabled": ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "configured": WATCHLIST,
+            "learned": len(learned()),
+            "payloads": len(payloads),
+            "payload_bytes": payloads.bytes,
+            "runs": self.runs,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_run": self.last_run,
+            "next_daily": self.next_daily.isoformat() if self.next_daily is not None else None,
+            "next_intraday": self.next_intraday.isoformat() if self.next_intraday is not None else None,
+        }
+
+
+scheduler = Scheduler()
@@ -0,0 +1,117 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one in-flight computation instead
+of each starting their own downloads and analysis; the first caller runs it
+and the rest await the same result. A finished result can be kept for a
+short TTL so a burst that arrives just after it completes is also served
+without recomputing. Errors are shared by the waiting callers but never
+cached.
+
+Each group keeps counters (calls, executions, coalesced, cache hits,
+errors) that `stats()` reports.
+"""
+import os
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+import metrics
+
+_groups = {}
+
+
+class SingleFlight:
+    def __init__(self, name, ttl=0.0, max_entries=256):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight = {}
+        self._results = OrderedDict()  # key -> (expires_at, value)
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.errors = 0
+        _groups[name] = self
+
+    async def run(self, key, factory):
+        """
+        Returns the result of `factory()` (a coroutine function) for `key`,
+        joining an identical call already in flight. A caller that gets
+        cancelled only stops waiting; the shared work keeps running for the
+        others.
+        """
+        self.calls += 1
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[0] >= time.monotonic():
+                self.cache_hits += 1
+                self._results.move_to_end(key)
+                return cached[1]
+            del self._results[key]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = self._in_flight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        self._in_flight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.errors += 1
+            return
+        if self.ttl > 0:
+            self._results[key] = (time.monotonic() + self.ttl, task.result())
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        self._results.clear()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+            "cached": len(self._results),
+            # Share of calls that didn't start their own computation
+            "saved_ratio": round((self.coalesced + self.cache_hits) / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+def stats():
+    return {name: group.stats() for name, group in _groups.items()}
+
+
+@metrics.register_collector
+def _collect():
+    name = "finanalyzer_coalescing_total"
+    lines = [f"# HELP {name} Single-flight outcomes per group.", f"# TYPE {name} counter"]
+    for group, s in stats().items():
+        for outcome in ("executions", "coalesced", "cache_hits", "errors"):
+            lines.append(f'{name}{{group="{group}",outcome="{outcome}"}} {s[outcome]}')
+    return lines
+
+
+RESULT_TTL = float(os.environ.get("COALESCE_RESULT_TTL", "5"))
+MAX_RESULTS = int(os.environ.get("COALESCE_MAX_RESULTS", "256"))
+
+# Upstream (Yahoo) calls: coalesced only, the price store / section cache do the caching
+history_flight = SingleFlight("history")
+info_flight = SingleFlight("info")
+
+# Built ticker responses, keyed by every body-changing parameter (and the ETag),
+# then their compressed variants (same key + Content-Encoding)
+response_flight = SingleFlight("response", ttl=RESULT_TTL, max_entries=MAX_RESULTS)
+compressed_flight = SingleFlight("compressed", ttl=RESULT_TTL, max_entries=MAX_RESULTS)
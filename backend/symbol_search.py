@@ -0,0 +1,296 @@
+"""
+Ticker search: pooled Yahoo session, result cache and a local symbol index.
+
+`search(q)` answers in this order:
+    1. TTL/LRU cache of previous queries
+    2. the local index, when it already has enough matches for the prefix
+    3. Yahoo's search endpoint over a pooled keep-alive session; the quotes
+       it returns are learned into the index
+
+The index is a sorted array of (key, symbol) pairs where keys are the
+symbol and each word of the name, so a prefix lookup is two bisections. It
+is persisted as JSON and can be seeded from a symbol list:
+
+    python symbol_search.py import symbols.csv    # columns: symbol,name[,type,exchange]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import bisect
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+TIMEOUT = float(os.environ.get("SEARCH_TIMEOUT", "5"))
+CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "600"))
+CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+# Answer from the local index (no network) when it has at least this many matches
+LOCAL_MIN_RESULTS = int(os.environ.get("SEARCH_LOCAL_MIN_RESULTS", "6"))
+MAX_RESULTS = 10
+INDEX_PATH = os.environ.get(
+    "SYMBOL_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.json")
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+_cache = OrderedDict()  # normalized query -> (expires_at, results)
+_cache_lock = threading.Lock()
+
+
+def get_session():
+    """One keep-alive session (connection pool) for every search call."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': 'Mozilla/5.0'})
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _words(text):
+    return [w for w in "".join(c if c.isalnum() else " " for c in (text or "").upper()).split() if w]
+
+
+class SymbolIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}  # symbol -> {"symbol", "shortname", "type", "exchange"}
+        self._keys = []     # sorted (key, symbol)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # One writer at a time
+        self._dirty = False
+        self._version = 0   # Bumped on every change, so a save knows what it wrote
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _keys_for(self, entry):
+        return {entry["symbol"].upper(), *_words(entry.get("shortname"))}
+
+    def _normalize(self, entry):
+        return {
+            "symbol": entry.get("symbol"),
+            "shortname": entry.get("shortname"),
+            "type": entry.get("type"),
+            "exchange": entry.get("exchange"),
+        }
+
+    def add(self, entry):
+        """Adds or refreshes one result; returns True if the index changed."""
+        return self.add_many([entry]) > 0
+
+    def add_many(self, entries):
+        """
+        Adds or refreshes results; returns how many changed the index. The
+        new keys are appended and sorted once, so bulk loads stay O(n log n).
+        """
+        entries = [self._normalize(entry) for entry in entries if entry.get("symbol")]
+        with self._lock:
+            stale, fresh, changed = set(), [], 0
+            for entry in entries:
+                symbol = entry["symbol"]
+                old = self._entries.get(symbol)
+                if old == entry:
+                    continue
+                if old is not None:
+                    stale.update((key, symbol) for key in self._keys_for(old))
+                self._entries[symbol] = entry
+                fresh.extend((key, symbol) for key in self._keys_for(entry))
+                changed += 1
+            if not changed:
+                return 0
+            if len(stale) + len(fresh) <= 8:
+                # A search miss learns a handful of quotes: bisect them in place
+                for pair in stale:
+                    i = bisect.bisect_left(self._keys, pair)
+                    if i < len(self._keys) and self._keys[i] == pair:
+                        del self._keys[i]
+                for pair in fresh:
+                    i = bisect.bisect_left(self._keys, pair)
+                    if i == len(self._keys) or self._keys[i] != pair:
+                        self._keys.insert(i, pair)
+            else:
+                keys = set(self._keys) - stale if stale else set(self._keys)
+                keys.update(fresh)
+                self._keys = sorted(keys)
+            self._version += 1
+            self._dirty = True
+            return changed
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Entries whose symbol or a name word starts with `query` (or with each
+        word of a multi-word query). Exact symbol first, then symbol
+        prefixes, then name matches, shorter symbols first.
+        """
+        words = _words(query)
+        if not words:
+            return []
+        q = query.strip().upper()
+        with self._lock:
+            candidates = None
+            for word in words:
+                lo = bisect.bisect_left(self._keys, (word,))
+                hi = bisect.bisect_left(self._keys, (word + "￿",))
+                matched = {symbol for _, symbol in self._keys[lo:hi]}
+                candidates = matched if candidates is None else candidates & matched
+            # Symbols with punctuation (BRK-B, ^MERV, GGAL.BA) as typed
+            lo = bisect.bisect_left(self._keys, (q,))
+            hi = bisect.bisect_left(self._keys, (q + "￿",))
+            candidates |= {symbol for _, symbol in self._keys[lo:hi]}
+            entries = [self._entries[s] for s in candidates]
+
+        def rank(entry):
+            symbol = entry["symbol"].upper()
+            return (symbol != q, not symbol.startswith(q), len(symbol), symbol)
+
+        return sorted(entries, key=rank)[:limit]
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.add_many(json.load(f))
+            self._dirty = False
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._save_lock:
+            with self._lock:
+                entries = list(self._entries.values())
+                version = self._version
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            # Only once it is on disk; changes made meanwhile stay dirty for the next save
+            with self._lock:
+                if self._version == version:
+                    self._dirty = False
+
+
+index = SymbolIndex(INDEX_PATH)
+index.load()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return entry[1]
+
+
+def _cache_put(key, results):
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + CACHE_TTL, results)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def fetch_remote(query):
+    """Yahoo search over the pooled session, in the endpoint's result shape."""
+    response = get_session().get(SEARCH_URL, params={"q": query}, timeout=TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    return [
+        {
+            "symbol": quote.get('symbol'),
+            "shortname": quote.get('shortname', quote.get('longname')),
+            "type": quote.get('quoteType'),
+            "exchange": quote.get('exchange')
+        }
+        for quote in data.get('quotes', [])
+    ]
+
+
+def search(query):
+    key = " ".join(query.split()).lower()
+    if not key:
+        return []
+    cached = _cache_get(key)
+    if cached is not None:
+        metrics.cache_hit("search")
+        return cached
+    metrics.cache_miss("search")
+
+    local = index.search(key)
+    if len(local) >= LOCAL_MIN_RESULTS:
+        metrics.cache_hit("symbol_index")
+        return local
+    metrics.cache_miss("symbol_index")
+
+    try:
+        results = fetch_remote(key)
+    except Exception as e:
+        metrics.upstream_error("yahoo_search")
+        print(f"Search error: {e}")
+        # Whatever the index knows beats an empty dropdown
+        return local
+
+    if index.add_many(results):
+        try:
+            index.save()
+        except OSError as e:
+            # The entries stay dirty in memory; the next save writes them
+            print(f"⚠️ Could not save the symbol index: {e}")
+    _cache_put(key, results)
+    return results
+
+
+def import_symbols(path):
+    """
+    Seeds the index from a CSV (symbol,name[,type,exchange] with a header
+    row) or a JSON list of {"symbol", "shortname", "type", "exchange"}.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            entries = [
+                {
+                    "symbol": (row.get("symbol") or row.get("Symbol") or "").strip(),
+                    "shortname": (row.get("name") or row.get("Name") or row.get("shortname") or "").strip() or None,
+                    "type": row.get("type") or row.get("quoteType") or "EQUITY",
+                    "exchange": row.get("exchange") or row.get("Exchange"),
+                }
+                for row in csv.DictReader(f)
+            ]
+    added = index.add_many(entries)
+    index.save()
+    return added
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "import":
+        print("Usage: python symbol_search.py import <symbols.csv|symbols.json>")
+        sys.exit(1)
+    count = import_symbols(sys.argv[2])
+    print(f"✅ {count} symbol(s) added, index has {len(index)}")
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+# Backend modules are imported flat (`from analysis import ...`), as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stores and caches are configured at import time: keep the tests' writes out of backend/data,
+# and keep the background precompute loop from competing with them
+_root = tempfile.mkdtemp(prefix="finanalyzer-tests-")
+os.environ.setdefault("PRICE_STORE_DIR", os.path.join(_root, "prices"))
+os.environ.setdefault("TRANSLATION_CACHE_DIR", os.path.join(_root, "translations"))
+os.environ.setdefault("SYMBOL_INDEX_PATH", os.path.join(_root, "symbols.json"))
+os.environ.setdefault("WATCHLIST_PATH", os.path.join(_root, "watchlist.json"))
+os.environ.setdefault("SCHEDULER_ENABLED", "0")
+os.environ.setdefault("LIVE_FEED", "simulated")
+
+import pandas as pd
+import pytest
+import yfinance
+from benchmarks import synthetic
+
+
+class _Ticker(synthetic.SyntheticTicker):
+    """Synthetic histories, except for symbols Yahoo doesn't know (NOPE...)."""
+
+    def history(self, *args, **kwargs):
+        if self.ticker.startswith("NOPE"):
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        return super().history(*args, **kwargs)
+
+
+@pytest.fixture
+def synthetic_yahoo(monkeypatch):
+    """Offline, deterministic Yahoo (see benchmarks/synthetic.py)."""
+    monkeypatch.setattr(yfinance, "Ticker", _Ticker)
+    monkeypatch.setattr(yfinance, "download", synthetic.download)
+    return synthetic
@@ -0,0 +1,107 @@
+"""
+Vectorized grid backtests against a plain per-bar reference loop.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+import backtest
+from indicators import compute_indicators
+from risk_engine import RISK_FREE_RATE
+from benchmarks.synthetic import synthetic_history
+
+COST_BPS = 5
+
+
+def _history(n=900):
+    return synthetic_history(n, seed=9)
+
+
+def _reference(close, enter, exit_, cost):
+    """
+    Long/flat loop: the state decided at bar t-1's close is held over bar t,
+    and a change of position costs `cost` on the bar it happens.
+    """
+    state, held, rets = 0, [0], [0.0]
+    for t in range(1, len(close)):
+        state = 1 if enter[t - 1] else (0 if exit_[t - 1] else state)
+        rets.append(state * (close[t] / close[t - 1] - 1) - cost * abs(state - held[-1]))
+        held.append(state)
+
+    wealth, peak, worst = 1.0, 1.0, 0.0
+    for r in rets:
+        wealth *= 1 + r
+        peak = max(peak, wealth)
+        worst = min(worst, wealth / peak - 1)
+    returns = pd.Series(rets[1:])
+    annual = returns.mean() * 252
+    volatility = returns.std() * np.sqrt(252)
+    downside = returns[returns < 0].std() * np.sqrt(252)
+    return {
+        "total_return": wealth - 1,
+        # As calculate_drawdowns: 0 when there's no volatility (a cell that never trades)
+        "sharpe": (annual - RISK_FREE_RATE) / volatility if volatility != 0 else 0.0,
+        "sortino": annual / downside if downside > 0 else 0.0,
+        "max_drawdown": worst,
+        "trades": sum(b > a for a, b in zip(held, held[1:])),
+        "exposure": np.mean(held[1:]),
+    }
+
+
+def _signals(strategy, history):
+    """(enter, exit) per bar from the dashboard's own indicator columns (default parameters)."""
+    close = history["Close"].to_numpy()
+    ind = compute_indicators(history["High"], history["Low"], history["Close"], history["Volume"])
+    with np.errstate(invalid="ignore"):
+        if strategy == "rsi":
+            return ind["RSI"] < 30, ind["RSI"] > 70
+        if strategy == "macd":
+            above = ind["MACD"] > ind["MACD_Signal"]
+            return above, ~above
+        if strategy == "bollinger":
+            return close < ind["BB_Low"], close > ind["BB_Mid"]
+        above = ind["Stoch_K"] > ind["Stoch_D"]
+        crossed = above & ~np.concatenate([[False], above[:-1]])
+        return crossed & (ind["Stoch_K"] < 20), ind["Stoch_K"] > 80
+
+
+def _assert_cell(result, i, expected):
+    for name, value in expected.items():
+        assert result["metrics"][name][i] == pytest.approx(value, rel=1e-9, abs=1e-12), name
+
+
+@pytest.mark.parametrize("strategy", list(backtest.STRATEGIES))
+def test_default_cell_matches_reference_loop(strategy):
+    history = _history()
+    result = asyncio.run(backtest.run(history, strategy, cost_bps=COST_BPS))
+    assert result["cells"] == 1
+    enter, exit_ = _signals(strategy, history)
+    _assert_cell(result, 0, _reference(history["Close"].to_numpy(), enter, exit_, COST_BPS / 10000))
+
+
+def test_rsi_grid_cells_match_reference_loop():
+    history = _history()
+    close = history["Close"].to_numpy()
+    grid = {"window": [5, 14, 21], "lower": [25, 35], "upper": [65, 75]}
+    result = asyncio.run(backtest.run(history, "rsi", grid, cost_bps=COST_BPS))
+    assert result["cells"] == 12
+    params = result["params"]
+    for i in range(result["cells"]):
+        rsi = backtest._rsi(close, params["window"][i])
+        with np.errstate(invalid="ignore"):
+            enter, exit_ = rsi < params["lower"][i], rsi > params["upper"][i]
+        _assert_cell(result, i, _reference(close, enter, exit_, COST_BPS / 10000))
+
+
+def test_chunks_and_pool_do_not_change_results(monkeypatch):
+    history = _history()
+    grid = {"fast": [5, 8, 12], "slow": [20, 26, 30], "signal": [5, 9]}
+    whole = asyncio.run(backtest.run(history, "macd", grid))
+    monkeypatch.setattr(backtest, "CHUNK_ELEMENTS", len(history) * 4)
+    monkeypatch.setattr(backtest, "POOL_MIN_CELLS", 0)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        chunked = asyncio.run(backtest.run(history, "macd", grid, pool=pool))
+    assert chunked["chunks"] > 1
+    for name in backtest.METRIC_COLUMNS:
+        np.testing.assert_array_equal(chunked["metrics"][name], whole["metrics"][name])
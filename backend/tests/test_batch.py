@@ -0,0 +1,47 @@
+"""
+Batch analytics: one row per symbol, and a failing symbol only fails its own row.
+"""
+import pytest
+from fastapi.testclient import TestClient
+import batch
+import main
+from price_store import load_history
+
+
+@pytest.fixture
+def client(synthetic_yahoo):
+    synthetic_yahoo.register("BATA", 800)
+    synthetic_yahoo.register("BATB", 300)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_unknown_symbol_gets_its_error_in_the_row(client):
+    metrics = ["price", "rsi", "max_drawdown", "sharpe"]
+    response = client.post("/api/batch", json={"symbols": ["bata", "NOPE2", "BATB", "BATA"], "metrics": metrics, "period": "max"})
+    assert response.status_code == 200
+    table = response.json()
+    assert table["columns"] == ["symbol", *metrics, "error"]
+    assert [row[0] for row in table["rows"]] == ["BATA", "NOPE2", "BATB"]
+
+    nope = table["rows"][1]
+    assert nope[1:-1] == [None] * len(metrics) and "No data" in nope[-1]
+    for row in (table["rows"][0], table["rows"][2]):
+        history = load_history(row[0])
+        assert row[-1] is None
+        assert row[1:-1] == pytest.approx(batch.symbol_metrics(history, metrics))
+
+
+def test_failing_analysis_only_fails_its_row(synthetic_yahoo):
+    good = synthetic_yahoo.synthetic_history(300)[["Open", "High", "Low", "Close", "Volume"]]
+    broken = good.drop(columns=["Close"])
+    rows = batch.metrics_for_chunk([("GOOD", good), ("BROKEN", broken)], ["price", "rsi"])
+    assert rows[0][0] == "GOOD" and rows[0][-1] is None and None not in rows[0][1:-1]
+    assert rows[1][:3] == ["BROKEN", None, None] and "Close" in rows[1][-1]
+
+
+def test_invalid_requests_are_a_400(client):
+    assert client.post("/api/batch", json={"symbols": [" "]}).status_code == 400
+    assert client.post("/api/batch", json={"symbols": ["BATA"], "metrics": ["alpha"]}).status_code == 400
+    too_many = [f"S{i}" for i in range(batch.MAX_SYMBOLS + 1)]
+    assert client.post("/api/batch", json={"symbols": too_many}).status_code == 400
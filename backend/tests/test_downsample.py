@@ -0,0 +1,71 @@
+"""
+Chart downsampling keeps the point budget, the view window and every
+indicator's extremes.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import main
+from downsample import bucket_extremes, downsample_frame
+from indicators import compute_indicators
+
+
+def _frame(n=6000, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.012, n)))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, n)))
+    volume = rng.integers(100_000, 5_000_000, n).astype(float)
+    frame = pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=pd.bdate_range("2000-01-03", periods=n, name="Date"),
+    )
+    return frame.assign(**compute_indicators(high, low, close, volume))
+
+
+def test_bucket_extremes_matches_brute_force():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(997, 3))
+    values[100:140, 1] = np.nan
+    found = set(bucket_extremes(values, 40).tolist())
+    edges = np.linspace(0, len(values), 21).astype(int)
+    for start, stop in zip(edges[:-1], edges[1:]):
+        for col in range(values.shape[1]):
+            bucket = values[start:stop, col]
+            if np.isnan(bucket).all():
+                continue
+            assert start + int(np.nanargmin(bucket)) in found
+            assert start + int(np.nanargmax(bucket)) in found
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+@pytest.mark.parametrize("max_points", [300, 1000])
+def test_indicator_extremes_survive(method, max_points):
+    frame = _frame()
+    reduced = downsample_frame(frame, max_points, method)
+    assert len(reduced) <= max_points
+    assert reduced.index.is_monotonic_increasing
+    assert reduced.index[0] == frame.index[0] and reduced.index[-1] == frame.index[-1]
+    for col in ("RSI", "Stoch_K", "CCI", "Williams", "MACD_Hist", "ADX", "Volume"):
+        assert np.nanmax(reduced[col]) == np.nanmax(frame[col])
+        assert np.nanmin(reduced[col]) == np.nanmin(frame[col])
+    # Rows are taken whole, so indicators stay aligned with their candles
+    pd.testing.assert_frame_equal(reduced, frame.loc[reduced.index])
+
+
+def test_view_window_is_kept_whole():
+    frame = _frame()
+    view_start = frame.index[-400].strftime("%Y-%m-%d")
+    reduced = downsample_frame(frame, 1000, "lttb", view_start=view_start)
+    assert len(reduced) <= 1000
+    assert reduced.index[-400:].equals(frame.index[-400:])
+
+
+@pytest.mark.parametrize("query", ["view_start=2024-13-01", "view_end=last-week", "view_start=20240101"])
+def test_malformed_view_dates_are_a_400(query):
+    with TestClient(main.app) as client:
+        response = client.get(f"/api/ticker/AAPL?max_points=500&{query}")
+    assert response.status_code == 400
+    assert "YYYY-MM-DD" in response.json()["detail"]
@@ -0,0 +1,52 @@
+"""
+One memory budget across the in-process caches.
+"""
+import time
+import numpy as np
+import pandas as pd
+from frame_cache import MemoryBudget, FrameCache, ObjectCache, estimate_size
+from scheduler import PayloadStore
+from starlette.responses import Response
+
+
+def _frame(n=1000):
+    return pd.DataFrame({"Close": np.arange(n, dtype=float)}, index=pd.bdate_range("2000-01-03", periods=n))
+
+
+def test_budget_evicts_least_recently_used_across_caches():
+    budget = MemoryBudget(max_bytes=60_000)
+    frames = FrameCache("t_frames", budget=budget)
+    sections = ObjectCache("t_sections", 100, size=lambda value: value.nbytes, budget=budget)
+    payloads = PayloadStore(budget=budget)
+
+    frames.put("a", _frame())                                  # ~16 KB
+    time.sleep(0.001)
+    sections.put("b", np.zeros(2000))                          # 16 KB
+    time.sleep(0.001)
+    payloads.put("c", time.time() + 60, "etag", None, {"identity": Response(b"x" * 16_000)})
+    time.sleep(0.001)
+    assert frames.get("a") is not None                         # "a" is now the most recent
+    time.sleep(0.001)
+    sections.put("d", np.zeros(2000))
+
+    assert budget.bytes <= budget.max_bytes
+    assert sections.get("b") is None                            # Oldest use, in another cache than the put
+    assert frames.get("a") is not None and payloads.get("c", "identity") is not None
+    assert budget.evictions == 1
+    assert set(budget.stats()["members"]) == {"t_frames", "t_sections", "payloads"}
+
+
+def test_object_cache_limits_and_ttl():
+    cache = ObjectCache("t_limits", 2, budget=None)
+    for key in "abc":
+        cache.put(key, {"value": key})
+    assert cache.get("a") is None and cache.get("c") == {"value": "c"}
+    cache.put("ttl", [1, 2, 3], ttl=1e-6)
+    time.sleep(0.001)
+    assert cache.get("ttl", "missing") == "missing"
+    assert cache.bytes == sum(estimate_size({"value": key}) for key in "c")
+
+
+def test_estimate_size_counts_nested_arrays():
+    value = {"rows": [np.zeros(1000), np.zeros(1000)], "name": "x"}
+    assert estimate_size(value) > 16_000
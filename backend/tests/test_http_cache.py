@@ -0,0 +1,107 @@
+"""
+Conditional GETs (ETag / Last-Modified -> 304), compression and Cache-Control
+of ticker responses.
+"""
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+import http_cache
+import main
+import translation_cache
+
+
+@pytest.fixture
+def client(synthetic_yahoo):
+    synthetic_yahoo.register("ETAG", 700)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_if_none_match():
+    etag = 'W/"abc"'
+    assert http_cache.is_not_modified({"if-none-match": etag}, etag)
+    assert http_cache.is_not_modified({"if-none-match": '"abc"'}, etag)  # Weak comparison
+    assert http_cache.is_not_modified({"if-none-match": 'W/"old", W/"abc"'}, etag)
+    assert http_cache.is_not_modified({"if-none-match": "*"}, etag)
+    assert not http_cache.is_not_modified({"if-none-match": 'W/"old"'}, etag)
+    # If-None-Match takes precedence over If-Modified-Since
+    modified = "Tue, 02 Jan 2024 00:00:00 GMT"
+    assert not http_cache.is_not_modified({"if-none-match": 'W/"old"', "if-modified-since": modified}, etag, modified)
+
+
+def test_if_modified_since():
+    modified = "Tue, 02 Jan 2024 00:00:00 GMT"
+    assert http_cache.is_not_modified({"if-modified-since": modified}, 'W/"x"', modified)
+    assert http_cache.is_not_modified({"if-modified-since": "Wed, 03 Jan 2024 00:00:00 GMT"}, 'W/"x"', modified)
+    assert not http_cache.is_not_modified({"if-modified-since": "Mon, 01 Jan 2024 00:00:00 GMT"}, 'W/"x"', modified)
+    assert not http_cache.is_not_modified({"if-modified-since": "yesterday"}, 'W/"x"', modified)
+
+
+def test_history_etag_follows_the_last_bar(synthetic_yahoo):
+    history = synthetic_yahoo.synthetic_history(300)
+    etag = http_cache.history_etag(history, "ETAG", "max", "1d")
+    assert etag == http_cache.history_etag(history.copy(), "ETAG", "max", "1d")
+    assert etag != http_cache.history_etag(history, "ETAG", "max", "1wk")
+    revised = history.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 0.01  # The forming bar moved
+    assert etag != http_cache.history_etag(revised, "ETAG", "max", "1d")
+    assert etag != http_cache.history_etag(history.iloc[:-1], "ETAG", "max", "1d")
+
+
+def test_choose_encoding():
+    assert http_cache.choose_encoding("gzip, deflate") == "gzip"
+    assert http_cache.choose_encoding("gzip;q=0, deflate") is None
+    assert http_cache.choose_encoding(None) is None
+    if http_cache.brotli is not None:
+        assert http_cache.choose_encoding("gzip, br") == "br"
+
+
+def test_finalize_compresses_and_sets_validators():
+    body = b'{"values": [' + b"1.0," * 2000 + b'1.0]}'
+    response = http_cache.finalize(Response(body, media_type="application/json"), 'W/"v1"', None, "5m", "gzip")
+    assert gzip.decompress(response.body) == body
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "max-age=30" in response.headers["cache-control"]
+
+    # Without a history ETag the body hash is used; degraded bodies get no validators
+    assert http_cache.finalize(Response(body), None, None, "1d").headers["etag"] == http_cache.body_etag(body)
+    degraded = http_cache.finalize(Response(body), 'W/"v1"', None, "1d", cacheable=False)
+    assert "etag" not in degraded.headers and degraded.headers["cache-control"] == "no-store"
+
+
+def test_revalidation_is_a_304(client):
+    url = "/api/ticker/ETAG?sections=chart,stats"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag, modified = first.headers["etag"], first.headers["last-modified"]
+    assert first.headers["cache-control"] == http_cache.cache_control("1d")
+
+    for headers in ({"If-None-Match": etag}, {"If-Modified-Since": modified}):
+        revalidated = client.get(url, headers=headers)
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+    assert client.get(url, headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+    # Another parameter set is another body, so another ETag
+    assert client.get(url + "&max_points=100").headers["etag"] != etag
+
+
+def test_encodings_share_the_etag(client):
+    url = "/api/ticker/ETAG?sections=chart"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    packed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["etag"] == plain.headers["etag"]
+    assert packed.json() == plain.json()
+
+
+def test_degraded_response_is_not_cacheable(client, monkeypatch):
+    def broken(text, target="es"):
+        raise RuntimeError("translator down")
+
+    monkeypatch.setattr(translation_cache, "translate", broken)
+    response = client.get("/api/ticker/ETAG?sections=info")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store" and "etag" not in response.headers
@@ -0,0 +1,69 @@
+"""
+Persisted IndicatorState: concurrent saves and resuming with catch_up.
+"""
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import compute_indicators, INDICATOR_COLUMNS
+from indicator_state import IndicatorState, save_state, load_state
+
+
+def _history(n=400, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n)))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * 1.005,
+        "Low": np.minimum(open_, close) * 0.995,
+        "Close": close,
+        "Volume": rng.integers(100_000, 1_000_000, n).astype(float),
+    }, index=pd.bdate_range("2020-01-02", periods=n, name="Date"))
+
+
+def test_concurrent_saves_of_one_channel():
+    state = IndicatorState.from_history(_history())
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(50):
+                save_state("STATE", "1d", state, replay=[{"ts": 1}])
+        except Exception as e:  # pragma: no cover - the failure being tested for
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    loaded, replay = load_state("STATE", "1d")
+    assert loaded.last_ts == state.last_ts and replay == [{"ts": 1}]
+
+
+def test_catch_up_matches_full_recompute():
+    history = _history()
+    state = IndicatorState.from_history(history.iloc[:299])
+    # The saved bar was still forming: it closed elsewhere
+    forming = dict(history.iloc[299].to_dict(), ts=history.index[299])
+    forming["Close"] *= 1.01
+    state.update(forming)
+    restored = IndicatorState.from_dict(state.to_dict())
+
+    rows = restored.catch_up(history)
+    assert len(rows) == 101
+    expected = compute_indicators(history["High"], history["Low"], history["Close"], history["Volume"])
+    for col in INDICATOR_COLUMNS:
+        assert rows[-1][1][col] == pytest.approx(float(expected[col][-1]), rel=1e-9, abs=1e-9)
+
+
+def test_catch_up_refuses_readjusted_history():
+    history = _history()
+    state = IndicatorState.from_history(history.iloc[:299])
+    state.update(dict(history.iloc[299].to_dict(), ts=history.index[299]))
+    adjusted = history.copy()
+    adjusted.iloc[:299, :4] *= 0.98  # A dividend re-adjusted the older bars
+    assert state.catch_up(adjusted) is None
+    assert state.catch_up(history.drop(history.index[299])) is None
@@ -0,0 +1,84 @@
+"""
+Live WebSocket endpoint against the local simulated tick feed (LIVE_FEED=simulated).
+"""
+import json
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import live
+import main
+from indicators import compute_indicators
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    # Every 3rd poll opens a new bar; the others revise the forming one
+    hub = live.LiveHub(feed=live.SimulatedFeed(seed=3, bars=300, ticks_per_bar=3), poll_seconds=0.01)
+    monkeypatch.setattr(live, "hub", hub)
+    return hub
+
+
+@pytest.fixture
+def client(hub):
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _receive(ws, count):
+    return [json.loads(ws.receive_text()) for _ in range(count)]
+
+
+def test_snapshot_matches_full_recompute(hub, client):
+    hub.poll_seconds = 60  # No ticks: the snapshot is the stored history
+    with client.websocket_connect("/api/ws/ticker/snapa?interval=1d") as ws:
+        snapshot = json.loads(ws.receive_text())
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["symbol"] == "SNAPA" and snapshot["interval"] == "1d"
+    assert len(snapshot["bars"]) == 1
+    assert snapshot["technical"]
+
+    history = hub.feed.history("SNAPA", "1d")
+    bar = snapshot["bars"][0]
+    assert bar["Date"] == history.index[-1].strftime("%Y-%m-%d")
+    expected = compute_indicators(history["High"], history["Low"], history["Close"], history["Volume"])
+    for col in ("RSI", "MACD", "MACD_Signal", "ADX", "ATR", "CCI", "OBV", "EMA_20"):
+        assert bar[col] == pytest.approx(float(expected[col][-1]), rel=1e-9, abs=1e-9)
+
+
+def test_revised_and_appended_bars(hub, client):
+    with client.websocket_connect("/api/ws/ticker/TICKS?interval=1d") as ws:
+        snapshot, *updates = _receive(ws, 4)
+    current = snapshot["bars"][-1]["Date"]
+
+    # Two ticks revise the forming bar, the third opens the next one
+    revised = [bar for message in updates for bar in message["bars"] if bar.get("revised")]
+    appended = [bar for message in updates for bar in message["bars"] if not bar.get("revised")]
+    assert all(message["type"] == "bars" for message in updates)
+    assert revised and all(bar["Date"] == current for bar in revised)
+    assert revised[0]["Close"] != snapshot["bars"][-1]["Close"]
+    assert appended and appended[0]["Date"] > current
+    assert not np.isnan(appended[0]["RSI"])
+
+
+def test_since_replays_missed_bars(hub, client):
+    hub.poll_seconds = 60
+    history = hub.feed.history("REPLAY", "1d")
+    since = history.index[-3].strftime("%Y-%m-%d")
+    with client.websocket_connect(f"/api/ws/ticker/REPLAY?since={since}") as ws:
+        snapshot = json.loads(ws.receive_text())
+    assert snapshot["type"] == "snapshot"
+    assert [bar["Date"] for bar in snapshot["bars"]] == [d.strftime("%Y-%m-%d") for d in history.index[-3:]]
+
+
+def test_since_older_than_replay_buffer_resyncs(hub, client):
+    hub.poll_seconds = 60
+    with client.websocket_connect("/api/ws/ticker/OLD?since=2000-01-01") as ws:
+        resync, snapshot = _receive(ws, 2)
+    assert resync == {"type": "resync"}
+    assert snapshot["type"] == "snapshot" and len(snapshot["bars"]) == 1
+
+
+def test_invalid_since_is_an_error(client):
+    with client.websocket_connect("/api/ws/ticker/BAD?since=not-a-date") as ws:
+        message = json.loads(ws.receive_text())
+    assert message["type"] == "error"
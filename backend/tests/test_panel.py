@@ -0,0 +1,97 @@
+"""
+Panel correlation/covariance against pandas' pairwise-complete DataFrame.cov/corr,
+before and after incremental patches.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from panel import Panel
+
+
+def _history(n, seed, drop=()):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2022-01-03", periods=n, tz="America/New_York", name="Date")
+    close = pd.Series(50 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), index=index)
+    return close.drop(close.index[list(drop)]).to_frame("Close")
+
+
+def _histories():
+    # Different lengths and holidays, so pairs share different sets of dates
+    return {
+        "AAA": _history(300, 1),
+        "BBB": _history(260, 2, drop=range(40, 45)),
+        "CCC": _history(300, 3, drop=(10, 100, 200)),
+        "DDD": _history(120, 4),
+    }
+
+
+def _expected(histories):
+    returns = pd.DataFrame({
+        symbol: history["Close"].pct_change().iloc[1:].set_axis(history.index[1:].tz_localize(None).normalize())
+        for symbol, history in histories.items()
+    })
+    return returns.cov(), returns.corr(), returns
+
+
+def _assert_matches(panel, histories, lookback=None):
+    symbols = list(histories)
+    cov, corr, _ = panel.matrices(symbols, lookback)
+    expected_cov, expected_corr, returns = _expected(histories)
+    if lookback is not None:
+        returns = returns.reindex(pd.to_datetime(panel.dates[-lookback:]))
+        expected_cov, expected_corr = returns.cov(), returns.corr()
+    np.testing.assert_allclose(cov, expected_cov.loc[symbols, symbols].to_numpy(), rtol=1e-9, atol=1e-14)
+    np.testing.assert_allclose(corr, expected_corr.loc[symbols, symbols].to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_matches_pandas(bulk):
+    histories = _histories()
+    panel = Panel()
+    if bulk:
+        panel.sync(histories)
+    else:
+        for symbol, history in histories.items():
+            assert panel.sync({symbol: history}) == {symbol: "added"}
+    _assert_matches(panel, histories)
+    _assert_matches(panel, histories, lookback=60)
+
+
+def test_patched_statistics_match_a_fresh_computation():
+    histories = _histories()
+    panel = Panel()
+    panel.sync(histories)
+
+    # The forming bar moves, and another symbol gets a new bar
+    revised = histories["AAA"].copy()
+    revised.iloc[-1, 0] *= 1.03
+    grown = _history(121, 4)
+    histories.update(AAA=revised, DDD=grown)
+    assert panel.sync(histories) == {"AAA": "patched", "BBB": "unchanged", "CCC": "unchanged", "DDD": "patched"}
+    _assert_matches(panel, histories)
+
+    # A re-adjusted history changes every return of the symbol
+    histories["CCC"] = histories["CCC"] * np.linspace(0.9, 1.0, len(histories["CCC"]))[:, None]
+    assert panel.sync(histories)["CCC"] == "rebuilt"
+    _assert_matches(panel, histories)
+
+
+def test_rolling_correlation_and_portfolio():
+    histories = _histories()
+    panel = Panel()
+    panel.sync(histories)
+    _, _, returns = _expected(histories)
+
+    dates, corr = panel.rolling_correlation("AAA", ["BBB", "CCC"], window=30, min_periods=15)
+    frame = returns.reindex(pd.to_datetime(dates))
+    for j, symbol in enumerate(["BBB", "CCC"]):
+        pair = frame[["AAA", symbol]].dropna().reindex(frame.index)
+        expected = pair["AAA"].rolling(30, min_periods=15).corr(pair[symbol])
+        np.testing.assert_allclose(corr[:, j], expected.to_numpy(), rtol=1e-7, atol=1e-9)
+
+    weights = {"AAA": 0.5, "BBB": 0.3, "CCC": 0.2}
+    result = panel.portfolio(weights)
+    cov = returns[list(weights)].cov().to_numpy()
+    w = np.array(list(weights.values()))
+    assert result["volatility"] == pytest.approx(np.sqrt(w @ cov @ w * 252), rel=1e-9)
+    assert sum(result["contributions"].values()) == pytest.approx(1.0)
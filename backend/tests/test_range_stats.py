@@ -0,0 +1,86 @@
+"""
+RangeIndex answers match a direct computation over the range.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import range_stats
+from range_stats import RangeIndex, RISK_FREE_RATE
+
+
+def _close(n=777, seed=2):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n)))
+    return pd.Series(close, index=pd.bdate_range("2015-01-02", periods=n, tz="America/New_York"))
+
+
+def _brute_force(close, a, b, periods_per_year=252):
+    prices = close.to_numpy()[a:b + 1]
+    returns = np.diff(np.log(prices))
+    m = len(returns)
+    volatility = returns.std(ddof=1) * np.sqrt(periods_per_year) if m >= 2 else np.nan
+    annual = returns.mean() * periods_per_year if m else np.nan
+    peak = np.maximum.accumulate(prices)
+    return {
+        "bars": b - a + 1,
+        "total_return_pct": (prices[-1] / prices[0] - 1) * 100,
+        "annualized_return_pct": (np.exp(returns.sum() * periods_per_year / m) - 1) * 100 if m else np.nan,
+        "annualized_volatility_pct": volatility * 100,
+        "sharpe_ratio": (annual - RISK_FREE_RATE) / volatility if m >= 2 else np.nan,
+        "max_drawdown_pct": ((prices / peak).min() - 1) * 100,
+    }
+
+
+def test_random_ranges_match_brute_force():
+    close = _close()
+    index = RangeIndex(close)
+    rng = np.random.default_rng(7)
+    pairs = np.sort(rng.integers(0, len(close), size=(400, 2)), axis=1)
+    pairs = np.vstack([pairs, [[0, len(close) - 1], [5, 5], [5, 6], [0, 1], [len(close) - 2, len(close) - 1]]])
+
+    bulk = index.stats(pairs[:, 0], pairs[:, 1])
+    for i, (a, b) in enumerate(pairs):
+        expected = _brute_force(close, a, b)
+        scalar = index.stats(int(a), int(b))
+        for key, value in expected.items():
+            assert scalar[key] == pytest.approx(value, rel=1e-9, abs=1e-9, nan_ok=True), (a, b, key)
+            assert bulk[key][i] == pytest.approx(value, rel=1e-9, abs=1e-9, nan_ok=True), (a, b, key)
+
+
+def test_lengths_around_powers_of_two():
+    # The sparse table pads to a power of two: check the block edges
+    for n in (1, 2, 3, 31, 32, 33, 64, 65):
+        close = _close(n, seed=n)
+        index = RangeIndex(close)
+        for a in range(n):
+            for b in range(a, n, max(1, n // 7)):
+                assert index.stats(a, b)["max_drawdown_pct"] == pytest.approx(
+                    _brute_force(close, a, b)["max_drawdown_pct"], abs=1e-9
+                )
+
+
+def test_date_ranges_and_calendar_years():
+    close = _close()
+    index = RangeIndex(close)
+    result = index.range("2016-01-01", "2017-01-01")  # End exclusive, like Yahoo
+    inside = close[(close.index >= pd.Timestamp("2016-01-01", tz=close.index.tz))
+                   & (close.index < pd.Timestamp("2017-01-01", tz=close.index.tz))]
+    assert (result["start"], result["end"]) == tuple(inside.index[[0, -1]].strftime("%Y-%m-%d"))
+    assert result["total_return_pct"] == pytest.approx((inside.iloc[-1] / inside.iloc[0] - 1) * 100)
+    assert index.range("2030-01-01") is None
+
+    years = index.calendar_years()
+    assert [row["year"] for row in years] == sorted(set(close.index.year))
+    for row in years[1:]:
+        year = close[close.index.year == row["year"]]
+        before = close[close.index.year == row["year"] - 1].iloc[-1]
+        assert row["total_return_pct"] == pytest.approx((year.iloc[-1] / before - 1) * 100)
+
+
+def test_index_is_rebuilt_when_the_last_bar_changes():
+    history = _close().to_frame("Close")
+    first = range_stats.get_index("RSTAT", "1d", history)
+    assert range_stats.get_index("RSTAT", "1d", history.copy()) is first
+    revised = history.copy()
+    revised.iloc[-1, 0] *= 1.01
+    assert range_stats.get_index("RSTAT", "1d", revised) is not first
@@ -0,0 +1,85 @@
+"""
+Monte Carlo risk engine: vectorized results against plain per-path loops,
+and seeds that reproduce on any pool size.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+import risk_engine
+from risk_engine import RISK_FREE_RATE
+
+
+def _returns(n=600, seed=4):
+    return np.random.default_rng(seed).standard_t(5, n) * 0.01 + 0.0003
+
+
+def test_paths_match_a_reference_loop():
+    returns = _returns()
+    horizons = [1, 5, 21, 63]
+    seed = np.random.SeedSequence(1)
+    horizon_returns, max_drawdown = risk_engine.simulate_paths(returns, "bootstrap", 7, 50, horizons, seed)
+    draws = risk_engine._draw(np.random.default_rng(seed), returns, "bootstrap", 7, 50, 63)
+
+    for p in range(50):
+        wealth, peak, worst = 1.0, 1.0, 0.0
+        for day, r in enumerate(draws[p], start=1):
+            wealth *= 1 + r
+            peak = max(peak, wealth)
+            worst = min(worst, wealth / peak - 1)
+            if day in horizons:
+                assert horizon_returns[p, horizons.index(day)] == pytest.approx(wealth - 1, rel=1e-9)
+        assert max_drawdown[p] == pytest.approx(worst, rel=1e-9, abs=1e-12)
+
+
+def test_bootstrap_draws_circular_blocks():
+    returns = np.arange(100, dtype=float)
+    draws = risk_engine._draw(np.random.default_rng(0), returns, "bootstrap", 10, 20, 35)
+    assert draws.shape == (20, 35)
+    for row in draws:
+        for start in range(0, 35, 10):
+            block = row[start:start + 10]
+            assert np.array_equal(block, (block[0] + np.arange(len(block))) % 100)
+
+
+def test_ratios_match_calculate_drawdowns_formulas():
+    sample = np.vstack([_returns(252, seed) for seed in range(8)])
+    sharpe, sortino = risk_engine.sharpe_sortino(sample, 252)
+    for row, s, so in zip(sample, sharpe, sortino):
+        returns = pd.Series(row)
+        annual = returns.mean() * 252
+        assert s == pytest.approx((annual - RISK_FREE_RATE) / (returns.std() * np.sqrt(252)), rel=1e-9)
+        assert so == pytest.approx(annual / (returns[returns < 0].std() * np.sqrt(252)), rel=1e-9)
+
+
+def test_seed_reproduces_on_any_pool(monkeypatch):
+    monkeypatch.setattr(risk_engine, "CHUNK_ELEMENTS", 20_000)  # Several chunks of each kind
+    returns = _returns()
+
+    def run(pool):
+        result = asyncio.run(risk_engine.simulate(returns, paths=3000, horizons=(1, 21, 252), resamples=300,
+                                                  seed=42, pool=pool))
+        return {key: value for key, value in result.items() if key not in ("elapsed_ms", "paths_per_second")}
+
+    local = run(None)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        assert run(pool) == local
+    assert local["seed"] == 42 and [row["days"] for row in local["horizons"]] == [1, 21, 252]
+    for row in local["horizons"]:
+        assert row["cvar_99"] <= row["var_99"] <= row["var_95"] <= row["median"]
+
+
+def test_parametric_fit_and_invalid_input():
+    returns = _returns(5000)
+    mean, scale, df = risk_engine.fit_parametric(returns)
+    assert mean == pytest.approx(returns.mean())
+    assert 4 < df < 30
+    # The fitted t has the sample's variance: scale^2 * df / (df - 2)
+    assert scale ** 2 * df / (df - 2) == pytest.approx(returns.var(ddof=1), rel=1e-9)
+    assert np.isinf(risk_engine.fit_parametric(np.linspace(-0.01, 0.01, 500))[2])
+
+    with pytest.raises(ValueError):
+        asyncio.run(risk_engine.simulate(returns[:10]))
+    with pytest.raises(ValueError):
+        asyncio.run(risk_engine.simulate(returns, method="garch"))
@@ -0,0 +1,50 @@
+"""
+Learned watchlist counting and the freshness of precomputed payloads.
+"""
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+import http_cache
+import main
+import scheduler
+
+
+@pytest.fixture
+def client(monkeypatch, synthetic_yahoo):
+    synthetic_yahoo.register("HOT", 600)
+    monkeypatch.setattr(scheduler, "_hits", {})
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_only_successful_requests_are_counted(client):
+    assert client.get("/api/ticker/NOPE1?sections=chart").status_code == 404
+    assert client.get("/api/ticker/HOT?sections=chart&view_start=2024-13-01").status_code == 400
+    assert client.get("/api/ticker/HOT?sections=chart&downsample=bogus").status_code == 400
+    assert scheduler._hits == {}
+
+    response = client.get("/api/ticker/HOT?sections=chart,stats")
+    assert response.status_code == 200
+    revalidated = client.get("/api/ticker/HOT?sections=chart,stats", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert [key[0] for key in scheduler._hits] == ["HOT"]
+    assert list(scheduler._hits.values()) == [2]
+
+
+@pytest.mark.parametrize("interval", ["5m", "1d"])
+def test_payload_freshness_follows_cache_control(synthetic_yahoo, interval):
+    key = ("HOT", "5d" if interval == "5m" else "1y", interval, None, None, "json",
+           None, "lttb", None, None, ("chart", "stats"))
+    until = time.time() + 3600
+    scheduler.payloads.clear()
+    asyncio.run(scheduler.precompute(key, until))
+    expires_at = scheduler.payloads._entries[key][0]
+    if interval == "5m":
+        # Never served for longer than a browser would cache it
+        assert expires_at <= time.time() + http_cache.max_age(interval)
+    else:
+        assert expires_at == until
+    response, _, _ = scheduler.payloads.get(key, None)
+    assert f"max-age={http_cache.max_age(interval)}" in response.headers["cache-control"]
+    scheduler.payloads.clear()
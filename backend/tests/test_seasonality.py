@@ -0,0 +1,98 @@
+"""
+Parity of the monthly bars built from daily history with Yahoo's interval="1mo"
+bars (auto_adjust=False), which calculate_seasonality used to download.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import build_monthly_bars, calculate_seasonality
+
+
+def _daily(years=6, seed=7):
+    """
+    (adjusted daily frame as yfinance returns it with auto_adjust=True,
+     raw closes) with a quarterly dividend.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2018-01-02", periods=252 * years, tz="America/New_York", name="Date")
+    raw = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+    dividends = np.zeros(len(index))
+    dividends[30::63] = 0.4
+
+    # Every bar before an ex-date is multiplied by (1 - D / raw close of the day before)
+    factor = np.ones(len(index))
+    for k in np.flatnonzero(dividends):
+        factor[:k] *= 1 - dividends[k] / raw[k - 1]
+    adjusted = raw * factor
+    data = pd.DataFrame({
+        "Open": adjusted, "High": adjusted * 1.01, "Low": adjusted * 0.99, "Close": adjusted,
+        "Volume": rng.integers(1_000_000, 5_000_000, len(index)).astype(float),
+        "Dividends": dividends, "Stock Splits": 0.0,
+    }, index=index)
+    return data, pd.Series(raw, index=index)
+
+
+def _yahoo_monthly(raw, start=None, end=None):
+    """Yahoo-style 1mo bars: the month's last raw close, labelled at the first of the month."""
+    if start is not None:
+        raw = raw[(raw.index >= pd.Timestamp(start, tz=raw.index.tz)) & (raw.index < pd.Timestamp(end, tz=raw.index.tz))]
+    monthly = raw.groupby(raw.index.tz_localize(None).to_period("M")).last()
+    monthly.index = monthly.index.to_timestamp().tz_localize(raw.index.tz)
+    returns = monthly.pct_change().dropna()
+    return returns
+
+
+def test_monthly_returns_match_yahoo_bars():
+    data, raw = _daily()
+    monthly = build_monthly_bars(data)
+    expected = _yahoo_monthly(raw)
+
+    assert list(monthly.index) == list(expected.index)
+    np.testing.assert_allclose(monthly["Returns"].to_numpy(), expected.to_numpy(), rtol=1e-12)
+    assert (monthly["Month"] == monthly.index.month).all()
+    assert (monthly["Year"] == monthly.index.year).all()
+
+
+def test_dividend_adjustment_is_undone():
+    data, raw = _daily()
+    # Adjusted closes alone would give different monthly returns around ex-dates
+    naive = data["Close"].resample("MS").last().pct_change().dropna()
+    assert not np.allclose(naive.to_numpy(), _yahoo_monthly(raw).to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(build_monthly_bars(data)["Close"].to_numpy()[-1], raw.iloc[-1], rtol=1e-12)
+
+
+@pytest.mark.parametrize("start_date,end_date", [
+    ("2020-03-01", "2021-07-01"),
+    ("2019-01-01", "2019-02-01"),
+    ("2018-02-01", "2023-01-01"),
+])
+def test_date_range_keeps_reference_month(start_date, end_date):
+    data, raw = _daily()
+    monthly = build_monthly_bars(data, start_date=start_date, end_date=end_date)
+
+    # The old download started one month earlier so the first requested month has a return
+    adjusted_start = (pd.Timestamp(start_date) - pd.DateOffset(months=1)).strftime("%Y-%m-%d")
+    expected = _yahoo_monthly(raw, adjusted_start, end_date)
+    expected = expected[expected.index >= pd.Timestamp(start_date, tz=raw.index.tz)]
+
+    assert monthly.index[0] == pd.Timestamp(start_date, tz=raw.index.tz)
+    assert list(monthly.index) == list(expected.index)
+    np.testing.assert_allclose(monthly["Returns"].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_seasonality_uses_monthly_source_for_range():
+    data, raw = _daily()
+    start_date, end_date = "2020-03-01", "2021-07-01"
+    # The request's own history only covers the range; the full daily history supplies the reference month
+    in_range = data[(data.index >= pd.Timestamp(start_date, tz=data.index.tz))
+                    & (data.index < pd.Timestamp(end_date, tz=data.index.tz))]
+    result = calculate_seasonality(in_range, start_date=start_date, end_date=end_date, monthly_source=data)
+
+    expected = _yahoo_monthly(raw, "2020-02-01", end_date)
+    expected = expected[expected.index >= pd.Timestamp(start_date, tz=raw.index.tz)]
+    march = expected[(expected.index.year == 2020) & (expected.index.month == 3)].iloc[0]
+    heatmap = result["monthly_heatmap"]
+    row = heatmap["index"].index(2020)
+    # The heatmap goes through to_json (10 decimals)
+    assert heatmap["data"][row][heatmap["columns"].index(3)] == pytest.approx(march, abs=1e-9)
+    assert result["avg_monthly"][3] == pytest.approx(expected[expected.index.month == 3].mean(), rel=1e-12)
@@ -0,0 +1,89 @@
+"""
+Single-flight: identical concurrent calls share one execution.
+"""
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+
+def _counting(result=None, error=None, delay=0.02):
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return factory, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test_coalesce")
+    factory, calls = _counting(result={"value": 1})
+
+    async def main():
+        return await asyncio.gather(*(flight.run("key", factory) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert (flight.executions, flight.coalesced, flight.calls) == (1, 9, 10)
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test_keys")
+    factory, calls = _counting(result=1)
+
+    async def main():
+        await asyncio.gather(flight.run("a", factory), flight.run("b", factory))
+
+    asyncio.run(main())
+    assert len(calls) == 2 and flight.coalesced == 0
+
+
+def test_errors_are_shared_but_not_cached():
+    flight = SingleFlight("test_errors", ttl=60)
+    factory, calls = _counting(error=ValueError("upstream down"))
+
+    async def main():
+        results = await asyncio.gather(*(flight.run("key", factory) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            await flight.run("key", factory)
+
+    asyncio.run(main())
+    assert len(calls) == 2 and flight.errors == 2 and flight.stats()["cached"] == 0
+
+
+def test_results_are_kept_for_the_ttl():
+    flight = SingleFlight("test_ttl", ttl=0.05, max_entries=2)
+    factory, calls = _counting(result="body", delay=0)
+
+    async def main():
+        await flight.run("key", factory)
+        await flight.run("key", factory)       # Just finished: served from the kept result
+        await asyncio.sleep(0.06)
+        await flight.run("key", factory)       # Expired: runs again
+        for key in ("b", "c"):
+            await flight.run(key, factory)     # Pushes "key" out (max_entries=2)
+        await flight.run("key", factory)
+
+    asyncio.run(main())
+    assert len(calls) == 5 and flight.cache_hits == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test_cancel")
+    factory, calls = _counting(result="done", delay=0.05)
+
+    async def main():
+        first = asyncio.ensure_future(flight.run("key", factory))
+        second = asyncio.ensure_future(flight.run("key", factory))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("done", True)
+    assert len(calls) == 1
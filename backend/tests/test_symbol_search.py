@@ -0,0 +1,90 @@
+"""
+Local symbol index: bulk loads, prefix lookups and concurrent saves from
+search misses.
+"""
+import json
+import threading
+import pytest
+import symbol_search
+from symbol_search import SymbolIndex
+
+
+def _entry(i):
+    return {"symbol": f"SYM{i}", "shortname": f"Company {i} Holdings", "type": "EQUITY", "exchange": "NMS"}
+
+
+def test_bulk_add_keeps_keys_sorted_and_searchable():
+    index = SymbolIndex()
+    assert index.add_many([_entry(i) for i in range(2000)]) == 2000
+    assert index._keys == sorted(set(index._keys))
+    assert [e["symbol"] for e in index.search("SYM1999")] == ["SYM1999"]
+
+    # A rename drops the old name words
+    renamed = dict(_entry(7), shortname="Renamed Corp")
+    assert index.add(renamed)
+    assert index._keys == sorted(set(index._keys))
+    assert "SYM7" in [e["symbol"] for e in index.search("renamed")]
+    assert "SYM7" not in [e["symbol"] for e in index.search("company 7 ")]
+    assert not index.add(renamed)
+
+
+def test_load_round_trip(tmp_path):
+    path = str(tmp_path / "symbols.json")
+    index = SymbolIndex(path)
+    index.add_many([_entry(i) for i in range(100)])
+    index.save()
+    loaded = SymbolIndex(path)
+    loaded.load()
+    assert len(loaded) == 100 and loaded._keys == index._keys
+    assert not loaded._dirty
+
+
+def test_concurrent_search_misses_save_safely(tmp_path, monkeypatch):
+    index = SymbolIndex(str(tmp_path / "symbols.json"))
+    monkeypatch.setattr(symbol_search, "index", index)
+    monkeypatch.setattr(symbol_search, "_cache", type(symbol_search._cache)())
+    # Every query is a miss that learns two new quotes
+    monkeypatch.setattr(symbol_search, "fetch_remote", lambda q: [
+        {"symbol": f"{q.upper()}A", "shortname": f"{q} alpha", "type": "EQUITY", "exchange": "NMS"},
+        {"symbol": f"{q.upper()}B", "shortname": f"{q} beta", "type": "EQUITY", "exchange": "NMS"},
+    ])
+
+    errors, results = [], []
+
+    def worker(t):
+        try:
+            for i in range(25):
+                results.append(symbol_search.search(f"q{t}x{i}"))
+        except Exception as e:  # pragma: no cover - the failure being tested for
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert all(len(r) == 2 for r in results)
+    assert not list(tmp_path.glob("*.tmp"))
+    # The last save happened after the last change
+    index.save()
+    with open(index.path, encoding="utf-8") as f:
+        saved = {entry["symbol"] for entry in json.load(f)}
+    assert len(saved) == 16 * 25 * 2
+
+
+def test_failed_save_keeps_entries_dirty(tmp_path, monkeypatch):
+    index = SymbolIndex(str(tmp_path / "symbols.json"))
+    index.add(_entry(1))
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(symbol_search.json, "dump", broken_dump)
+    with pytest.raises(OSError):
+        index.save()
+    assert index._dirty
+    monkeypatch.undo()
+    index.save()
+    assert not index._dirty
@@ -0,0 +1,46 @@
+"""
+Completeness of the info section, which decides whether it is cached.
+"""
+import asyncio
+import translation_cache
+from ticker_context import TickerContext
+
+SUMMARY = "Apple Inc. designs, manufactures and markets smartphones."
+
+
+def _info_section(monkeypatch, translate, info=None):
+    context = TickerContext("TEST")
+
+    async def fake_info():
+        return {"longBusinessSummary": SUMMARY} if info is None else info
+
+    monkeypatch.setattr(context, "info", fake_info)
+    monkeypatch.setattr(translation_cache, "translate", translate)
+    return asyncio.run(context._section_info())
+
+
+def test_translated_summary_is_complete(monkeypatch):
+    value, complete = _info_section(monkeypatch, lambda text, target="es": "Apple Inc. diseña teléfonos.")
+    assert complete
+    assert value["longBusinessSummary_es"] == "Apple Inc. diseña teléfonos."
+
+
+def test_summary_returned_unchanged_is_complete(monkeypatch):
+    # Already Spanish (or a name-only summary): the translator gives the same text back
+    value, complete = _info_section(monkeypatch, lambda text, target="es": text)
+    assert complete
+    assert value["longBusinessSummary_es"] == SUMMARY
+
+
+def test_failed_translation_falls_back_and_is_not_cached(monkeypatch):
+    def broken(text, target="es"):
+        raise RuntimeError("translator down")
+
+    value, complete = _info_section(monkeypatch, broken)
+    assert not complete
+    assert value["longBusinessSummary_es"] == SUMMARY
+
+
+def test_missing_info_is_not_complete(monkeypatch):
+    value, complete = _info_section(monkeypatch, lambda text, target="es": text, info={})
+    assert not complete
@@ -0,0 +1,360 @@
+"""
+Lazily evaluated analysis context for one ticker request.
+
+Inputs (history, info, translated summary, benchmarks, indicator frame) and
+output sections are each computed at most once per request, and only when a
+requested section needs them: asking for `sections=info,ratios` never loads
+the price history, and `sections=seasonality` never runs the indicators.
+
+Finished sections are kept in a small TTL cache keyed by the request
+parameters and the last bar of the history, so switching tabs in the
+frontend (a different subset of sections over the same data) hits warm
+results. Fundamentals (info, ratios) are keyed by symbol only.
+"""
+import os
+import asyncio
+import yfinance as yf
+from fastapi import HTTPException
+from analysis import (
+    AnalysisContext,
+    calculate_advanced_indicators,
+    calculate_seasonality,
+    calculate_distribution,
+    calculate_drawdowns,
+    calculate_ratios,
+    calculate_statistics
+)
+from price_store import load_history
+import benchmark_cache
+import translation_cache
+from pipeline import run_stage, run_analytics
+from downsample import downsample_frame
+from singleflight import history_flight, info_flight
+from frame_cache import frames, ObjectCache
+import metrics
+
+SECTIONS = ("chart", "technical", "stats", "info", "ratios", "seasonality", "distribution", "drawdowns")
+# Sections that live under "analysis" in the response
+ANALYSIS_SECTIONS = ("technical", "seasonality", "distribution", "drawdowns", "ratios")
+# Sections that don't depend on the price history
+_FUNDAMENTAL_SECTIONS = ("info", "ratios")
+# Sections whose value is a DataFrame: kept compact and within a byte budget (see frame_cache)
+_FRAME_SECTIONS = ("chart",)
+
+SECTION_TTL = float(os.environ.get("SECTION_CACHE_TTL", "300"))
+INFO_TTL = float(os.environ.get("INFO_CACHE_TTL", "3600"))
+MAX_ENTRIES = int(os.environ.get("SECTION_CACHE_MAX_ENTRIES", "1024"))
+
+# Other sections: sized estimates, within the same per-worker budget as frames
+_cache = ObjectCache("sections", MAX_ENTRIES)
+_MISS = object()
+
+
+def parse_sections(value=None):
+    """Comma-separated section names -> list (all sections when empty)."""
+    if not value:
+        return list(SECTIONS)
+    sections = list(dict.fromkeys(s.strip() for s in value.split(",") if s.strip()))
+    unknown = [s for s in sections if s not in SECTIONS]
+    if unknown or not sections:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown section(s) {', '.join(unknown)}. Use any of: {', '.join(SECTIONS)}"
+        )
+    return sections
+
+
+def needs_history(sections):
+    return any(s not in _FUNDAMENTAL_SECTIONS for s in sections)
+
+
+def _cache_get(key):
+    return _cache.get(key, _MISS)
+
+
+def _cache_put(key, value, ttl):
+    _cache.put(key, value, ttl)
+
+
+def clear_cache():
+    _cache.clear()
+    frames.clear()
+
+
+def _fetch_info(ticker):
+    try:
+        return ticker.info
+    except Exception:
+        metrics.upstream_error("yahoo_info")
+        raise
+
+
+class TickerContext:
+    """
+    One symbol + date range + chart options. Every getter returns an awaitable
+    that is created on first use and shared by everything that needs it.
+    """
+
+    def __init__(self, symbol, period="max", interval="1d", start_date=None, end_date=None,
+                 max_points=None, downsample="lttb", view_start=None, view_end=None):
+        self.symbol = symbol
+        self.period = period
+        self.interval = interval
+        self.start_date = start_date
+        self.end_date = end_date
+        self.max_points = max_points
+        self.downsample = downsample
+        self.view_start = view_start
+        self.view_end = view_end
+        self._ticker = None
+        self._tasks = {}
+        # Sections served with fallback data (info/translation timeouts...): not cacheable anywhere
+        self.degraded = set()
+
+    @property
+    def ticker(self):
+        if self._ticker is None:
+            self._ticker = yf.Ticker(self.symbol)
+        return self._ticker
+
+    def _lazy(self, name, factory):
+        task = self._tasks.get(name)
+        if task is None:
+            task = self._tasks[name] = asyncio.ensure_future(factory())
+        return task
+
+    def cancel(self):
+        """Cancels whatever is still pending (e.g. after the history failed)."""
+        for task in self._tasks.values():
+            task.cancel()
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+    def history(self):
+        return self._lazy("history", self._load_history)
+
+    async def _load_history(self):
+        # Served from the local price store (only bars after the last stored one are downloaded);
+        # concurrent requests for the same history share one load
+        history = await history_flight.run(
+            (self.symbol, self.interval, self.period, self.start_date, self.end_date),
+            lambda: run_stage(
+                "history",
+                load_history,
+                self.symbol,
+                interval=self.interval,
+                period=self.period,
+                start_date=self.start_date,
+                end_date=self.end_date,
+                ticker=self.ticker
+            )
+        )
+        if history.empty:
+            raise HTTPException(status_code=404, detail="No data found for symbol")
+        return history
+
+    def daily_history(self):
+        """
+        Full daily history, for the monthly bars of the seasonality section.
+        None if it can't be loaded.
+        """
+        return self._lazy("daily_history", self._load_daily_history)
+
+    async def _load_daily_history(self):
+        if self.interval == "1d" and self.period == "max" and not self.start_date:
+            return await self.history()
+        # Other ranges (the monthly bars need everything, and the month before start_date)
+        # and other intervals (weekly/intraday bars can't rebuild Yahoo's monthly closes):
+        # the daily store, delta-refreshed and shared like any 1d/max request
+        try:
+            history = await history_flight.run(
+                (self.symbol, "1d", "max", None, None),
+                lambda: run_stage("history", load_history, self.symbol, interval="1d", period="max", ticker=self.ticker)
+            )
+        except Exception as e:
+            print(f"⚠️ Daily history for {self.symbol} unavailable for seasonality: {e}")
+            return None
+        return None if history.empty else history
+
+    def info(self):
+        return self._lazy("info", lambda: info_flight.run(
+            self.symbol, lambda: run_stage("info", _fetch_info, self.ticker, default={})
+        ))
+
+    def summary_es(self):
+        return self._lazy("summary_es", self._translated_summary)
+
+    async def _translated_summary(self):
+        """
+        (summary, translated). Translation is optional: on error or timeout
+        the English summary is used and `translated` is False. A timed-out
+        translation still lands in the translation cache, so the next
+        request gets it for free.
+        """
+        summary_en = translation_cache.business_summary(await self.info())
+        translated = await run_stage("translation", translation_cache.translate, summary_en, "es", default=None)
+        return (translated, True) if translated else (summary_en, False)
+
+    def benchmarks(self):
+        return self._lazy("benchmarks", lambda: run_stage("benchmarks", benchmark_cache.refresh, default=None))
+
+    def analysis(self):
+        """AnalysisContext over the history: derived series shared by every section."""
+        return self._lazy("analysis", self._analysis)
+
+    async def _analysis(self):
+        return AnalysisContext(await self.history())
+
+    def indicators(self):
+        """(full-resolution indicator frame, latest-values dict)"""
+        return self._lazy("indicators", self._indicators)
+
+    async def _indicators(self):
+        return await run_analytics("indicators", calculate_advanced_indicators, await self.analysis())
+
+    # ------------------------------------------------------------------
+    # Sections
+    # ------------------------------------------------------------------
+    def section(self, name):
+        return self._lazy("section:" + name, lambda: self._cached_section(name))
+
+    def prefetch(self, sections):
+        """
+        Starts the price inputs the requested sections will need. Info and the
+        translation start with their sections, after the section cache lookup.
+        """
+        if needs_history(sections):
+            self.history()
+        if "drawdowns" in sections:
+            self.benchmarks()
+
+    def _options(self, name):
+        if name == "chart":
+            return (self.max_points, self.downsample, self.view_start, self.view_end)
+        if name == "drawdowns":
+            return (self.max_points, self.view_start, self.view_end)
+        return ()
+
+    async def _cached_section(self, name):
+        if name in _FUNDAMENTAL_SECTIONS:
+            key, ttl = (self.symbol, name), INFO_TTL
+        else:
+            history = await self.history()
+            # The last bar's values are part of the key: a still-forming session bar keeps its timestamp
+            last = history.iloc[-1]
+            key = (
+                self.symbol, self.interval, self.period, self.start_date, self.end_date,
+                history.index[-1].value, len(history), float(last['Close']), float(last['Volume']),
+                name, self._options(name)
+            )
+            ttl = SECTION_TTL
+
+        if name in _FRAME_SECTIONS:
+            value = frames.get(key)
+            value = _MISS if value is None else value
+        else:
+            value = _cache_get(key)
+        if value is _MISS:
+            metrics.cache_miss("section")
+            value, complete = await getattr(self, "_section_" + name)()
+            # Degraded results (fallback info/translation) are served but not kept
+            if not complete:
+                self.degraded.add(name)
+            elif name in _FRAME_SECTIONS:
+                # Served as stored, so misses and hits encode the same
+                value = await run_analytics("frame_cache", frames.put, key, value, ttl)
+            else:
+                _cache_put(key, value, ttl)
+        else:
+            metrics.cache_hit("section")
+        return value
+
+    async def _section_chart(self):
+        # Indicators need the full history; downsampling happens afterwards so values stay exact
+        frame = (await self.indicators())[0]
+        if self.max_points:
+            frame = await run_analytics(
+                "downsample", downsample_frame, frame, self.max_points,
+                method=self.downsample, view_start=self.view_start, view_end=self.view_end
+            )
+        return frame, True
+
+    async def _section_technical(self):
+        return (await self.indicators())[1], True
+
+    async def _section_stats(self):
+        # Last year for the "Current" stats card
+        history = await self.history()
+        return await run_analytics("statistics", calculate_statistics, AnalysisContext(history.tail(252))), True
+
+    async def _section_seasonality(self):
+        # Barras mensuales desde el histórico diario (sin otra descarga)
+        daily = await self.daily_history()
+        seasonality = await run_analytics(
+            "seasonality",
+            calculate_seasonality,
+            await self.analysis(),
+            start_date=self.start_date,
+            end_date=self.end_date,
+            # None: the request's own bars (month-end closes of the loaded range only)
+            monthly_source=daily
+        )
+        # Without the full daily history the heatmap is approximate: served, not cached
+        return seasonality, daily is not None
+
+    async def _section_distribution(self):
+        return await run_analytics("distribution", calculate_distribution, await self.analysis()), True
+
+    async def _section_drawdowns(self):
+        history = await self.history()
+        # Beta needs the benchmark cache topped up first
+        await self.benchmarks()
+        drawdowns = await run_analytics(
+            "drawdowns",
+            calculate_drawdowns,
+            await self.analysis(),
+            benchmarks=benchmark_cache.benchmark_returns(
+                start=history.index[0].strftime('%Y-%m-%d'),
+                end=history.index[-1].strftime('%Y-%m-%d')
+            ),
+            max_points=self.max_points,
+            view_start=self.view_start,
+            view_end=self.view_end
+        )
+        return drawdowns, True
+
+    async def _section_info(self):
+        info, (summary_es, translated) = await asyncio.gather(self.info(), self.summary_es())
+        # A summary the translator returns unchanged (already Spanish) is still a success
+        complete = bool(info) and translated
+        # Copy: the cached ticker.info dict is never modified
+        return dict(info, longBusinessSummary_es=summary_es), complete
+
+    async def _section_ratios(self):
+        info = await self.info()
+        return calculate_ratios(info), bool(info)
+
+    async def build(self, sections):
+        """
+        Computes the requested sections concurrently and returns
+        (payload, chart frame or None) in the historical response shape,
+        with only the requested keys present.
+        """
+        self.prefetch(sections)
+        try:
+            values = await asyncio.gather(*(self.section(name) for name in sections))
+        except BaseException:
+            self.cancel()
+            raise
+        results = dict(zip(sections, values))
+
+        payload = {"symbol": self.symbol}
+        if "info" in results:
+            payload["info"] = results["info"]
+        if "stats" in results:
+            payload["stats"] = results["stats"]
+        analysis = {name: results[name] for name in ANALYSIS_SECTIONS if name in results}
+        if analysis:
+            payload["analysis"] = analysis
+        return payload, results.get("chart")
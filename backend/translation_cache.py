@@ -0,0 +1,174 @@
+"""
+Persistent, content-addressed cache for company summary translations.
+
+Entries are keyed by sha256(target language + source text), so a summary is
+only sent to Google Translate again when its text actually changes. The
+cache directory is bounded by TRANSLATION_CACHE_MAX_MB; the least recently
+used entries are evicted first.
+
+Bulk pre-translation:
+    python translation_cache.py AAPL MSFT GGAL
+    python translation_cache.py --file symbols.txt
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from deep_translator import GoogleTranslator
+import metrics
+
+CACHE_DIR = os.environ.get(
+    "TRANSLATION_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "translations")
+)
+MAX_BYTES = int(float(os.environ.get("TRANSLATION_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+_lock = threading.Lock()
+_total_bytes = None  # Lazily computed on first write
+
+
+def cache_key(text, target="es"):
+    return hashlib.sha256(f"{target}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    # Two-level fan-out keeps directories small
+    return os.path.join(CACHE_DIR, key[:2], key + ".txt")
+
+
+def get(text, target="es"):
+    """Returns the cached translation or None."""
+    path = _path(cache_key(text, target))
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            translated = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(path)  # Mark as recently used for eviction
+    except OSError:
+        pass
+    return translated
+
+
+def _entries():
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.endswith(".txt"):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+
+def _evict():
+    """Deletes least recently used entries until the cache fits MAX_BYTES."""
+    global _total_bytes
+    entries = sorted(_entries(), key=lambda e: e[2])
+    _total_bytes = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if _total_bytes <= MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            _total_bytes -= size
+        except OSError:
+            pass
+
+
+def put(text, translated, target="es"):
+    global _total_bytes
+    path = _path(cache_key(text, target))
+    data = translated.encode("utf-8")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with _lock:
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        if _total_bytes is None:
+            _evict()
+        else:
+            _total_bytes += len(data) - previous
+            if _total_bytes > MAX_BYTES:
+                _evict()
+
+
+def translate(text, target="es"):
+    """
+    Translates `text`, hitting Google Translate only on a cache miss.
+    Errors propagate so callers can decide on a fallback.
+    """
+    cached = get(text, target)
+    if cached is not None:
+        metrics.cache_hit("translation")
+        return cached
+    metrics.cache_miss("translation")
+    try:
+        translated = GoogleTranslator(source='auto', target=target).translate(text)
+    except Exception:
+        metrics.upstream_error("translation")
+        raise
+    if translated:
+        put(text, translated, target)
+    return translated
+
+
+def business_summary(info):
+    return info.get('longBusinessSummary') or info.get('description') or "No summary available."
+
+
+def pretranslate(symbols, target="es", delay=0.5):
+    """
+    Warms the cache with the business summary of each symbol.
+    Returns (translated, already_cached, failed) counts.
+    """
+    import yfinance as yf
+
+    translated = cached = failed = 0
+    for symbol in symbols:
+        try:
+            summary = business_summary(yf.Ticker(symbol).info)
+            if get(summary, target) is not None:
+                cached += 1
+                print(f"✓ {symbol}: already cached")
+                continue
+            translate(summary, target)
+            translated += 1
+            print(f"✅ {symbol}: translated")
+            time.sleep(delay)  # Be gentle with the translation service
+        except Exception as e:
+            failed += 1
+            print(f"❌ {symbol}: {e}")
+    return translated, cached, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-translate company summaries into the translation cache.")
+    parser.add_argument("symbols", nargs="*", help="Ticker symbols, e.g. AAPL MSFT GGAL")
+    parser.add_argument("--file", help="Text file with one symbol per line")
+    parser.add_argument("--target", default="es", help="Target language (default: es)")
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds between translation calls")
+    args = parser.parse_args(argv)
+
+    symbols = list(args.symbols)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            symbols += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not symbols:
+        parser.error("no symbols given")
+
+    translated, cached, failed = pretranslate(symbols, target=args.target, delay=args.delay)
+    print(f"Done: {translated} translated, {cached} already cached, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
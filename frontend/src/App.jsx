@@ -7,7 +7,7 @@ import TechnicalAnalysis from './components/TechnicalAnalysis';
 import Statistics from './components/Statistics';
 import Ratios from './components/Ratios';
 import StatsRangeSelector from './components/StatsRangeSelector';
-import { getTickerData } from './api';
+import { getTickerData, subscribeTicker } from './api';
 import { LayoutDashboard, TrendingUp, Activity } from 'lucide-react';
 import {
     calculateTotalReturn
@@ -113,6 +113,40 @@ function App() {
         }
     };
 
+    // --- LIVE UPDATES: only new/revised bars, no full re-download ---
+    // Subscribes once the loaded data belongs to the current symbol
+    const liveSymbol = backendData?.symbol;
+    useEffect(() => {
+        if (!liveSymbol || historicalData.length === 0) return;
+        const lastDate = historicalData[historicalData.length - 1]?.date;
+        const close = subscribeTicker(liveSymbol, '1d', lastDate, (message) => {
+            if (message.type === 'resync') {
+                fetchData(liveSymbol);
+                return;
+            }
+            if (!message.bars) return;
+            setHistoricalData(prev => {
+                const next = [...prev];
+                for (const bar of message.bars) {
+                    const row = {
+                        ...bar,
+                        date: bar.Date, open: bar.Open, high: bar.High,
+                        low: bar.Low, close: bar.Close, volume: bar.Volume
+                    };
+                    const last = next[next.length - 1];
+                    if (last && last.date === bar.Date) next[next.length - 1] = { ...last, ...row };
+                    else if (!last || bar.Date > last.date) next.push(row);
+                }
+                return next;
+            });
+            if (message.technical) {
+                setBackendData(prev => prev && ({ ...prev, analysis: { ...prev.analysis, technical: message.technical } }));
+            }
+        });
+        return close;
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [liveSymbol]);
+
     const handleSearch = (newSymbol) => {
         setSymbol(newSymbol);
     };
@@ -203,7 +237,8 @@ function App() {
                 console.log(`Llamando al backend con rango: ${startDateStr} a ${endDateStr}`);
 
                 // **LLAMAR AL BACKEND CON RANGO DE FECHAS**
-                const result = await getTickerData(symbol, 'max', '1d', startDateStr, endDateStr);
+                // Solo las secciones que usa <Statistics> (sin chart_data ni info)
+                const result = await getTickerData(symbol, 'max', '1d', startDateStr, endDateStr, ['seasonality', 'distribution', 'drawdowns']);
 
                 if (result && result.analysis) {
                     console.log('✓ Estadísticas recibidas del backend');
@@ -9,13 +9,48 @@ export const searchTicker = async (query) => {
     return response.data;
 };
 
-export const getTickerData = async (symbol, period = '1y', interval = '1d', start_date = null, end_date = null) => {
-    let url = `/ticker/${symbol}?period=${period}&interval=${interval}`;
+// chart_data comes columnar ({ Date: [...], Close: [...] }) to avoid repeating
+// every key on every bar; rebuild the row objects the components expect.
+const columnarToRecords = (columns) => {
+    if (!columns || Array.isArray(columns)) return columns || [];
+    const keys = Object.keys(columns);
+    const length = keys.length ? columns[keys[0]].length : 0;
+    const records = new Array(length);
+    for (let i = 0; i < length; i++) {
+        const row = {};
+        for (const key of keys) row[key] = columns[key][i];
+        records[i] = row;
+    }
+    return records;
+};
+
+// sections: optional list (e.g. ['seasonality', 'drawdowns']); only those are computed and returned
+export const getTickerData = async (symbol, period = '1y', interval = '1d', start_date = null, end_date = null, sections = null) => {
+    let url = `/ticker/${symbol}?period=${period}&interval=${interval}&format=columnar`;
     if (start_date && end_date) {
         url += `&start_date=${start_date}&end_date=${end_date}`;
     }
+    if (sections) {
+        url += `&sections=${sections.join(',')}`;
+    }
     const response = await api.get(url);
-    return response.data;
+    const data = response.data;
+    if (data && data.chart_data) data.chart_data = columnarToRecords(data.chart_data);
+    return data;
+};
+
+// Live bars over WebSocket: onMessage gets { type: 'snapshot' | 'bars' | 'resync' | 'error', bars, technical }.
+// `since` is the last Date the caller already has, so missed bars are replayed. Returns a close function.
+export const subscribeTicker = (symbol, interval = '1d', since = null, onMessage = () => {}) => {
+    const base = new URL(api.defaults.baseURL, window.location.href);
+    base.protocol = base.protocol === 'https:' ? 'wss:' : 'ws:';
+    let url = `${base.href.replace(/\/$/, '')}/ws/ticker/${symbol}?interval=${interval}`;
+    if (since) {
+        url += `&since=${encodeURIComponent(since)}`;
+    }
+    const socket = new WebSocket(url);
+    socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+    return () => socket.close();
 };
 
 export default api;